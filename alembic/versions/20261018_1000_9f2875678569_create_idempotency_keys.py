@@ -0,0 +1,40 @@
+"""Create idempotency_keys table
+
+Revision ID: 9f2875678569
+Revises: 75867baf3a62
+Create Date: 2026-10-18 10:00:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f2875678569'
+down_revision: Union[str, None] = '75867baf3a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('ID', sa.Integer(), autoincrement=True, nullable=False, comment='冪等キー一意キー'),
+    sa.Column('IDEMPOTENCY_KEY', sa.String(length=64), nullable=False, comment='Idempotency-Keyヘッダの値'),
+    sa.Column('REQUEST_HASH', sa.String(length=64), nullable=False, comment='リクエスト本文のハッシュ'),
+    sa.Column('TRD_ID', sa.Integer(), nullable=True, comment='取引一意キー'),
+    sa.Column('RESPONSE', sa.Text(), nullable=False, comment='初回レスポンス（JSON）'),
+    sa.Column('CREATED_AT', sa.DateTime(), nullable=False, comment='登録日時'),
+    sa.ForeignKeyConstraint(['TRD_ID'], ['transactions.TRD_ID'], onupdate='NO ACTION', ondelete='NO ACTION'),
+    sa.PrimaryKeyConstraint('ID'),
+    comment='購入APIの冪等キー'
+    )
+    op.create_index(op.f('ix_idempotency_keys_IDEMPOTENCY_KEY'), 'idempotency_keys', ['IDEMPOTENCY_KEY'], unique=True)
+    op.create_index(op.f('ix_idempotency_keys_CREATED_AT'), 'idempotency_keys', ['CREATED_AT'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_CREATED_AT'), table_name='idempotency_keys')
+    op.drop_index(op.f('ix_idempotency_keys_IDEMPOTENCY_KEY'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
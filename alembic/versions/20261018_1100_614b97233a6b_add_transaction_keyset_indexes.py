@@ -0,0 +1,30 @@
+"""Add composite indexes for transaction keyset pagination
+
+Revision ID: 614b97233a6b
+Revises: 9f2875678569
+Create Date: 2026-10-18 11:00:41.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '614b97233a6b'
+down_revision: Union[str, None] = '9f2875678569'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_DATETIME_TRD_ID', 'transactions', ['DATETIME', 'TRD_ID'], unique=False)
+    op.create_index('ix_transactions_STORE_CD_POS_NO_DATETIME', 'transactions', ['STORE_CD', 'POS_NO', 'DATETIME', 'TRD_ID'], unique=False)
+    op.create_index('ix_transactions_EMP_CD_DATETIME', 'transactions', ['EMP_CD', 'DATETIME', 'TRD_ID'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_EMP_CD_DATETIME', table_name='transactions')
+    op.drop_index('ix_transactions_STORE_CD_POS_NO_DATETIME', table_name='transactions')
+    op.drop_index('ix_transactions_DATETIME_TRD_ID', table_name='transactions')
@@ -0,0 +1,46 @@
+"""Create daily_sales and daily_product_sales rollup tables
+
+Revision ID: 09b9e7386047
+Revises: 614b97233a6b
+Create Date: 2026-10-18 12:00:27.551840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '09b9e7386047'
+down_revision: Union[str, None] = '614b97233a6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_sales',
+    sa.Column('SALES_DATE', sa.Date(), nullable=False, comment='営業日'),
+    sa.Column('STORE_CD', sa.String(length=5), nullable=False, comment='店舗コード'),
+    sa.Column('POS_NO', sa.String(length=3), nullable=False, comment='POS機ID'),
+    sa.Column('SALES_CNT', sa.Integer(), nullable=False, comment='取引件数'),
+    sa.Column('TOTAL_AMT', sa.BigInteger(), nullable=False, comment='合計金額'),
+    sa.Column('TTL_AMT_EX_TAX', sa.BigInteger(), nullable=False, comment='合計金額（税抜）'),
+    sa.PrimaryKeyConstraint('SALES_DATE', 'STORE_CD', 'POS_NO'),
+    comment='日次売上集計'
+    )
+    op.create_table('daily_product_sales',
+    sa.Column('SALES_DATE', sa.Date(), nullable=False, comment='営業日'),
+    sa.Column('STORE_CD', sa.String(length=5), nullable=False, comment='店舗コード'),
+    sa.Column('POS_NO', sa.String(length=3), nullable=False, comment='POS機ID'),
+    sa.Column('PRD_ID', sa.Integer(), nullable=False, comment='商品一意キー'),
+    sa.Column('QTY', sa.Integer(), nullable=False, comment='販売数量'),
+    sa.Column('AMT', sa.BigInteger(), nullable=False, comment='販売金額'),
+    sa.PrimaryKeyConstraint('SALES_DATE', 'STORE_CD', 'POS_NO', 'PRD_ID'),
+    comment='日次商品別売上集計'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_product_sales')
+    op.drop_table('daily_sales')
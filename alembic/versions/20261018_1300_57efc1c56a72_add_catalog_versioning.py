@@ -0,0 +1,47 @@
+"""Add catalog versioning (sequences, product VERSION, product_tombstones)
+
+Revision ID: 57efc1c56a72
+Revises: 09b9e7386047
+Create Date: 2026-10-18 13:00:12.804315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57efc1c56a72'
+down_revision: Union[str, None] = '09b9e7386047'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sequences = op.create_table('sequences',
+    sa.Column('NAME', sa.String(length=50), nullable=False, comment='カウンタ名'),
+    sa.Column('VALUE', sa.BigInteger(), nullable=False, comment='現在値'),
+    sa.PrimaryKeyConstraint('NAME'),
+    comment='採番カウンタ'
+    )
+    op.bulk_insert(sequences, [{'NAME': 'catalog_version', 'VALUE': 0}])
+    op.create_table('product_tombstones',
+    sa.Column('PRD_ID', sa.Integer(), autoincrement=False, nullable=False, comment='商品一意キー'),
+    sa.Column('CODE', sa.String(length=25), nullable=False, comment='商品コード(バーコード)'),
+    sa.Column('VERSION', sa.BigInteger(), nullable=False, comment='削除時のカタログバージョン'),
+    sa.Column('DELETED_AT', sa.DateTime(), nullable=False, comment='削除日時'),
+    sa.PrimaryKeyConstraint('PRD_ID'),
+    comment='削除済み商品'
+    )
+    op.create_index(op.f('ix_product_tombstones_VERSION'), 'product_tombstones', ['VERSION'], unique=False)
+    op.add_column('product_master', sa.Column('VERSION', sa.BigInteger(), server_default='0', nullable=False, comment='最終更新時のカタログバージョン'))
+    op.create_index(op.f('ix_product_master_VERSION'), 'product_master', ['VERSION'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_master_VERSION'), table_name='product_master')
+    op.drop_column('product_master', 'VERSION')
+    op.drop_index(op.f('ix_product_tombstones_VERSION'), table_name='product_tombstones')
+    op.drop_table('product_tombstones')
+    op.drop_table('sequences')
@@ -0,0 +1,38 @@
+"""Add tax_rates and product TAX_CD
+
+Revision ID: aeec70889c8e
+Revises: 57efc1c56a72
+Create Date: 2026-10-18 14:00:08.215637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aeec70889c8e'
+down_revision: Union[str, None] = '57efc1c56a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tax_rates = op.create_table('tax_rates',
+    sa.Column('TAX_CD', sa.String(length=2), nullable=False, comment='消費税区分'),
+    sa.Column('NAME', sa.String(length=20), nullable=False, comment='税率の名称'),
+    sa.Column('RATE', sa.Integer(), nullable=False, comment='税率（%）'),
+    sa.PrimaryKeyConstraint('TAX_CD'),
+    comment='消費税率マスタ'
+    )
+    op.bulk_insert(tax_rates, [
+        {'TAX_CD': '10', 'NAME': '標準税率', 'RATE': 10},
+        {'TAX_CD': '08', 'NAME': '軽減税率', 'RATE': 8},
+    ])
+    op.add_column('product_master', sa.Column('TAX_CD', sa.String(length=2), server_default='10', nullable=False, comment='消費税区分（tax_rates.TAX_CD）'))
+
+
+def downgrade() -> None:
+    op.drop_column('product_master', 'TAX_CD')
+    op.drop_table('tax_rates')
@@ -0,0 +1,69 @@
+"""Create transaction archive tables (monthly RANGE partitions on MySQL)
+
+Revision ID: 6fcfe753ef03
+Revises: aeec70889c8e
+Create Date: 2026-10-18 15:00:41.093318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6fcfe753ef03'
+down_revision: Union[str, None] = 'aeec70889c8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 月ごとのパーティションは archive_transactions.py が必要な月の分だけ p_future から切り出す
+INITIAL_PARTITIONS = (
+    "PARTITION BY RANGE (TO_DAYS(`DATETIME`)) ("
+    "PARTITION p_history VALUES LESS THAN (TO_DAYS('2025-10-01')), "
+    "PARTITION p_future VALUES LESS THAN MAXVALUE)"
+)
+
+
+def upgrade() -> None:
+    op.create_table('transactions_archive',
+    sa.Column('TRD_ID', sa.Integer(), autoincrement=False, nullable=False, comment='取引一意キー'),
+    sa.Column('DATETIME', sa.DateTime(), nullable=False, comment='取引日時'),
+    sa.Column('EMP_CD', sa.String(length=10), nullable=True, comment='レジ担当者コード'),
+    sa.Column('STORE_CD', sa.String(length=5), nullable=True, comment='店舗コード'),
+    sa.Column('POS_NO', sa.String(length=3), nullable=True, comment='POS機ID'),
+    sa.Column('TOTAL_AMT', sa.Integer(), nullable=True, comment='合計金額'),
+    sa.Column('TTL_AMT_EX_TAX', sa.Integer(), nullable=True, comment='合計金額（税抜）'),
+    sa.PrimaryKeyConstraint('TRD_ID', 'DATETIME'),
+    comment='取引ヘッダ（アーカイブ）'
+    )
+    op.create_index('ix_transactions_archive_DATETIME_TRD_ID', 'transactions_archive', ['DATETIME', 'TRD_ID'], unique=False)
+    op.create_index('ix_transactions_archive_STORE_CD_POS_NO_DATETIME', 'transactions_archive', ['STORE_CD', 'POS_NO', 'DATETIME', 'TRD_ID'], unique=False)
+    op.create_index('ix_transactions_archive_EMP_CD_DATETIME', 'transactions_archive', ['EMP_CD', 'DATETIME', 'TRD_ID'], unique=False)
+    op.create_table('transaction_details_archive',
+    sa.Column('TRD_ID', sa.Integer(), autoincrement=False, nullable=False, comment='取引一意キー'),
+    sa.Column('DTL_ID', sa.Integer(), autoincrement=False, nullable=False, comment='取引明細一意キー'),
+    sa.Column('DATETIME', sa.DateTime(), nullable=False, comment='取引日時（ヘッダと同じ）'),
+    sa.Column('PRD_ID', sa.Integer(), nullable=False, comment='商品一意キー'),
+    sa.Column('PRD_CODE', sa.String(length=13), nullable=False, comment='商品コード'),
+    sa.Column('PRD_NAME', sa.String(length=50), nullable=False, comment='商品名称'),
+    sa.Column('PRD_PRICE', sa.Integer(), nullable=False, comment='商品単価'),
+    sa.Column('TAX_CD', sa.String(length=2), nullable=True, comment='消費税区分'),
+    sa.PrimaryKeyConstraint('TRD_ID', 'DTL_ID', 'DATETIME'),
+    comment='取引明細（アーカイブ）'
+    )
+    op.create_index('ix_transaction_details_archive_DATETIME', 'transaction_details_archive', ['DATETIME'], unique=False)
+
+    if op.get_bind().dialect.name == 'mysql':
+        # 外部キーのない（パーティション分割できる）アーカイブだけを月ごとに分割する
+        op.execute(f"ALTER TABLE transactions_archive {INITIAL_PARTITIONS}")
+        op.execute(f"ALTER TABLE transaction_details_archive {INITIAL_PARTITIONS}")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_details_archive_DATETIME', table_name='transaction_details_archive')
+    op.drop_table('transaction_details_archive')
+    op.drop_index('ix_transactions_archive_EMP_CD_DATETIME', table_name='transactions_archive')
+    op.drop_index('ix_transactions_archive_STORE_CD_POS_NO_DATETIME', table_name='transactions_archive')
+    op.drop_index('ix_transactions_archive_DATETIME_TRD_ID', table_name='transactions_archive')
+    op.drop_table('transactions_archive')
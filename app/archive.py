@@ -0,0 +1,130 @@
+"""
+取引のアーカイブ（締めた月の取引を別テーブルへ移す）
+transactions / transaction_details には直近の取引だけを残し、それより古い取引は
+transactions_archive / transaction_details_archive（MySQLでは月ごとの RANGE パーティション）へ移す。
+購入の登録・直近の一覧は小さいホットテーブルだけを使い、古い期間の照会・エクスポートは
+アーカイブのパーティションの絞り込みで必要な月だけを読む
+
+- 移動済みの境界（これより前の取引はアーカイブにある日付）は sequences テーブルに記録する
+- 境界は移動の前に進めてコミットするため、移動中も読み取り側はホットとアーカイブの両方を見る（取りこぼさない）
+- 境界はワーカーごとにキャッシュせず、アーカイブを読むか決めるたびに sequences テーブルから読む
+  （別のプロセスでの移動直後も見落とさない。主キーの1行の参照で、一覧・レシートは直近のテーブルだけで足りない場合だけ読む）
+- 1チャンクの移動（コピー → 削除）は1トランザクションで行うため、同じ取引が両方に見えることはない
+"""
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models import IdempotencyKey, Transaction, TransactionArchive, TransactionDetail, TransactionDetailArchive
+from app import sequences
+from app.metrics import registry as metrics_registry
+
+metrics_registry.describe("archived_transactions_total", "counter", "アーカイブへ移動した取引数")
+
+# マイグレーションで作成する最初のパーティション（これより前の月は p_history にまとめる）
+PARTITION_START = date(2025, 10, 1)
+
+ARCHIVE_TABLES = (TransactionArchive.__tablename__, TransactionDetailArchive.__tablename__)
+
+_HEADER_COLUMNS = ["TRD_ID", "DATETIME", "EMP_CD", "STORE_CD", "POS_NO", "TOTAL_AMT", "TTL_AMT_EX_TAX"]
+_DETAIL_COLUMNS = ["TRD_ID", "DTL_ID", "PRD_ID", "PRD_CODE", "PRD_NAME", "PRD_PRICE", "TAX_CD"]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """day の月初から months か月後の月初"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archived_before(db: Session) -> Optional[datetime]:
+    """この日時（UTC）より前の取引はアーカイブにある（まだ移動していなければ None）"""
+    value = sequences.current_value(db, sequences.TRANSACTION_ARCHIVE_BEFORE)
+    if not value:
+        return None
+    return datetime.strptime(str(value), "%Y%m%d")
+
+
+def ensure_partitions(db: Session, until: date) -> List[str]:
+    """
+    until の月まで、アーカイブテーブルに月ごとのパーティション（pYYYYMM）を作成する
+    末尾の p_future を分割して追加するため、データの移動は発生しない。MySQL以外では何もしない
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return []
+    added = []
+    for table in ARCHIVE_TABLES:
+        existing = set(db.execute(
+            text(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ),
+            {"table": table},
+        ).scalars())
+        definitions = []
+        month = PARTITION_START
+        while month <= month_start(until):
+            name = f"p{month:%Y%m}"
+            if name not in existing:
+                definitions.append(f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{add_months(month, 1)}'))")
+                added.append(f"{table}.{name}")
+            month = add_months(month, 1)
+        if definitions:
+            definitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+            db.execute(text(f"ALTER TABLE `{table}` REORGANIZE PARTITION p_future INTO ({', '.join(definitions)})"))
+    return added
+
+
+def archive_transactions(db: Session, before: date, chunk_size: int = 5000) -> Dict[str, int]:
+    """
+    取引日時（UTC）が before より前の取引・明細をアーカイブへ移動する（チャンクごとにコミット）
+    境界より前に遅れて登録された取引も、次回の実行で移動される
+    """
+    cutoff = datetime.combine(before, time.min)
+    current = archived_before(db)
+    if current is None or current < cutoff:
+        sequences.set_value(db, sequences.TRANSACTION_ARCHIVE_BEFORE, int(before.strftime("%Y%m%d")))
+        db.commit()
+
+    counts = {"transactions": 0, "details": 0}
+    header_columns = [getattr(Transaction, name) for name in _HEADER_COLUMNS]
+    detail_columns = [getattr(TransactionDetail, name) for name in _DETAIL_COLUMNS]
+    while True:
+        trd_ids = db.execute(
+            select(Transaction.TRD_ID)
+            .where(Transaction.DATETIME < cutoff)
+            .order_by(Transaction.DATETIME, Transaction.TRD_ID)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not trd_ids:
+            break
+        db.execute(insert(TransactionArchive).from_select(
+            _HEADER_COLUMNS,
+            select(*header_columns).where(Transaction.TRD_ID.in_(trd_ids)),
+        ))
+        result = db.execute(insert(TransactionDetailArchive).from_select(
+            _DETAIL_COLUMNS + ["DATETIME"],
+            select(*detail_columns, Transaction.DATETIME)
+            .join(Transaction, Transaction.TRD_ID == TransactionDetail.TRD_ID)
+            .where(TransactionDetail.TRD_ID.in_(trd_ids)),
+        ))
+        # 冪等キー（保持期間を過ぎている）は取引を参照しているため先に削除する
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.TRD_ID.in_(trd_ids)))
+        db.execute(delete(TransactionDetail).where(TransactionDetail.TRD_ID.in_(trd_ids)))
+        db.execute(delete(Transaction).where(Transaction.TRD_ID.in_(trd_ids)))
+        db.commit()
+        counts["transactions"] += len(trd_ids)
+        counts["details"] += result.rowcount
+        metrics_registry.inc("archived_transactions_total", (), len(trd_ids))
+    return counts
@@ -0,0 +1,170 @@
+"""
+インプロセスキャッシュ
+商品マスタ参照（バーコードスキャン）をDBラウンドトリップなしで返すためのキャッシュ
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from app import schemas
+
+
+class TTLCache:
+    """
+    LRU + TTL で上限管理するスレッドセーフなキャッシュ
+
+    - maxsize を超えると最も長く参照されていないエントリから破棄
+    - ttl 秒を過ぎたエントリは参照時にミス扱いで破棄
+    - maxsize が 0 以下の場合はキャッシュ無効（常にミス）
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """キーに対応する値を取得（なければ None）"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """値を登録（上限を超えた分は古い順に破棄）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (value, self._clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """エントリを削除し、削除した値を返す"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット/ミス件数などの統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ProductCache:
+    """
+    商品マスタのキャッシュ
+    CODE と PRD_ID の両方で引けるよう、1つのLRUに2種類のキーで登録する
+
+    キャッシュはワーカーごとのため、他ワーカーでの変更はカタログのバージョン（version）で追う。
+    crud.sync_product_cache がバージョンを確認し、その間に変更された商品のエントリを advance で破棄する
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        # 1商品につき2エントリ（CODE / PRD_ID）を持つため容量は2倍で確保
+        self._cache = TTLCache(maxsize * 2, ttl)
+        # 変更を反映済みのカタログのバージョン（未確認なら None）
+        self.version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get_by_code(self, code: str) -> Optional[schemas.Product]:
+        return self._cache.get(("code", code))
+
+    def get_by_id(self, product_id: int) -> Optional[schemas.Product]:
+        return self._cache.get(("id", product_id))
+
+    def put(self, product: schemas.Product, version: Optional[int] = None) -> None:
+        """
+        商品を登録する
+        version には読み込む前の self.version を渡す。読み込み中に advance で変更が反映された場合は、
+        読み込んだ値が古い可能性があるため登録しない
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._cache.set(("code", product.CODE), product)
+            self._cache.set(("id", product.PRD_ID), product)
+
+    def advance(self, version: int, changed: Optional[Iterable[Tuple[int, str]]] = None) -> None:
+        """
+        カタログが version まで進んだことを記録し、その間に変更・削除された商品（PRD_ID, CODE）のエントリを破棄する
+        changed が None の場合（変更が多い・初回の確認など）は全て破棄する
+        """
+        with self._lock:
+            if changed is None:
+                self._cache.clear()
+            else:
+                for product_id, code in changed:
+                    self.invalidate(product_id=product_id, code=code)
+            self.version = version
+
+    def invalidate(self, product_id: Optional[int] = None, code: Optional[str] = None) -> None:
+        """商品IDまたはコードに対応するエントリを両方のキーから削除"""
+        for key in (("id", product_id), ("code", code)):
+            if key[1] is None:
+                continue
+            cached = self._cache.pop(key)
+            if cached is not None:
+                self._cache.pop(("id", cached.PRD_ID))
+                self._cache.pop(("code", cached.CODE))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["maxsize"] = self._cache.maxsize // 2
+        stats["size"] = stats["size"] // 2
+        return stats
+
+
+# アプリケーション全体で共有する商品キャッシュ（ワーカープロセス単位）
+product_cache = ProductCache(
+    maxsize=settings.PRODUCT_CACHE_SIZE,
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+)
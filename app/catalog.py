@@ -0,0 +1,58 @@
+"""
+カタログ（商品マスタ全件）のスナップショット
+端末がオフラインでもスキャンできるよう全商品を1つのgzip圧縮JSONで配信する。
+圧縮済みの本文はカタログのバージョンごとにワーカー内で保持し、変更がない限り作り直さない
+"""
+import gzip
+import threading
+from typing import Optional, Tuple
+
+import orjson
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import crud
+
+
+def catalog_etag(version: int) -> str:
+    return f'"catalog-{version}"'
+
+
+class CatalogSnapshotCache:
+    """最新バージョンのスナップショット（gzip圧縮済みJSON）を保持する"""
+
+    def __init__(self, compresslevel: int = 6):
+        self.compresslevel = compresslevel
+        self._snapshot: Optional[Tuple[int, bytes]] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, version: int) -> bytes:
+        """
+        バージョン version のスナップショットを返す
+        呼び出し側はバージョンを先に読むため、本文にはそれ以降の変更が含まれることがあるが、
+        端末は次の差分同期で同じ変更を上書きするだけなので問題ない
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+        with self._lock:
+            # 同じバージョンを複数のリクエストで同時に作らない
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot[0] == version:
+                return snapshot[1]
+            body = orjson.dumps({"version": version, "products": crud.get_catalog_products(db)})
+            compressed = gzip.compress(body, compresslevel=self.compresslevel)
+            self._snapshot = (version, compressed)
+            return compressed
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+
+# アプリケーション全体で共有するスナップショット（ワーカープロセス単位）
+catalog_snapshot = CatalogSnapshotCache()
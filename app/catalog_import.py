@@ -0,0 +1,174 @@
+"""
+商品マスタの一括取り込み
+本部から届く価格ファイル（CSV / NDJSON、列: CODE, NAME, PRICE と任意の TAX_CD）を先頭から順に読み、
+chunk_size 行ごとに検証して商品コード（CODE）をキーにUPSERTする。
+メモリに載るのは1チャンク分だけなので、ファイルの大きさに関係なく一定のメモリで動く
+
+- 既存と同じ内容の行は書き込まない（unchanged）
+- TAX_CD（消費税区分）のない行は、既存商品の区分を変えない（新規商品は標準税率）
+- チャンクごとにコミットし、カタログのバージョンを1つ進める（端末は差分同期で追従できる）
+- 不正な行は rejected として数え、最初の max_errors 件の行番号と理由を返す
+"""
+import codecs
+import csv
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models import ProductMaster
+from app import sequences
+from app.cache import product_cache
+from app.search import product_search
+from app.tax import tax_rate_table
+from app.upsert import upsert
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# 列の上限（product_master の定義に合わせる）
+CODE_MAX_LENGTH = ProductMaster.CODE.type.length
+NAME_MAX_LENGTH = ProductMaster.NAME.type.length
+
+
+class ImportFormatError(ValueError):
+    """ファイル全体を読めない（形式の指定誤り、CSVのヘッダ不足など）"""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    """ファイル名の拡張子・Content-Type から形式を推定"""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "") in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def iter_records(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(行番号, レコード) を順に返す（NDJSONで解析できない行はレコードの代わりに例外を返す）"""
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        missing = {"CODE", "NAME", "PRICE"} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFormatError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                yield line_no, e
+    else:
+        raise ImportFormatError(f"Unsupported import format: {fmt}")
+
+
+def validate_record(record, tax_codes: Optional[Set[str]] = None) -> dict:
+    """レコードを商品マスタの行に変換（不正なら ValueError。tax_codes を指定すると TAX_CD も検証する）"""
+    if isinstance(record, Exception):
+        raise ValueError(f"invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("record must be an object")
+    code = str(record.get("CODE") or "").strip()
+    name = str(record.get("NAME") or "").strip()
+    price = record.get("PRICE")
+    if not code or len(code) > CODE_MAX_LENGTH:
+        raise ValueError(f"CODE must be 1-{CODE_MAX_LENGTH} characters")
+    if not name or len(name) > NAME_MAX_LENGTH:
+        raise ValueError(f"NAME must be 1-{NAME_MAX_LENGTH} characters")
+    try:
+        if isinstance(price, float) and not price.is_integer():
+            raise ValueError
+        price = int(price)
+    except (TypeError, ValueError):
+        raise ValueError("PRICE must be an integer")
+    if price < 0:
+        raise ValueError("PRICE must not be negative")
+    row = {"CODE": code, "NAME": name, "PRICE": price}
+    tax_cd = str(record.get("TAX_CD") or "").strip()
+    if tax_cd:
+        if tax_codes is not None and tax_cd not in tax_codes:
+            raise ValueError(f"unknown TAX_CD: {tax_cd}")
+        row["TAX_CD"] = tax_cd
+    return row
+
+
+def _apply_chunk(db: Session, rows: Dict[str, dict], result: dict) -> None:
+    """1チャンク分をUPSERTしてコミットする"""
+    existing = {
+        row.CODE: row
+        for row in db.execute(
+            select(ProductMaster.PRD_ID, ProductMaster.CODE, ProductMaster.NAME, ProductMaster.PRICE, ProductMaster.TAX_CD)
+            .where(ProductMaster.CODE.in_(list(rows)))
+        )
+    }
+    changed: List[dict] = []
+    for code, row in rows.items():
+        current = existing.get(code)
+        if current is None:
+            result["inserted"] += 1
+        elif (current.NAME, current.PRICE, current.TAX_CD) == (row["NAME"], row["PRICE"], row.get("TAX_CD", current.TAX_CD)):
+            result["unchanged"] += 1
+            continue
+        else:
+            result["updated"] += 1
+        changed.append(row)
+    if not changed:
+        return
+
+    version = sequences.next_value(db, sequences.CATALOG_VERSION)
+    for row in changed:
+        row["VERSION"] = version
+    # TAX_CD の有無で更新する列が変わるため分けてUPSERTする
+    for columns in (["NAME", "PRICE", "VERSION", "TAX_CD"], ["NAME", "PRICE", "VERSION"]):
+        rows_with_columns = [row for row in changed if ("TAX_CD" in row) == ("TAX_CD" in columns)]
+        if rows_with_columns:
+            upsert(db, ProductMaster.__table__, rows_with_columns, key_columns=["CODE"], replace_columns=columns)
+    db.commit()
+    result["version"] = version
+    for row in changed:
+        current = existing.get(row["CODE"])
+        if current is not None:
+            product_cache.invalidate(product_id=current.PRD_ID, code=current.CODE)
+
+
+def import_products(db: Session, stream: BinaryIO, fmt: str, chunk_size: int = 2000, max_errors: int = 100) -> dict:
+    """
+    商品ファイルを取り込み、件数を返す
+    戻り値: inserted / updated / unchanged / rejected / duplicates（同じチャンク内の後の行に上書きされた行）の件数、
+    errors（行番号と理由）、version（最後に書き込んだカタログのバージョン、書き込みがなければ None）
+    """
+    result = {"inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0, "duplicates": 0, "errors": [], "version": None}
+    chunk: Dict[str, dict] = {}
+    tax_codes = set(tax_rate_table.get(db))
+    for line_no, record in iter_records(stream, fmt):
+        try:
+            row = validate_record(record, tax_codes)
+        except ValueError as e:
+            result["rejected"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"line": line_no, "error": str(e)})
+            continue
+        if row["CODE"] in chunk:
+            # 同じチャンク内で重複したコードは後の行を採用する
+            result["duplicates"] += 1
+        chunk[row["CODE"]] = row
+        if len(chunk) >= chunk_size:
+            _apply_chunk(db, chunk, result)
+            chunk = {}
+    if chunk:
+        _apply_chunk(db, chunk, result)
+    if result["version"] is not None and product_search.built:
+        # 取り込んだ行（新規行のPRD_IDはここまで分からない）をバージョンの差分から検索インデックスへ反映する
+        product_search.refresh(db, force=True)
+    return result
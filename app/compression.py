@@ -0,0 +1,135 @@
+"""
+レスポンス圧縮
+Accept-Encoding に応じて brotli（brotli パッケージがある場合）または gzip で圧縮するASGIミドルウェア
+
+- minimum_size バイト未満の小さいレスポンス（商品1件の検索など）は圧縮しない
+- Content-Encoding が設定済みのレスポンス（カタログのスナップショットなど）はそのまま返す
+- StreamingResponse（取引エクスポートなど）はチャンクごとにフラッシュしながら圧縮する
+"""
+import zlib
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（未インストールなら gzip のみ）
+    brotli = None
+
+
+def parse_accept_encoding(header: str) -> List[str]:
+    """Accept-Encoding から q=0 以外のエンコーディング名を返す"""
+    encodings = []
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            encodings.append(name)
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """使用するエンコーディング（brotli を優先）"""
+    accepted = parse_accept_encoding(header)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """エンコーディングごとの逐次圧縮"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """data を圧縮し、ここまでの出力をフラッシュして返す"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """レスポンスを圧縮するASGIミドルウェア"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # 本文の最初のチャンクを見てから圧縮するかを決める
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = [(key.lower(), value) for key, value in start_message.get("headers", [])]
+                already_encoded = any(key == b"content-encoding" for key, _ in headers)
+                if already_encoded or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = [(key, value) for key, value in headers if key != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"vary", b"Accept-Encoding"))
+                await send({**start_message, "headers": headers})
+
+            if more_body:
+                chunk = compressor.compress(body) if body else b""
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                chunk = compressor.compress(body) if body else b""
+                await send({"type": "http.response.body", "body": chunk + compressor.finish(), "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None and compressor is None and not passthrough:
+            # 本文なしで終了したレスポンス
+            await send(start_message)
@@ -1,8 +1,9 @@
 """
 CRUD operations for database models
 """
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -10,19 +11,48 @@ from datetime import datetime
 # プロジェクトルートをパスに追加
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from models import ProductMaster, Transaction, TransactionDetail
-from app import schemas
+from models import ProductMaster, ProductTombstone, Transaction, TransactionArchive, TransactionDetail
+from config import settings
+from app import archive, rollup, schemas, sequences
+from app.cache import product_cache
+from app.id_allocator import trd_id_allocator
+from app.replica import is_replica
+from app.search import product_search
+from app.tax import STANDARD_TAX_CD, UnknownTaxCodeError, compute_tax, tax_rate_table
 
 
 # ==================== Product CRUD ====================
 
-def get_product_by_code(db: Session, code: str) -> Optional[ProductMaster]:
-    """商品コードで商品を取得"""
-    return db.query(ProductMaster).filter(ProductMaster.CODE == code).first()
-
-
-def get_product_by_id(db: Session, product_id: int) -> Optional[ProductMaster]:
-    """商品IDで商品を取得"""
+def get_product_by_code(db: Session, code: str) -> Optional[schemas.Product]:
+    """商品コードで商品を取得（商品キャッシュ経由。レプリカから読んだ商品は遅れている場合があるためキャッシュしない）"""
+    product = product_cache.get_by_code(code)
+    if product is None:
+        cached_version = product_cache.version
+        db_product = db.query(ProductMaster).filter(ProductMaster.CODE == code).first()
+        if db_product is None:
+            return None
+        product = schemas.Product.model_validate(db_product)
+        if not is_replica(db):
+            product_cache.put(product, cached_version)
+    return product
+
+
+def get_product_by_id(db: Session, product_id: int) -> Optional[schemas.Product]:
+    """商品IDで商品を取得（商品キャッシュ経由。レプリカから読んだ商品はキャッシュしない）"""
+    product = product_cache.get_by_id(product_id)
+    if product is None:
+        cached_version = product_cache.version
+        db_product = _get_product_model(db, product_id)
+        if db_product is None:
+            return None
+        product = schemas.Product.model_validate(db_product)
+        if not is_replica(db):
+            product_cache.put(product, cached_version)
+    return product
+
+
+def _get_product_model(db: Session, product_id: int) -> Optional[ProductMaster]:
+    """更新・削除用にセッション管理下の商品モデルを取得（キャッシュを経由しない）"""
     return db.query(ProductMaster).filter(ProductMaster.PRD_ID == product_id).first()
 
 
@@ -31,38 +61,268 @@ def get_products(db: Session, skip: int = 0, limit: int = 100) -> List[ProductMa
     return db.query(ProductMaster).offset(skip).limit(limit).all()
 
 
-def create_product(db: Session, code: str, name: str, price: int) -> ProductMaster:
-    """商品を作成"""
-    db_product = ProductMaster(CODE=code, NAME=name, PRICE=price)
+# 一覧・カタログ配信で返す商品の列（schemas.Product と同じ）
+PRODUCT_COLUMNS = (ProductMaster.PRD_ID, ProductMaster.CODE, ProductMaster.NAME, ProductMaster.PRICE, ProductMaster.TAX_CD)
+
+
+def product_rows_query(limit: int, skip: int = 0, after_id: Optional[int] = None):
+    """商品一覧の列だけを PRD_ID 順に取得するクエリ（after_id 指定時はキーセット方式）"""
+    query = select(*PRODUCT_COLUMNS).order_by(ProductMaster.PRD_ID)
+    if after_id is not None:
+        query = query.where(ProductMaster.PRD_ID > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def get_product_rows(db: Session, limit: int = 100, skip: int = 0, after_id: Optional[int] = None) -> List[dict]:
+    """
+    商品一覧を辞書のリストで取得
+    DBの値をそのまま返すため、ORMオブジェクトや行ごとのPydanticモデルを作らない（大量件数の一覧用）
+    """
+    return [dict(row) for row in db.execute(product_rows_query(limit, skip, after_id)).mappings()]
+
+
+def _check_tax_cd(db: Session, tax_cd: str) -> None:
+    """税率マスタにない消費税区分なら UnknownTaxCodeError（登録後にその商品の会計がすべて失敗するのを防ぐ）"""
+    if tax_cd not in tax_rate_table.get(db):
+        raise UnknownTaxCodeError(tax_cd)
+
+
+def create_product(db: Session, code: str, name: str, price: int, tax_cd: str = STANDARD_TAX_CD) -> ProductMaster:
+    """商品を作成（消費税区分が税率マスタにない場合は UnknownTaxCodeError）"""
+    _check_tax_cd(db, tax_cd)
+    db_product = ProductMaster(
+        CODE=code, NAME=name, PRICE=price, TAX_CD=tax_cd,
+        VERSION=sequences.next_value(db, sequences.CATALOG_VERSION),
+    )
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    product_cache.invalidate(product_id=db_product.PRD_ID, code=db_product.CODE)
+    product_search.put(schemas.Product.model_validate(db_product))
     return db_product
 
 
-def update_product(db: Session, product_id: int, name: str = None, price: int = None) -> Optional[ProductMaster]:
-    """商品を更新"""
-    db_product = get_product_by_id(db, product_id)
+def update_product(
+    db: Session, product_id: int, name: str = None, price: int = None, tax_cd: str = None
+) -> Optional[ProductMaster]:
+    """商品を更新（消費税区分が税率マスタにない場合は UnknownTaxCodeError）"""
+    if tax_cd is not None:
+        _check_tax_cd(db, tax_cd)
+    db_product = _get_product_model(db, product_id)
     if db_product:
         if name is not None:
             db_product.NAME = name
         if price is not None:
             db_product.PRICE = price
+        if tax_cd is not None:
+            db_product.TAX_CD = tax_cd
+        db_product.VERSION = sequences.next_value(db, sequences.CATALOG_VERSION)
         db.commit()
         db.refresh(db_product)
+        product_cache.invalidate(product_id=db_product.PRD_ID, code=db_product.CODE)
+        product_search.put(schemas.Product.model_validate(db_product))
     return db_product
 
 
 def delete_product(db: Session, product_id: int) -> bool:
     """商品を削除"""
-    db_product = get_product_by_id(db, product_id)
+    db_product = _get_product_model(db, product_id)
     if db_product:
+        code = db_product.CODE
         db.delete(db_product)
+        # 端末への差分配信のため、削除した商品を記録する
+        db.merge(ProductTombstone(
+            PRD_ID=product_id,
+            CODE=code,
+            VERSION=sequences.next_value(db, sequences.CATALOG_VERSION),
+            DELETED_AT=datetime.utcnow(),
+        ))
         db.commit()
+        product_cache.invalidate(product_id=product_id, code=code)
+        product_search.remove(product_id)
         return True
     return False
 
 
+# ==================== Catalog ====================
+
+def get_catalog_version(db: Session) -> int:
+    """カタログ（商品マスタ）の現在のバージョン"""
+    return sequences.current_value(db, sequences.CATALOG_VERSION)
+
+
+def get_catalog_products(db: Session) -> List[dict]:
+    """全商品を配信用の辞書で取得（PRD_ID 順）"""
+    rows = db.execute(select(*PRODUCT_COLUMNS).order_by(ProductMaster.PRD_ID))
+    return [dict(row) for row in rows.mappings()]
+
+
+def get_catalog_changes(db: Session, since: int, until: int) -> Tuple[List[dict], List[ProductTombstone]]:
+    """バージョン since より後、until 以前に追加・更新された商品と削除された商品"""
+    products = db.execute(
+        select(*PRODUCT_COLUMNS)
+        .where(ProductMaster.VERSION > since, ProductMaster.VERSION <= until)
+        .order_by(ProductMaster.VERSION)
+    )
+    tombstones = (
+        db.query(ProductTombstone)
+        .filter(ProductTombstone.VERSION > since, ProductTombstone.VERSION <= until)
+        .order_by(ProductTombstone.VERSION)
+        .all()
+    )
+    return [dict(row) for row in products.mappings()], tombstones
+
+
+# ==================== Product Resolution ====================
+
+def sync_product_cache(db: Session) -> None:
+    """
+    他ワーカーでの商品の変更を商品キャッシュに反映する
+    キャッシュはワーカーごとで、更新時の無効化は更新したワーカーにしか届かないため、
+    購入の単価を解決する前にカタログのバージョンを確認し、前回の確認以降に更新・削除された商品のエントリを破棄する
+    （変更がなければクエリ1回）
+    """
+    version = get_catalog_version(db)
+    since = product_cache.version
+    if version == since:
+        return
+    if since is None or version < since:
+        # 初回の確認（それまでに載せたエントリのバージョンが分からない）やカタログが作り直された場合は全て破棄
+        product_cache.advance(version)
+        return
+    limit = product_cache.maxsize + 1
+    changed = db.execute(
+        select(ProductMaster.PRD_ID, ProductMaster.CODE)
+        .where(ProductMaster.VERSION > since, ProductMaster.VERSION <= version)
+        .limit(limit)
+    ).all()
+    deleted = db.execute(
+        select(ProductTombstone.PRD_ID, ProductTombstone.CODE)
+        .where(ProductTombstone.VERSION > since, ProductTombstone.VERSION <= version)
+        .limit(limit)
+    ).all()
+    if len(changed) + len(deleted) >= limit:
+        # 大量の取り込みなどはキャッシュの容量を超えるため、全て破棄した方が早い
+        product_cache.advance(version)
+    else:
+        product_cache.advance(version, [*changed, *deleted])
+
+
+class ProductNotFoundError(LookupError):
+    """購入商品が商品マスタに存在しない"""
+
+    def __init__(self, product_ids: List[int], codes: List[str]):
+        self.product_ids = product_ids
+        self.codes = codes
+        super().__init__(f"Products not found: PRD_ID={product_ids}, CODE={codes}")
+
+
+class ResolvedProducts:
+    """PRD_ID / CODE から商品を引くための解決結果"""
+
+    def __init__(self):
+        self.by_id: Dict[int, schemas.Product] = {}
+        self.by_code: Dict[str, schemas.Product] = {}
+
+    def add(self, product: schemas.Product) -> None:
+        self.by_id[product.PRD_ID] = product
+        self.by_code[product.CODE] = product
+
+    def get(self, product_id: Optional[int] = None, code: Optional[str] = None) -> Optional[schemas.Product]:
+        """PRD_ID を優先して商品を返す"""
+        if product_id is not None:
+            return self.by_id.get(product_id)
+        return self.by_code.get(code)
+
+
+def lookup_cached_products(product_ids: Iterable[int], codes: Iterable[str]) -> Tuple[ResolvedProducts, Set[int], Set[str]]:
+    """
+    重複を除いたキーで商品キャッシュを引き、
+    解決済みの商品とキャッシュにない PRD_ID / CODE を返す
+    """
+    resolved = ResolvedProducts()
+    missing_ids: Set[int] = set()
+    missing_codes: Set[str] = set()
+    for product_id in set(product_ids):
+        product = product_cache.get_by_id(product_id)
+        if product is None:
+            missing_ids.add(product_id)
+        else:
+            resolved.add(product)
+    for code in set(codes):
+        product = resolved.by_code.get(code) or product_cache.get_by_code(code)
+        if product is None:
+            missing_codes.add(code)
+        else:
+            resolved.add(product)
+    return resolved, missing_ids, missing_codes
+
+
+def product_lookup_query(product_ids: Set[int], codes: Set[str]):
+    """PRD_ID / CODE の IN 条件をまとめた1本の検索クエリ"""
+    conditions = []
+    if product_ids:
+        conditions.append(ProductMaster.PRD_ID.in_(product_ids))
+    if codes:
+        conditions.append(ProductMaster.CODE.in_(codes))
+    return select(*PRODUCT_COLUMNS).where(or_(*conditions))
+
+
+def resolve_products(db: Session, product_ids: Iterable[int] = (), codes: Iterable[str] = ()) -> ResolvedProducts:
+    """
+    複数の商品をまとめて解決
+    キャッシュにない分だけを1回の WHERE PRD_ID IN (...) OR CODE IN (...) で取得する（レプリカから読んだ商品はキャッシュしない）
+    """
+    cached_version = product_cache.version
+    resolved, missing_ids, missing_codes = lookup_cached_products(product_ids, codes)
+    if missing_ids or missing_codes:
+        cacheable = not is_replica(db)
+        for row in db.execute(product_lookup_query(missing_ids, missing_codes)).mappings():
+            product = schemas.Product(**row)
+            if cacheable:
+                product_cache.put(product, cached_version)
+            resolved.add(product)
+    return resolved
+
+
+def build_lookup_response(resolved: ResolvedProducts, product_ids: List[int], codes: List[str]) -> schemas.ProductLookupResponse:
+    """一括検索の結果をリクエスト順（ID → コード）に並べ、見つからなかったキーを集める"""
+    products: Dict[int, schemas.Product] = {}
+    missing_ids: List[int] = []
+    missing_codes: List[str] = []
+    for product_id in dict.fromkeys(product_ids):
+        product = resolved.get(product_id=product_id)
+        if product is None:
+            missing_ids.append(product_id)
+        else:
+            products.setdefault(product.PRD_ID, product)
+    for code in dict.fromkeys(codes):
+        product = resolved.get(code=code)
+        if product is None:
+            missing_codes.append(code)
+        else:
+            products.setdefault(product.PRD_ID, product)
+    return schemas.ProductLookupResponse(
+        products=list(products.values()),
+        missing_codes=missing_codes,
+        missing_ids=missing_ids,
+    )
+
+
+def resolve_purchase_items(resolved: ResolvedProducts, items: List[schemas.PurchaseItem]) -> List[schemas.Product]:
+    """購入明細の各行を商品マスタの商品に対応付ける（見つからない商品があれば ProductNotFoundError）"""
+    products = [resolved.get(item.PRD_ID, item.CODE) for item in items]
+    missing = [item for item, product in zip(items, products) if product is None]
+    if missing:
+        raise ProductNotFoundError(
+            product_ids=sorted({item.PRD_ID for item in missing if item.PRD_ID is not None}),
+            codes=sorted({item.CODE for item in missing if item.PRD_ID is None}),
+        )
+    return products
+
+
 # ==================== Transaction CRUD ====================
 
 def get_transaction(db: Session, transaction_id: int) -> Optional[Transaction]:
@@ -70,11 +330,80 @@ def get_transaction(db: Session, transaction_id: int) -> Optional[Transaction]:
     return db.query(Transaction).filter(Transaction.TRD_ID == transaction_id).first()
 
 
+def get_receipt(db: Session, transaction_id: int) -> Optional[Transaction]:
+    """
+    取引を明細付きで取得（ヘッダと明細を JOIN した1回のクエリ）
+    直近の取引になければアーカイブを探す（アーカイブ済みの取引は TransactionArchive を返す）
+    """
+    for model in _transaction_models(db):
+        receipt = db.execute(
+            select(model).options(joinedload(model.details)).where(model.TRD_ID == transaction_id)
+        ).unique().scalar_one_or_none()
+        if receipt is not None:
+            return receipt
+    return None
+
+
+def _transaction_models(db: Session):
+    """取引を読むテーブル（直近 → アーカイブ。アーカイブへの移動をまだ行っていなければ直近のみ）"""
+    yield Transaction
+    if archive.archived_before(db) is not None:
+        yield TransactionArchive
+
+
 def get_transactions(db: Session, skip: int = 0, limit: int = 100) -> List[Transaction]:
     """取引一覧を取得"""
     return db.query(Transaction).offset(skip).limit(limit).all()
 
 
+def get_transactions_before(
+    db: Session,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+    store_cd: Optional[str] = None,
+    pos_no: Optional[str] = None,
+    emp_cd: Optional[str] = None,
+    with_details: bool = False
+) -> List[Transaction]:
+    """
+    取引一覧をキーセット方式で新しい順に取得
+    before に前ページ最後の (DATETIME, TRD_ID) を渡すと、その次の行から取得する
+    with_details=True の場合は、ページ内の全取引の明細を1回の IN クエリでまとめて読み込む（件数によらず2クエリ）
+    直近の取引だけで limit 件に満たない場合は、最後の行の続きをアーカイブから取得する
+    """
+    transactions: List[Transaction] = []
+    for model in _transaction_models(db):
+        if transactions:
+            last = transactions[-1]
+            before = (last.DATETIME, last.TRD_ID)
+        transactions.extend(_keyset_page(
+            db, model, before, limit - len(transactions), store_cd, pos_no, emp_cd, with_details
+        ))
+        if len(transactions) >= limit:
+            break
+    return transactions
+
+
+def _keyset_page(db: Session, model, before, limit, store_cd, pos_no, emp_cd, with_details):
+    query = db.query(model)
+    if with_details:
+        query = query.options(selectinload(model.details))
+    if store_cd is not None:
+        query = query.filter(model.STORE_CD == store_cd)
+    if pos_no is not None:
+        query = query.filter(model.POS_NO == pos_no)
+    if emp_cd is not None:
+        query = query.filter(model.EMP_CD == emp_cd)
+    if before is not None:
+        before_datetime, before_id = before
+        # 行値比較 (DATETIME, TRD_ID) < (...) を索引が使える形に展開
+        query = query.filter(or_(
+            model.DATETIME < before_datetime,
+            and_(model.DATETIME == before_datetime, model.TRD_ID < before_id)
+        ))
+    return query.order_by(model.DATETIME.desc(), model.TRD_ID.desc()).limit(limit).all()
+
+
 def create_transaction(
     db: Session,
     emp_cd: str = None,
@@ -85,6 +414,7 @@ def create_transaction(
 ) -> Transaction:
     """取引を作成"""
     db_transaction = Transaction(
+        TRD_ID=trd_id_allocator.allocate(db)[0],
         EMP_CD=emp_cd,
         STORE_CD=store_cd,
         POS_NO=pos_no,
@@ -132,44 +462,199 @@ def create_transaction_detail(
 
 # ==================== Purchase CRUD ====================
 
-def create_purchase(db: Session, purchase_request: schemas.PurchaseRequest) -> Transaction:
+def build_purchase_header(
+    purchase_request: schemas.PurchaseRequest,
+    products: List[schemas.Product],
+    tax_rates: Dict[str, int],
+    sold_at: Optional[datetime] = None,
+) -> Transaction:
     """
-    購入処理を実行
-    APIファンクション(Lv2)の仕様を実装
+    購入リクエストと解決済みの商品から取引ヘッダを生成（sold_at を省略した場合は現在時刻）
+    税抜合計は明細を税率ごとに合計してから税率ごとに1回だけ端数処理する（app.tax）
     """
-    # 1-1. 取引テーブルへ登録する
-    # とりあえず合計金額0でヘッダーを作成
-    new_transaction = Transaction(
-        DATETIME=datetime.utcnow(),
+    tax = compute_tax(((product.TAX_CD, product.PRICE) for product in products), tax_rates, settings.TAX_ROUNDING)
+    return Transaction(
+        DATETIME=sold_at or datetime.utcnow(),
         EMP_CD=purchase_request.emp_cd or '999999999',  # 仕様書より固定値またはリクエストから
         STORE_CD=purchase_request.store_cd or '30',     # 仕様書より固定値またはリクエストから
         POS_NO=purchase_request.pos_no or '90',         # 仕様書より固定値またはリクエストから
-        TOTAL_AMT=0,
-        TTL_AMT_EX_TAX=0,
+        TOTAL_AMT=tax.total,
+        TTL_AMT_EX_TAX=tax.ex_tax,
     )
-    db.add(new_transaction)
-    db.flush()  # これで new_transaction.TRD_ID が採番される
-
-    total_amount = 0
-
-    # 1-2. 取引明細へ登録する
-    for index, item in enumerate(purchase_request.items):
-        new_detail = TransactionDetail(
-            TRD_ID=new_transaction.TRD_ID,
-            DTL_ID=index + 1,  # 明細IDは1から連番
-            PRD_ID=item.PRD_ID,
-            PRD_CODE=item.CODE,
-            PRD_NAME=item.NAME,
-            PRD_PRICE=item.PRICE,
-            TAX_CD='10'  # 仕様書より固定値（消費税10%）
+
+
+def purchase_header_row(header: Transaction) -> dict:
+    """取引ヘッダをCoreのINSERTに渡す行データに変換"""
+    return {column.key: getattr(header, column.key) for column in Transaction.__table__.columns}
+
+
+def build_purchase_details(trd_id: int, products: List[schemas.Product]) -> List[dict]:
+    """
+    解決済みの商品リストから取引明細の行データを生成
+    ORMオブジェクトを作らず、Coreの一括INSERTにそのまま渡せる辞書のリストで返す
+    """
+    return [
+        {
+            "TRD_ID": trd_id,
+            "DTL_ID": index + 1,  # 明細IDは1から連番
+            "PRD_ID": product.PRD_ID,
+            "PRD_CODE": product.CODE,
+            "PRD_NAME": product.NAME,
+            "PRD_PRICE": product.PRICE,
+            "TAX_CD": product.TAX_CD,
+        }
+        for index, product in enumerate(products)
+    ]
+
+
+def purchase_item_keys(items: List[schemas.PurchaseItem]) -> Tuple[List[int], List[str]]:
+    """購入明細から商品解決用の PRD_ID / CODE を取り出す（PRD_ID 指定を優先）"""
+    product_ids = [item.PRD_ID for item in items if item.PRD_ID is not None]
+    codes = [item.CODE for item in items if item.PRD_ID is None]
+    return product_ids, codes
+
+
+def insert_purchases(
+    db: Session,
+    purchases: List[Tuple[schemas.PurchaseRequest, List[schemas.Product]]],
+    sold_at: Optional[List[datetime]] = None,
+) -> List[Transaction]:
+    """
+    商品解決済みの購入をまとめて登録（コミットは呼び出し側で行う）
+    TRD_ID はINSERT前にブロック採番で決めるため、全購入のヘッダと明細をそれぞれ1回のexecutemanyで登録する
+    sold_at には購入ごとの販売日時を指定できる（ジャーナルから後で登録する場合など）
+    """
+    # 合計金額を確定させてからINSERTするため、後からのUPDATEは不要（税率はキャッシュから1回だけ取得）
+    tax_rates = tax_rate_table.get(db)
+    headers = [
+        build_purchase_header(
+            purchase_request,
+            products,
+            tax_rates,
+            sold_at[index] if sold_at is not None else None,
         )
-        db.add(new_detail)
-        total_amount += item.PRICE
+        for index, (purchase_request, products) in enumerate(purchases)
+    ]
+    for header, trd_id in zip(headers, trd_id_allocator.allocate(db, len(headers))):
+        header.TRD_ID = trd_id
+    # AUTO_INCREMENT の採番を待つ flush（MySQLではヘッダ1件ごとのINSERT）をせず、複数行INSERTで登録
+    db.execute(insert(Transaction.__table__), [purchase_header_row(header) for header in headers])
+
+    # 明細ごとのORM管理コストを省き、Coreの複数行INSERTで登録
+    details = []
+    for header, (_, products) in zip(headers, purchases):
+        details.extend(build_purchase_details(header.TRD_ID, products))
+    db.execute(insert(TransactionDetail.__table__), details)
+
+    # 日次売上集計へ同じトランザクションで加算
+    if settings.SALES_ROLLUP_ENABLED:
+        rollup.apply_purchases(db, headers, details)
 
-    # 1-3. 合計や税金額を計算する (今回は合計金額のみ)
-    # 1-4. 取引テーブルを更新する
-    new_transaction.TOTAL_AMT = total_amount
-    new_transaction.TTL_AMT_EX_TAX = total_amount  # 税計算は未実装のため同額
+    return headers
 
-    return new_transaction
 
+def resolve_purchase(db: Session, purchase_request: schemas.PurchaseRequest) -> List[schemas.Product]:
+    """
+    購入明細の商品名・単価を商品マスタから解決する
+    同じ商品が複数行あっても1回だけ解決し、キャッシュにない分を1回のクエリでまとめて取得
+    キャッシュの単価は他ワーカーでの変更を反映してから使う（sync_product_cache）
+    """
+    product_ids, codes = purchase_item_keys(purchase_request.items)
+    sync_product_cache(db)
+    resolved = resolve_products(db, product_ids, codes)
+    return resolve_purchase_items(resolved, purchase_request.items)
+
+
+def create_purchase(db: Session, purchase_request: schemas.PurchaseRequest) -> Transaction:
+    """
+    購入処理を実行
+    APIファンクション(Lv2)の仕様を実装
+    """
+    # 1-1. 商品名・単価を商品マスタから解決する
+    products = resolve_purchase(db, purchase_request)
+
+    # 1-2. 合計金額を計算し、取引テーブル・取引明細へ登録する
+    return insert_purchases(db, [(purchase_request, products)])[0]
+
+
+def _purchase_result(index: int, transaction: Transaction, items_count: int) -> schemas.PurchaseBatchResult:
+    return schemas.PurchaseBatchResult(
+        index=index,
+        success=True,
+        transaction_id=transaction.TRD_ID,
+        total_amount=transaction.TOTAL_AMT,
+        total_amount_ex_tax=transaction.TTL_AMT_EX_TAX,
+        items_count=items_count,
+    )
+
+
+def _create_purchase_chunk(
+    db: Session,
+    chunk: List[Tuple[int, schemas.PurchaseRequest]]
+) -> Dict[int, schemas.PurchaseBatchResult]:
+    """
+    1チャンク分の購入を1トランザクションで登録
+    チャンク全体の商品を1回で解決し、不正な購入はDBに触れる前に除外する。
+    登録時にエラーが起きた場合は1件ずつ登録し直し、失敗した購入だけをエラーにする
+    """
+    results: Dict[int, schemas.PurchaseBatchResult] = {}
+
+    product_ids, codes = [], []
+    for _, purchase_request in chunk:
+        ids, cds = purchase_item_keys(purchase_request.items)
+        product_ids.extend(ids)
+        codes.extend(cds)
+    sync_product_cache(db)
+    resolved = resolve_products(db, product_ids, codes)
+
+    valid = []
+    for index, purchase_request in chunk:
+        if not purchase_request.items:
+            results[index] = schemas.PurchaseBatchResult(index=index, success=False, error="Purchase list cannot be empty")
+            continue
+        try:
+            valid.append((index, purchase_request, resolve_purchase_items(resolved, purchase_request.items)))
+        except ProductNotFoundError as e:
+            results[index] = schemas.PurchaseBatchResult(index=index, success=False, error=str(e))
+
+    if not valid:
+        return results
+
+    try:
+        headers = insert_purchases(db, [(purchase_request, products) for _, purchase_request, products in valid])
+        chunk_results = [
+            _purchase_result(index, header, len(purchase_request.items))
+            for header, (index, purchase_request, _) in zip(headers, valid)
+        ]
+        db.commit()
+        results.update((result.index, result) for result in chunk_results)
+    except Exception:
+        db.rollback()
+        # 問題のある購入を特定するため、チャンク内を1件ずつ登録し直す
+        for index, purchase_request, products in valid:
+            try:
+                header = insert_purchases(db, [(purchase_request, products)])[0]
+                result = _purchase_result(index, header, len(purchase_request.items))
+                db.commit()
+                results[index] = result
+            except Exception as e:
+                db.rollback()
+                results[index] = schemas.PurchaseBatchResult(index=index, success=False, error=str(e))
+
+    return results
+
+
+def create_purchase_batch(
+    db: Session,
+    purchase_requests: List[schemas.PurchaseRequest],
+    chunk_size: int = 200
+) -> List[schemas.PurchaseBatchResult]:
+    """
+    複数の購入をチャンク単位のトランザクションでまとめて登録
+    1件の失敗で他の購入が中断されないよう、結果は購入ごとに返す
+    """
+    indexed = list(enumerate(purchase_requests))
+    results: Dict[int, schemas.PurchaseBatchResult] = {}
+    for start in range(0, len(indexed), chunk_size):
+        results.update(_create_purchase_chunk(db, indexed[start:start + chunk_size]))
+    return [results[index] for index in range(len(purchase_requests))]
@@ -0,0 +1,116 @@
+"""
+CRUD operations for database models (AsyncSession版)
+非同期モード（DB_ASYNC=True）の商品・購入APIで使用する
+"""
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, List, Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models import ProductMaster, Transaction, TransactionDetail
+from config import settings
+from app import rollup, schemas
+from app.cache import product_cache
+from app.id_allocator import trd_id_allocator
+from app.replica import is_replica
+from app.tax import tax_rate_table
+from app.crud import (
+    ResolvedProducts,
+    build_purchase_header,
+    build_purchase_details,
+    lookup_cached_products,
+    purchase_header_row,
+    product_rows_query,
+    product_lookup_query,
+    purchase_item_keys,
+    resolve_purchase_items,
+    sync_product_cache,
+)
+
+
+# ==================== Product CRUD ====================
+
+async def get_product_by_code(db: AsyncSession, code: str) -> Optional[schemas.Product]:
+    """商品コードで商品を取得（商品キャッシュ経由。レプリカから読んだ商品はキャッシュしない）"""
+    product = product_cache.get_by_code(code)
+    if product is None:
+        cached_version = product_cache.version
+        result = await db.execute(select(ProductMaster).where(ProductMaster.CODE == code))
+        db_product = result.scalars().first()
+        if db_product is None:
+            return None
+        product = schemas.Product.model_validate(db_product)
+        if not is_replica(db):
+            product_cache.put(product, cached_version)
+    return product
+
+
+async def get_product_by_id(db: AsyncSession, product_id: int) -> Optional[schemas.Product]:
+    """商品IDで商品を取得（商品キャッシュ経由。レプリカから読んだ商品はキャッシュしない）"""
+    product = product_cache.get_by_id(product_id)
+    if product is None:
+        cached_version = product_cache.version
+        result = await db.execute(select(ProductMaster).where(ProductMaster.PRD_ID == product_id))
+        db_product = result.scalars().first()
+        if db_product is None:
+            return None
+        product = schemas.Product.model_validate(db_product)
+        if not is_replica(db):
+            product_cache.put(product, cached_version)
+    return product
+
+
+async def get_product_rows(db: AsyncSession, limit: int = 100, skip: int = 0, after_id: Optional[int] = None) -> List[dict]:
+    """商品一覧を辞書のリストで取得（crud.get_product_rows の非同期版）"""
+    result = await db.execute(product_rows_query(limit, skip, after_id))
+    return [dict(row) for row in result.mappings()]
+
+
+async def resolve_products(db: AsyncSession, product_ids: Iterable[int] = (), codes: Iterable[str] = ()) -> ResolvedProducts:
+    """複数の商品をまとめて解決（crud.resolve_products の非同期版）"""
+    cached_version = product_cache.version
+    resolved, missing_ids, missing_codes = lookup_cached_products(product_ids, codes)
+    if missing_ids or missing_codes:
+        cacheable = not is_replica(db)
+        result = await db.execute(product_lookup_query(missing_ids, missing_codes))
+        for row in result.mappings():
+            product = schemas.Product(**row)
+            if cacheable:
+                product_cache.put(product, cached_version)
+            resolved.add(product)
+    return resolved
+
+
+# ==================== Purchase CRUD ====================
+
+async def resolve_purchase(db: AsyncSession, purchase_request: schemas.PurchaseRequest) -> List[schemas.Product]:
+    """購入明細の商品名・単価を商品マスタから解決する（crud.resolve_purchase の非同期版）"""
+    product_ids, codes = purchase_item_keys(purchase_request.items)
+    await db.run_sync(sync_product_cache)
+    resolved = await resolve_products(db, product_ids, codes)
+    return resolve_purchase_items(resolved, purchase_request.items)
+
+
+async def create_purchase(db: AsyncSession, purchase_request: schemas.PurchaseRequest) -> Transaction:
+    """
+    購入処理を実行（crud.create_purchase の非同期版）
+    コミットは呼び出し側で行う
+    """
+    products = await resolve_purchase(db, purchase_request)
+
+    tax_rates = await db.run_sync(tax_rate_table.get)
+    new_transaction = build_purchase_header(purchase_request, products, tax_rates)
+    new_transaction.TRD_ID = (await trd_id_allocator.allocate_async(db))[0]
+    await db.execute(insert(Transaction.__table__), [purchase_header_row(new_transaction)])
+
+    details = build_purchase_details(new_transaction.TRD_ID, products)
+    await db.execute(insert(TransactionDetail.__table__), details)
+
+    if settings.SALES_ROLLUP_ENABLED:
+        await db.run_sync(rollup.apply_purchases, [new_transaction], details)
+
+    return new_transaction
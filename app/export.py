@@ -0,0 +1,153 @@
+"""
+取引データのストリーミングエクスポート（会計連携用）
+取引ヘッダと取引明細を結合した行をサーバー側カーソルでチャンク単位に取得し、
+NDJSON / CSV に逐次エンコードする。全件をメモリに載せないため、
+1か月分でも一定のメモリで出力でき、最初のバイトをすぐに送り始められる
+期間がアーカイブ済みの範囲（app.archive）にかかる場合は、アーカイブ → 直近のテーブルの順に出力する
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models import Transaction, TransactionArchive, TransactionDetail, TransactionDetailArchive
+from app import archive
+
+# 出力する列（取引ヘッダ → 取引明細の順）
+EXPORT_COLUMNS = [
+    Transaction.TRD_ID,
+    Transaction.DATETIME,
+    Transaction.EMP_CD,
+    Transaction.STORE_CD,
+    Transaction.POS_NO,
+    Transaction.TOTAL_AMT,
+    Transaction.TTL_AMT_EX_TAX,
+    TransactionDetail.DTL_ID,
+    TransactionDetail.PRD_ID,
+    TransactionDetail.PRD_CODE,
+    TransactionDetail.PRD_NAME,
+    TransactionDetail.PRD_PRICE,
+    TransactionDetail.TAX_CD,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_query(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    store_cd: Optional[str] = None,
+    archived: bool = False
+):
+    """
+    エクスポート対象の行を取引日時順に取得するクエリ
+    date_from / date_to はどちらも含む（取引日時はUTC）。archived=True の場合はアーカイブのテーブルから取得する
+    """
+    header, detail = (TransactionArchive, TransactionDetailArchive) if archived else (Transaction, TransactionDetail)
+    columns = [
+        getattr(header if column.class_ is Transaction else detail, column.key)
+        for column in EXPORT_COLUMNS
+    ]
+    query = (
+        select(*columns)
+        .join(detail, detail.TRD_ID == header.TRD_ID)
+        .order_by(header.DATETIME, header.TRD_ID, detail.DTL_ID)
+    )
+    if archived:
+        # 明細も取引日時で分割しているため、結合条件に含めてパーティションを絞り込む
+        query = query.where(detail.DATETIME == header.DATETIME)
+    if date_from is not None:
+        query = query.where(header.DATETIME >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        query = query.where(header.DATETIME < datetime.combine(date_to + timedelta(days=1), time.min))
+    if store_cd is not None:
+        query = query.where(header.STORE_CD == store_cd)
+    return query
+
+
+def iter_export_rows(db: Session, query, chunk_size: int = 1000) -> Iterator[tuple]:
+    """サーバー側カーソルで chunk_size 行ずつ取得しながら1行ずつ返す"""
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield from partition
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(rows: Iterable[tuple], rows_per_chunk: int = 500) -> Iterator[bytes]:
+    """1行1JSONオブジェクトにエンコードし、rows_per_chunk 行ずつまとめて返す"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=_json_default))
+        if len(lines) >= rows_per_chunk:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def encode_csv(rows: Iterable[tuple], rows_per_chunk: int = 500) -> Iterator[bytes]:
+    """ヘッダ行付きのCSVにエンコードし、rows_per_chunk 行ずつまとめて返す"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in rows:
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        count += 1
+        if count >= rows_per_chunk:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+ENCODERS = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+}
+
+
+def stream_export(
+    session_factory: Callable[[], Session],
+    export_format: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    store_cd: Optional[str] = None,
+    chunk_size: int = 1000
+) -> Iterator[bytes]:
+    """
+    エクスポートをバイト列のチャンクとして逐次生成
+    レスポンス送信中もカーソルを使い続けるため、セッションはこのジェネレータ自身が開いて閉じる
+    """
+    encoder = ENCODERS[export_format]
+    db = session_factory()
+    try:
+        queries = [export_query(date_from, date_to, store_cd)]
+        cutoff = archive.archived_before(db)
+        if cutoff is not None and (date_from is None or datetime.combine(date_from, time.min) < cutoff):
+            queries.insert(0, export_query(date_from, date_to, store_cd, archived=True))
+        rows = chain.from_iterable(iter_export_rows(db, query, chunk_size=chunk_size) for query in queries)
+        yield from encoder(rows)
+    finally:
+        db.close()
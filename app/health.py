@@ -0,0 +1,128 @@
+"""
+ヘルスチェック
+バックグラウンドのスレッドが一定間隔でDB（SELECT 1）とコネクションプールの使用率を確認して結果を保持し、
+/health 系のエンドポイントはその結果を返すだけにする。
+ロードバランサーのプローブが頻繁に来ても、プールの接続やスレッドプールを消費しない
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.engine import Engine
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+
+
+class HealthProber:
+    """DBとコネクションプールの状態を定期的に確認し、最新の結果を保持する"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        interval: float,
+        saturation_threshold: float,
+        pool_capacity: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """pool_capacity: プールが同時に貸し出せる接続数（pool_size + max_overflow、None なら使用率を見ない）"""
+        self.engine = engine
+        self.pool_capacity = pool_capacity
+        self.interval = interval
+        self.saturation_threshold = saturation_threshold
+        self._clock = clock
+        self._result: Optional[dict] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _pool_usage(self) -> dict:
+        pool = self.engine.pool
+        capacity = self.pool_capacity
+        if capacity is None or not hasattr(pool, "checkedout"):
+            return {"checked_out": 0, "capacity": None, "saturation": 0.0}
+        checked_out = pool.checkedout()
+        return {
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
+    def probe_once(self) -> dict:
+        """DBとプールを確認して結果を更新する"""
+        pool = self._pool_usage()
+        saturated = pool["saturation"] >= self.saturation_threshold
+        latency_ms = None
+        if saturated:
+            # 空き接続を待つとプローブ自体が購入処理の接続を奪うため、DBの確認は見送る
+            database = "skipped: pool saturated"
+        else:
+            start = time.perf_counter()
+            try:
+                with self.engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT 1")
+                database = "connected"
+                latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            except Exception as e:
+                database = f"error: {str(e)}"
+
+        result = {
+            "database": database,
+            "database_latency_ms": latency_ms,
+            "pool": pool,
+            "ready": database == "connected" and not saturated,
+            "checked_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self._result = result
+            self._checked_at = self._clock()
+        return result
+
+    def status(self) -> dict:
+        """
+        保持している最新の結果と経過秒数（age_seconds）を返す
+        バックグラウンドのスレッドが動いていない場合（lifespan を経由しないテストなど）は、
+        結果が interval より古ければその場で確認する
+        """
+        with self._lock:
+            result, checked_at = self._result, self._checked_at
+        if self._thread is None and (result is None or self._clock() - checked_at > self.interval):
+            result = self.probe_once()
+            with self._lock:
+                checked_at = self._checked_at
+        return {**result, "age_seconds": round(max(self._clock() - checked_at, 0.0), 3)}
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.probe_once()
+
+    def start(self) -> None:
+        """最初の確認をその場で行ってからバックグラウンドのスレッドを開始する"""
+        if self._thread is None:
+            self.probe_once()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def create_health_prober(engine: Engine) -> HealthProber:
+    # プールの上限は create_db_engine と同じ設定から求める（DB_MAX_OVERFLOW が負なら上限なしのため pool_size のみ）
+    return HealthProber(
+        engine,
+        interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+        saturation_threshold=settings.HEALTH_POOL_SATURATION_THRESHOLD,
+        pool_capacity=settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0),
+    )
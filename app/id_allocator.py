@@ -0,0 +1,96 @@
+"""
+取引ID（TRD_ID）のブロック採番
+sequences テーブルのカウンタを block_size ずつ進めて連続したIDの範囲を予約し、ワーカー内で順に払い出す。
+INSERT前にIDが決まるため、明細の登録のために取引ヘッダを先に flush（AUTO_INCREMENT の採番待ち）する必要がない
+
+- ブロックの予約は購入とは別のトランザクションで即コミットする（カウンタの行ロックを購入のコミットまで持たない）
+- 複数ワーカー・再起動後も、予約済みの範囲は二度と払い出されないため一意になる
+  （再起動で使われなかったIDは欠番になる。IDの大小はワーカー間の登録順とは一致しない）
+- 予約時はカウンタを取引テーブルの最大IDより後ろから進めるため、AUTO_INCREMENT で登録済みの取引とも重複しない
+"""
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from models import Transaction
+from app import sequences
+from app.metrics import registry as metrics_registry
+
+metrics_registry.describe("id_block_reservations_total", "counter", "取引IDのブロックを予約した回数")
+
+
+class BlockIdAllocator:
+    """sequences テーブルのカウンタからIDをブロック単位で予約して払い出す"""
+
+    def __init__(self, name: str, column, block_size: int = 100):
+        self.name = name
+        self.column = column  # 予約時に最大値を確認する列（カウンタ導入前に登録された行との重複を防ぐ）
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        # 接続先のDB（エンジン）ごとの予約済みの範囲 [(次のID, 最後のID), ...]
+        self._blocks: Dict[object, Deque[Tuple[int, int]]] = {}
+
+    def _take(self, key, count: int) -> Optional[List[int]]:
+        """予約済みの範囲から count 個のIDを取り出す（足りなければ None）"""
+        with self._lock:
+            blocks = self._blocks.setdefault(key, deque())
+            if sum(last - first + 1 for first, last in blocks) < count:
+                return None
+            ids: List[int] = []
+            while len(ids) < count:
+                first, last = blocks[0]
+                end = min(last, first + count - len(ids) - 1)
+                ids.extend(range(first, end + 1))
+                if end == last:
+                    blocks.popleft()
+                else:
+                    blocks[0] = (end + 1, last)
+            return ids
+
+    def reserve(self, db: Session, count: int = 1) -> None:
+        """
+        少なくとも count 個のIDを含むブロックを予約してコミットする
+        db には購入とは別の（この予約だけに使う）セッションを渡す
+        """
+        size = max(self.block_size, count)
+        floor = db.execute(select(func.max(self.column))).scalar() or 0
+        last = sequences.next_value(db, self.name, size, floor=floor)
+        db.commit()
+        metrics_registry.inc("id_block_reservations_total", (("name", self.name),))
+        with self._lock:
+            self._blocks.setdefault(db.get_bind(), deque()).append((last - size + 1, last))
+
+    def allocate(self, db: Session, count: int = 1) -> List[int]:
+        """db の接続先で使う count 個のIDを払い出す（予約済みの範囲が足りなければ新しいブロックを予約）"""
+        key = db.get_bind()
+        ids = self._take(key, count)
+        while ids is None:
+            with Session(bind=key) as session:
+                self.reserve(session, count)
+            ids = self._take(key, count)
+        return ids
+
+    async def allocate_async(self, db: AsyncSession, count: int = 1) -> List[int]:
+        """allocate の非同期版"""
+        key = db.bind.sync_engine
+        ids = self._take(key, count)
+        while ids is None:
+            async with AsyncSession(bind=db.bind) as session:
+                await session.run_sync(self.reserve, count)
+            ids = self._take(key, count)
+        return ids
+
+
+# アプリケーション全体で共有する取引IDの採番
+trd_id_allocator = BlockIdAllocator(sequences.TRANSACTION_ID, Transaction.TRD_ID, block_size=settings.TRD_ID_BLOCK_SIZE)
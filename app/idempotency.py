@@ -0,0 +1,193 @@
+"""
+購入APIの冪等キー（Idempotency-Key）管理
+端末のタイムアウト再送で取引が二重登録されないよう、初回レスポンスを保存して再送時に返す
+
+- 保存先: インメモリLRU（有効期限付き） + idempotency_keys テーブル（一意インデックス）
+- 同じキーの同時リクエストはワーカー内でキー単位のロックにより1件だけが登録処理を行う
+- ワーカーをまたぐ同時リクエストは一意インデックス違反で検出し、先に登録された結果を返す
+- 有効期限切れの行は IdempotencyPurger が一定間隔でまとめて削除する（テーブルが購入件数に比例して増え続けない）
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from models import IdempotencyKey
+from app import schemas
+from app.cache import TTLCache
+from app.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+metrics_registry.describe("idempotency_keys_purged_total", "counter", "有効期限切れで削除した冪等キーの数")
+
+
+class IdempotencyConflictError(ValueError):
+    """同じ冪等キーで異なる内容のリクエストが送られた"""
+
+
+def request_fingerprint(purchase_request: schemas.PurchaseRequest) -> str:
+    """リクエスト本文のハッシュ"""
+    return hashlib.sha256(purchase_request.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """冪等キーと初回レスポンスの保存先"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize, ttl)
+        self._locks: Dict[str, list] = {}
+        self._async_locks: Dict[str, list] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def lock(self, key: str):
+        """同じキーの処理をワーカー内で直列化する"""
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    @asynccontextmanager
+    async def async_lock(self, key: str):
+        """lock の非同期版（イベントループをブロックしない）"""
+        with self._guard:
+            entry = self._async_locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._async_locks[key]
+
+    def lookup(self, db: Session, key: str, fingerprint: str) -> Optional[schemas.PurchaseResponse]:
+        """
+        保存済みのレスポンスを取得（なければ None）
+        内容の異なるリクエストで同じキーが使われた場合は IdempotencyConflictError
+        """
+        cached = self._cache.get(key)
+        if cached is None:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.IDEMPOTENCY_KEY == key).first()
+            if row is None:
+                return None
+            if row.CREATED_AT < datetime.utcnow() - timedelta(seconds=self.ttl):
+                # 有効期限切れのキーは削除して新しいリクエストとして扱う
+                db.delete(row)
+                db.flush()
+                return None
+            cached = (row.REQUEST_HASH, schemas.PurchaseResponse.model_validate_json(row.RESPONSE))
+            self._cache.set(key, cached)
+
+        request_hash, response = cached
+        if request_hash != fingerprint:
+            raise IdempotencyConflictError(f"Idempotency-Key '{key}' was already used with a different request")
+        return response
+
+    def save(self, db: Session, key: str, fingerprint: str, response: schemas.PurchaseResponse) -> None:
+        """レスポンスを登録（購入と同じトランザクションでコミットする）"""
+        db.add(IdempotencyKey(
+            IDEMPOTENCY_KEY=key,
+            REQUEST_HASH=fingerprint,
+            TRD_ID=response.transaction_id,
+            RESPONSE=response.model_dump_json(),
+            CREATED_AT=datetime.utcnow(),
+        ))
+
+    def remember(self, key: str, fingerprint: str, response: schemas.PurchaseResponse) -> None:
+        """コミット済みのレスポンスをインメモリに登録"""
+        self._cache.set(key, (fingerprint, response))
+
+    def purge_expired(self, db: Session, limit: Optional[int] = None) -> int:
+        """
+        有効期限切れのキーを古い順に最大 limit 件削除し、削除件数を返す（コミットは呼び出し側で行う）
+        limit を指定すると1回の DELETE で取る行ロックを抑えられる
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        condition = IdempotencyKey.CREATED_AT < cutoff
+        if limit is not None:
+            ids = db.execute(
+                select(IdempotencyKey.ID).where(condition).order_by(IdempotencyKey.CREATED_AT).limit(limit)
+            ).scalars().all()
+            if not ids:
+                return 0
+            condition = IdempotencyKey.ID.in_(ids)
+        result = db.execute(delete(IdempotencyKey).where(condition))
+        return result.rowcount
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class IdempotencyPurger:
+    """有効期限切れの冪等キーを一定間隔で削除するスレッド（batch_size 件ずつコミット）"""
+
+    def __init__(self, store: IdempotencyStore, session_factory: Callable[[], Session], interval: float, batch_size: int = 1000):
+        self.store = store
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def purge_once(self) -> int:
+        """期限切れのキーがなくなるまで削除し、削除件数を返す"""
+        total = 0
+        with self.session_factory() as db:
+            while not self._stop.is_set():
+                deleted = self.store.purge_expired(db, limit=self.batch_size)
+                db.commit()
+                total += deleted
+                if deleted < self.batch_size:
+                    break
+        metrics_registry.inc("idempotency_keys_purged_total", (), total)
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.purge_once()
+            except Exception:
+                logger.warning("Failed to purge expired idempotency keys", exc_info=True)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="idempotency-purger", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# アプリケーション全体で共有する冪等キーストア（インメモリ部分はワーカープロセス単位）
+idempotency_store = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+)
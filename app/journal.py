@@ -0,0 +1,623 @@
+"""
+購入ジャーナル（先行書き込みログ）
+PURCHASE_JOURNAL_ENABLED=True のとき、購入APIは商品を解決した購入をローカルの追記専用ファイルに
+書き込んで fsync し、ジャーナルID（journal_id）を付けて応答する。DBへの登録はバックグラウンドの
+フラッシャーがまとめて行うため、会計の応答がDBのコミット待ち（Azure MySQLの遅延・一時的な停止）に左右されない
+
+- ファイル: PURCHASE_JOURNAL_DIR/journal-<開始日時>-<PID>.log（ワーカーごと。1行1購入のJSON）
+- 各ワーカーは自分のファイルを flock で占有し、ロックを取れたファイル（停止したワーカーの残り）も再生する
+- 登録済みの位置は <ファイル>.ckpt に記録する。コミット後・記録前に停止した場合は、
+  同じトランザクションで保存した冪等キー（journal:<journal_id>）で二重登録を防ぐ
+- 登録できない購入（削除された商品など）は journal-failed.ndjson に退避して先へ進む
+- 冪等キー付きの購入は、DB登録までの間 keys/<キーのハッシュ>.json にレスポンスを記録する。
+  ジャーナルへ書き込む前にキーを確保（処理中の記録を作成）し、書き込んだ後にレスポンスで置き換える。
+  ジャーナルのディレクトリは全ワーカーで共有するため、別のワーカーに届いた再送もこの記録から同じレスポンスを返す。
+  それでも重複して記録された購入（停止したワーカーの確保を引き継いだ場合など）はDB登録時に冪等キーで検出し、登録せずに duplicate とする
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+import sys
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import SessionLocal
+from models import IdempotencyKey
+from app import crud, schemas
+from app.idempotency import IdempotencyConflictError, idempotency_store, request_fingerprint
+from app.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+metrics_registry.describe("purchase_journal_appends_total", "counter", "ジャーナルに記録した購入数")
+metrics_registry.describe("purchase_journal_append_seconds", "histogram", "ジャーナルへの書き込みと fsync の時間（秒）")
+metrics_registry.describe("purchase_journal_flushed_total", "counter", "ジャーナルからDBへ登録した購入数")
+metrics_registry.describe("purchase_journal_failed_total", "counter", "登録できずに退避した購入数")
+metrics_registry.describe("purchase_journal_duplicates_total", "counter", "冪等キーが登録済みのため登録しなかった購入数")
+
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+FAILED_FILE = "journal-failed.ndjson"
+KEYS_DIR = "keys"
+# 処理中の冪等キーの記録を別のワーカーが待つ時間と、確保したワーカーが停止したとみなすまでの時間（秒）
+KEY_CLAIM_WAIT_SECONDS = 1.0
+KEY_CLAIM_STALE_SECONDS = 30.0
+
+
+def _complete_size(path: Path) -> int:
+    """最後の改行までのサイズ（書き込み途中で停止した末尾の行は応答していないため登録しない）"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return data.rfind(b"\n") + 1
+
+
+def _is_unavailable(error: Exception) -> bool:
+    """DBに接続できない（後で再試行する）エラーか"""
+    return isinstance(error, OperationalError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+def journal_key(journal_id: str) -> str:
+    """DB登録済みの記録に使う冪等キー"""
+    return f"journal:{journal_id}"
+
+
+def _fsync_directory(path: Path) -> None:
+    """ディレクトリのエントリ（作成したファイル）をディスクに書き出す"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Segment:
+    """flock で占有したジャーナルファイル"""
+
+    def __init__(self, path: Path, create: bool = False):
+        self.path = path
+        flags = os.O_RDWR | os.O_APPEND | (os.O_CREAT | os.O_EXCL if create else 0)
+        self.fd = os.open(path, flags, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".ckpt")
+
+    def read_checkpoint(self) -> int:
+        try:
+            return int(self.checkpoint_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def write_checkpoint(self, offset: int) -> None:
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, self.checkpoint_path)
+
+    def size(self) -> int:
+        return os.fstat(self.fd).st_size
+
+    def close(self, remove: bool = False) -> None:
+        if remove:
+            self.checkpoint_path.unlink(missing_ok=True)
+            self.path.unlink(missing_ok=True)
+        os.close(self.fd)
+
+
+class PurchaseJournal:
+    """購入の先行書き込みログと、DBへまとめて登録するフラッシャー"""
+
+    def __init__(
+        self,
+        directory,
+        session_factory: Callable[[], Session],
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.directory = Path(directory)
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.segment_max_bytes = segment_max_bytes
+        self._segment: Optional[_Segment] = None
+        self._retired: List[_Segment] = []  # ローテーション後、登録が終わるまで占有しておくファイル
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._sequence = 0
+        self._written = 0  # 書き込み済みの通番
+        self._synced = 0  # fsync 済みの通番
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self._segment is not None
+
+    # ---------- 書き込み ----------
+
+    def _open_segment(self) -> _Segment:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            name = f"{SEGMENT_PREFIX}{datetime.utcnow():%Y%m%d%H%M%S%f}-{os.getpid()}{SEGMENT_SUFFIX}"
+            try:
+                segment = _Segment(self.directory / name, create=True)
+            except FileExistsError:
+                continue
+            # 電源断でファイルごと消えないよう、作成したファイルのエントリも書き出す
+            _fsync_directory(self.directory)
+            return segment
+
+    def open(self) -> None:
+        """自分のジャーナルファイルを作成する（以降 append できる）"""
+        if self._segment is None:
+            self._segment = self._open_segment()
+
+    def append(
+        self,
+        purchase_request: schemas.PurchaseRequest,
+        products: List[schemas.Product],
+        idempotency_key: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> Tuple[str, datetime]:
+        """
+        購入を記録して fsync し、(journal_id, 販売日時) を返す
+        同時に書き込まれた購入は1回の fsync でまとめてディスクに書き出す（グループコミット）
+        """
+        start = time.perf_counter()
+        sold_at = datetime.utcnow()
+        with self._write_lock:
+            segment = self._segment
+            if segment is None:
+                raise RuntimeError("Purchase journal is not open")
+            self._sequence += 1
+            sequence = self._sequence
+            journal_id = f"{segment.path.stem[len(SEGMENT_PREFIX):]}-{sequence}"
+            record = {
+                "journal_id": journal_id,
+                "sold_at": sold_at.isoformat(),
+                "request": purchase_request.model_dump(mode="json"),
+                "products": [product.model_dump() for product in products],
+                "idempotency_key": idempotency_key,
+                "fingerprint": fingerprint,
+            }
+            os.write(segment.fd, orjson.dumps(record) + b"\n")
+            self._written = sequence
+        with self._sync_lock:
+            if self._synced < sequence:
+                # ここまでに書き込まれた分をまとめて書き出す
+                written = self._written
+                os.fsync(segment.fd)
+                self._synced = written
+        metrics_registry.inc("purchase_journal_appends_total", ())
+        metrics_registry.observe("purchase_journal_append_seconds", (), time.perf_counter() - start)
+        return journal_id, sold_at
+
+    def record_purchase(
+        self,
+        purchase_request: schemas.PurchaseRequest,
+        products: List[schemas.Product],
+        tax_rates: Dict[str, int],
+        idempotency_key: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> Tuple[schemas.PurchaseResponse, bool]:
+        """
+        商品解決済みの購入を記録し、journal_id 付きのレスポンスと「既存の結果を返したか」を返す
+        （transaction_id はDB登録後に決まる）
+        冪等キー付きの購入は、キーを確保してからジャーナルに書き込む。
+        別のワーカーが確保済み（DB登録前）の場合は、記録せずにそのレスポンスを返す
+        """
+        header = crud.build_purchase_header(purchase_request, products, tax_rates)
+        if idempotency_key is not None:
+            claimed = self._claim_key(idempotency_key, fingerprint)
+            if claimed is not None:
+                return claimed, True
+        try:
+            journal_id, _ = self.append(purchase_request, products, idempotency_key, fingerprint)
+        except Exception:
+            if idempotency_key is not None:
+                # 記録できなかった購入の確保は解放する（再送やDBへの直接登録で処理し直せるように）
+                self._key_path(idempotency_key).unlink(missing_ok=True)
+            raise
+        purchase_response = schemas.PurchaseResponse(
+            success=True,
+            total_amount=header.TOTAL_AMT,
+            total_amount_ex_tax=header.TTL_AMT_EX_TAX,
+            items_count=len(purchase_request.items),
+            journal_id=journal_id,
+        )
+        if idempotency_key is not None:
+            self._write_key(idempotency_key, fingerprint, purchase_response)
+            idempotency_store.remember(idempotency_key, fingerprint, purchase_response)
+        return purchase_response, False
+
+    # ---------- 冪等キーの記録（DB登録まで） ----------
+
+    def _key_path(self, idempotency_key: str) -> Path:
+        return self.directory / KEYS_DIR / f"{hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()}.json"
+
+    def _read_key(self, idempotency_key: str) -> Optional[dict]:
+        try:
+            return orjson.loads(self._key_path(idempotency_key).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def claimed_response(self, idempotency_key: str, fingerprint: str) -> Optional[schemas.PurchaseResponse]:
+        """
+        同じ冪等キーでジャーナルに記録済み（DB登録前）の購入のレスポンス（なければ None）
+        確保したワーカーが書き込み中なら KEY_CLAIM_WAIT_SECONDS まで待つ。
+        内容の異なるリクエストで同じキーが使われた場合や、待っても書き込みが終わらない場合は IdempotencyConflictError
+        （確保から KEY_CLAIM_STALE_SECONDS 以上経った処理中の記録は、停止したワーカーのものとみなして削除し None を返す）
+        """
+        deadline = time.monotonic() + KEY_CLAIM_WAIT_SECONDS
+        while True:
+            entry = self._read_key(idempotency_key)
+            if entry is None:
+                return None
+            if entry["fingerprint"] != fingerprint:
+                raise IdempotencyConflictError(
+                    f"Idempotency-Key '{idempotency_key}' was already used with a different request"
+                )
+            if entry["response"] is not None:
+                return schemas.PurchaseResponse.model_validate(entry["response"])
+            if time.time() - entry["claimed_at"] > KEY_CLAIM_STALE_SECONDS:
+                logger.warning("Releasing abandoned journal claim for an idempotency key")
+                self._key_path(idempotency_key).unlink(missing_ok=True)
+                return None
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflictError(
+                    f"A request with Idempotency-Key '{idempotency_key}' is still being processed"
+                )
+            time.sleep(0.01)
+
+    def _write_key_file(self, path: Path, entry: dict) -> Path:
+        """一時ファイルに書き込む（他のワーカーから書き込み途中の内容が見えないよう、link / replace で公開する）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        tmp.write_bytes(orjson.dumps(entry))
+        return tmp
+
+    def _claim_key(self, idempotency_key: str, fingerprint: str) -> Optional[schemas.PurchaseResponse]:
+        """
+        冪等キーを確保する（レスポンスのない処理中の記録を link で作成する）
+        別のワーカーが先に確保していれば、そのレスポンスを返す
+        """
+        path = self._key_path(idempotency_key)
+        while True:
+            tmp = self._write_key_file(path, {"fingerprint": fingerprint, "response": None, "claimed_at": time.time()})
+            try:
+                os.link(tmp, path)
+                return None
+            except FileExistsError:
+                claimed = self.claimed_response(idempotency_key, fingerprint)
+                if claimed is not None:
+                    return claimed
+                # 停止したワーカーの確保を削除した（または登録が終わって削除された）ため、確保し直す
+            finally:
+                tmp.unlink()
+
+    def _write_key(self, idempotency_key: str, fingerprint: str, purchase_response: schemas.PurchaseResponse) -> None:
+        """確保した冪等キーの記録をレスポンスで置き換える"""
+        path = self._key_path(idempotency_key)
+        tmp = self._write_key_file(path, {
+            "fingerprint": fingerprint,
+            "response": purchase_response.model_dump(mode="json"),
+            "claimed_at": time.time(),
+        })
+        os.replace(tmp, path)
+
+    def _release_key(self, record: dict) -> None:
+        """DB登録が終わった購入の冪等キーの記録を削除する（以降の再送はDBに保存したレスポンスを返す）"""
+        idempotency_key = record.get("idempotency_key")
+        if not idempotency_key:
+            return
+        entry = self._read_key(idempotency_key)
+        if entry is None:
+            return
+        if entry["response"] is None:
+            # 書き込み後・レスポンスの記録前に停止したワーカーの確保（登録が終わったため以降の再送はDBから返す）
+            if time.time() - entry["claimed_at"] > KEY_CLAIM_STALE_SECONDS:
+                self._key_path(idempotency_key).unlink(missing_ok=True)
+        elif entry["response"].get("journal_id") == record["journal_id"]:
+            self._key_path(idempotency_key).unlink(missing_ok=True)
+
+    def _rotate_if_needed(self) -> None:
+        with self._write_lock:
+            if self._segment is None or self._segment.size() < self.segment_max_bytes:
+                return
+            with self._sync_lock:
+                os.fsync(self._segment.fd)
+                self._synced = self._written
+            self._retired.append(self._segment)
+            self._segment = self._open_segment()
+
+    # ---------- DBへの登録 ----------
+
+    def flush_once(self) -> int:
+        """
+        登録待ちの購入をDBへ登録し、登録した件数を返す
+        自分のファイル・ローテーション済みのファイル・停止したワーカーのファイルの順に処理する
+        """
+        with self._flush_lock:
+            flushed = 0
+            own = [self._segment] if self._segment is not None else []
+            for segment in own + list(self._retired):
+                flushed += self._flush_segment(segment)
+            for segment in list(self._retired):
+                if segment.read_checkpoint() >= segment.size():
+                    self._retired.remove(segment)
+                    segment.close(remove=True)
+            for segment in self._orphan_segments():
+                try:
+                    flushed += self._flush_segment(segment)
+                except Exception:
+                    segment.close()
+                    raise
+                complete = _complete_size(segment.path)
+                done = segment.read_checkpoint() >= complete
+                if done and segment.size() > complete:
+                    logger.warning(
+                        "Discarding %d bytes of incomplete journal record in %s",
+                        segment.size() - complete, segment.path.name,
+                    )
+                segment.close(remove=done)
+            self._rotate_if_needed()
+            return flushed
+
+    def _orphan_segments(self) -> List[_Segment]:
+        """ロックを取れた他のワーカーのファイル（そのワーカーは停止している）"""
+        own = {segment.path for segment in [self._segment, *self._retired] if segment is not None}
+        segments = []
+        if not self.directory.exists():
+            return segments
+        for path in sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+            if path in own:
+                continue
+            try:
+                segments.append(_Segment(path))
+            except (BlockingIOError, FileNotFoundError):
+                continue  # 動いているワーカーのファイル、または別のワーカーが再生済み
+        return segments
+
+    def _flush_segment(self, segment: _Segment) -> int:
+        offset = segment.read_checkpoint()
+        with open(segment.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        flushed = 0
+        batch: List[Tuple[int, bytes]] = []  # (行末のオフセット, 行)
+        position = offset
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # 書き込み途中の行
+            position += len(line)
+            batch.append((position, line))
+            if len(batch) >= self.batch_size:
+                flushed += self._flush_batch(segment, batch)
+                batch = []
+        if batch:
+            flushed += self._flush_batch(segment, batch)
+        return flushed
+
+    def _flush_batch(self, segment: _Segment, batch: List[Tuple[int, bytes]]) -> int:
+        """1バッチを1トランザクションで登録してチェックポイントを進める"""
+        records = []
+        for _, line in batch:
+            try:
+                records.append((line, orjson.loads(line)))
+            except orjson.JSONDecodeError:
+                self._dead_letter(line, "invalid JSON")
+        flushed = 0
+        db = self.session_factory()
+        try:
+            keys = [journal_key(record["journal_id"]) for _, record in records]
+            keys += [record["idempotency_key"] for _, record in records if record.get("idempotency_key")]
+            saved = set(db.execute(
+                select(IdempotencyKey.IDEMPOTENCY_KEY).where(IdempotencyKey.IDEMPOTENCY_KEY.in_(keys))
+            ).scalars()) if keys else set()
+            pending = []
+            duplicates = []
+            for line, record in records:
+                if journal_key(record["journal_id"]) in saved:
+                    continue
+                idempotency_key = record.get("idempotency_key")
+                if idempotency_key in saved:
+                    # 別のワーカーが同時に記録した、同じ冪等キーの購入（先の購入を登録済み・このバッチで登録する）
+                    duplicates.append(record)
+                    continue
+                if idempotency_key:
+                    saved.add(idempotency_key)
+                pending.append((line, record))
+            try:
+                self._insert(db, [record for _, record in pending])
+                db.commit()
+                flushed = len(pending)
+            except Exception as e:
+                db.rollback()
+                if _is_unavailable(e):
+                    raise
+                # 問題のある購入を特定するため1件ずつ登録し直す
+                for line, record in pending:
+                    try:
+                        self._insert(db, [record])
+                        db.commit()
+                        flushed += 1
+                    except Exception as record_error:
+                        db.rollback()
+                        if _is_unavailable(record_error):
+                            raise
+                        self._dead_letter(line, str(record_error))
+                        self._mark_failed(db, record)
+                        db.commit()
+            if duplicates:
+                self._mark_duplicates(db, duplicates)
+                db.commit()
+        finally:
+            db.close()
+        for _, record in records:
+            self._release_key(record)
+        segment.write_checkpoint(batch[-1][0])
+        metrics_registry.inc("purchase_journal_flushed_total", (), flushed)
+        return flushed
+
+    @staticmethod
+    def _mark_failed(db: Session, record: dict) -> None:
+        """登録できなかった購入の記録に、失敗のレスポンス（success=False）を保存する（状況は failed）"""
+        response = schemas.PurchaseResponse(
+            success=False,
+            total_amount=0,
+            total_amount_ex_tax=0,
+            items_count=len(record["request"].get("items") or []),
+            journal_id=record["journal_id"],
+        )
+        # 記録時の fingerprint（冪等キーなしの購入にはないため、その場合はリクエストから求める）
+        fingerprint = record.get("fingerprint") or hashlib.sha256(orjson.dumps(record["request"])).hexdigest()
+        idempotency_store.save(db, journal_key(record["journal_id"]), fingerprint, response)
+
+    def _mark_duplicates(self, db: Session, records: List[dict]) -> None:
+        """重複した購入の記録に、同じ冪等キーで先に登録された購入のレスポンスを保存する（状況は duplicate）"""
+        keys = {record["idempotency_key"] for record in records}
+        responses = dict(db.execute(
+            select(IdempotencyKey.IDEMPOTENCY_KEY, IdempotencyKey.RESPONSE).where(IdempotencyKey.IDEMPOTENCY_KEY.in_(keys))
+        ).all())
+        for record in records:
+            response = responses.get(record["idempotency_key"])
+            if response is None:
+                # 先の購入が登録できなかった場合は、同じ内容のこの購入も登録しない
+                self._mark_failed(db, record)
+                continue
+            idempotency_store.save(
+                db, journal_key(record["journal_id"]), record["fingerprint"],
+                schemas.PurchaseResponse.model_validate_json(response),
+            )
+        metrics_registry.inc("purchase_journal_duplicates_total", (), len(records))
+
+    @staticmethod
+    def _insert(db: Session, records: List[dict]) -> None:
+        if not records:
+            return
+        purchases = [
+            (
+                schemas.PurchaseRequest.model_validate(record["request"]),
+                [schemas.Product(**product) for product in record["products"]],
+            )
+            for record in records
+        ]
+        headers = crud.insert_purchases(
+            db, purchases, sold_at=[datetime.fromisoformat(record["sold_at"]) for record in records]
+        )
+        for record, header, (purchase_request, _) in zip(records, headers, purchases):
+            response = schemas.PurchaseResponse(
+                success=True,
+                transaction_id=header.TRD_ID,
+                total_amount=header.TOTAL_AMT,
+                total_amount_ex_tax=header.TTL_AMT_EX_TAX,
+                items_count=len(purchase_request.items),
+                journal_id=record["journal_id"],
+            )
+            fingerprint = request_fingerprint(purchase_request)
+            idempotency_store.save(db, journal_key(record["journal_id"]), fingerprint, response)
+            if record.get("idempotency_key"):
+                idempotency_store.save(db, record["idempotency_key"], record["fingerprint"], response)
+
+    def _dead_letter(self, line: bytes, error: str) -> None:
+        logger.error("Purchase journal record could not be committed: %s", error)
+        metrics_registry.inc("purchase_journal_failed_total", ())
+        entry = orjson.dumps({"error": error, "failed_at": datetime.utcnow().isoformat(), "record": line.decode("utf-8", "replace").rstrip("\n")})
+        with open(self.directory / FAILED_FILE, "ab") as f:
+            f.write(entry + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def status(self, db: Session, journal_id: str) -> schemas.PurchaseJournalStatus:
+        """
+        ジャーナルIDのDB登録状況
+        DB登録の結果は journal:<journal_id> の冪等キーに保存したレスポンスで判別する
+        （失敗は success=False、重複は先に登録された購入のレスポンス）
+        """
+        row = db.execute(
+            select(IdempotencyKey.TRD_ID, IdempotencyKey.RESPONSE)
+            .where(IdempotencyKey.IDEMPOTENCY_KEY == journal_key(journal_id))
+        ).first()
+        if row is None:
+            return schemas.PurchaseJournalStatus(journal_id=journal_id, status="pending")
+        response = schemas.PurchaseResponse.model_validate_json(row.RESPONSE)
+        if not response.success:
+            return schemas.PurchaseJournalStatus(journal_id=journal_id, status="failed")
+        if response.journal_id != journal_id:
+            return schemas.PurchaseJournalStatus(journal_id=journal_id, status="duplicate", transaction_id=row.TRD_ID)
+        return schemas.PurchaseJournalStatus(journal_id=journal_id, status="committed", transaction_id=row.TRD_ID)
+
+    # ---------- バックグラウンドのフラッシャー ----------
+
+    def _run(self) -> None:
+        # flush_interval 秒ごとに、その間に届いた購入をまとめて登録する
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush_once()
+            except Exception:
+                logger.exception("Purchase journal flush failed; retrying in %.1fs", self.flush_interval)
+
+    def start(self) -> None:
+        """ジャーナルを開き、停止前の未登録分の再生とバックグラウンドの登録を開始する"""
+        if self._thread is None:
+            self.open()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="purchase-journal", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """フラッシャーを止めて残りを登録し、ファイルを閉じる（登録できなかった分は次回起動時に再生）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush_once()
+        except Exception:
+            logger.exception("Purchase journal flush on shutdown failed; pending sales will be replayed on restart")
+        self.close()
+
+    def close(self) -> None:
+        """ファイルを閉じる（登録済みのファイルは削除し、未登録分があるファイルは次回の再生のため残す）"""
+        with self._write_lock:
+            for segment in [self._segment, *self._retired]:
+                if segment is None:
+                    continue
+                done = segment.read_checkpoint() >= segment.size()
+                segment.close(remove=done)
+            self._segment = None
+            self._retired = []
+
+
+def create_purchase_journal(session_factory: Callable[[], Session]) -> PurchaseJournal:
+    return PurchaseJournal(
+        settings.PURCHASE_JOURNAL_DIR,
+        session_factory,
+        flush_interval=settings.PURCHASE_JOURNAL_FLUSH_INTERVAL_SECONDS,
+        batch_size=settings.PURCHASE_JOURNAL_BATCH_SIZE,
+        segment_max_bytes=settings.PURCHASE_JOURNAL_SEGMENT_MAX_BYTES,
+    )
+
+
+# アプリケーション全体で共有する購入ジャーナル（PURCHASE_JOURNAL_ENABLED のとき lifespan で start する）
+purchase_journal = create_purchase_journal(SessionLocal)
@@ -0,0 +1,198 @@
+"""
+メトリクス（Prometheusテキスト形式）
+リクエスト数・レイテンシのヒストグラムをルートのテンプレート・ステータス別に記録し、
+/metrics で出力する
+
+記録はスレッドごとのシャードに対して行うためロック不要で、全負荷でも有効にしたままにできる。
+シャードは出力時にだけ合算する。集計はワーカープロセス単位で、各系列に worker ラベル（PID）を付ける
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# レイテンシ用のバケット上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Shard:
+    """1スレッド分の記録領域（書き込むのは所有スレッドのみ）"""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class MetricsRegistry:
+    """カウンタとヒストグラムのレジストリ"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, dict, float]]]] = []
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """メトリクスの種類と説明を登録"""
+        self._help[name] = (metric_type, help_text)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """カウンタを加算"""
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """ヒストグラムに値を記録"""
+        histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # バケットごとの件数 + (+Inf) + 合計値
+            histogram = histograms[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, dict, float]]]) -> None:
+        """出力時に値を読む収集関数を登録（(名前, 種類, 説明, ラベル, 値) を返す）"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        """全シャードを合算した値"""
+        with self._lock:
+            shards = list(self._shards)
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        for shard in shards:
+            for key, value in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + value
+            for key, values in list(shard.histograms.items()):
+                merged = histograms.setdefault(key, [0] * len(values))
+                for index, value in enumerate(list(values)):
+                    merged[index] += value
+        return counters, histograms
+
+    def render(self) -> str:
+        """Prometheusテキスト形式で出力"""
+        counters, histograms = self.snapshot()
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str, metric_type: str, help_text: Optional[str] = None):
+            if name in described:
+                return
+            described.add(name)
+            registered = self._help.get(name)
+            lines.append(f"# HELP {name} {help_text or (registered[1] if registered else name)}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{self._format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), values in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{name}_bucket{self._format_labels(labels + (('le', le),))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {_format_value(values[-1])}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {_format_value(cumulative)}")
+
+        for collector in self._collectors:
+            for name, metric_type, help_text, labels, value in collector():
+                header(name, metric_type, help_text)
+                lines.append(f"{name}{self._format_labels(tuple(labels.items()))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _format_labels(self, labels: Labels) -> str:
+        # preload でフォークされた場合も各ワーカーのPIDになるよう出力時に取得する
+        pairs = (("worker", str(os.getpid())),) + tuple(labels)
+        return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# アプリケーション全体で共有するレジストリ
+registry = MetricsRegistry()
+registry.describe("http_requests_total", "counter", "HTTPリクエスト数（メソッド・ルート・ステータス別）")
+registry.describe("http_request_duration_seconds", "histogram", "HTTPリクエストの処理時間（秒）")
+registry.describe("purchase_errors_total", "counter", "購入処理の内部エラー数（例外の種類別）")
+registry.describe("db_pool_checkout_wait_seconds", "histogram", "コネクションプールからの接続取得待ち時間（秒）")
+
+
+class MetricsMiddleware:
+    """
+    リクエスト数とレイテンシを記録するASGIミドルウェア
+    ルートはパスではなくテンプレート（例: /api/products/code/{code}）で集計する
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = (
+                ("method", scope["method"]),
+                ("route", getattr(route, "path", None) or "unmatched"),
+                ("status", str(status_code)),
+            )
+            self.registry.inc("http_requests_total", labels)
+            self.registry.observe("http_request_duration_seconds", labels, time.perf_counter() - start)
+
+
+def pool_collector(engine):
+    """SQLAlchemyのコネクションプールの状態を出力する収集関数を作成"""
+
+    def collect():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            return
+        yield ("db_pool_checked_out", "gauge", "貸し出し中の接続数", {}, pool.checkedout())
+        yield ("db_pool_checked_in", "gauge", "プール内で待機中の接続数", {}, pool.checkedin())
+        if hasattr(pool, "overflow"):
+            yield ("db_pool_overflow", "gauge", "pool_size を超えて作成された接続数", {}, max(pool.overflow(), 0))
+            yield ("db_pool_size", "gauge", "プールサイズ", {}, pool.size())
+
+    return collect
@@ -0,0 +1,45 @@
+"""
+キーセット（カーソル）ページネーション
+OFFSET を使わず「前ページ最後の行のキーより後ろ」を索引で直接たどるため、
+何ページ目でも取得コストが一定になる
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+
+class InvalidCursorError(ValueError):
+    """カーソルの形式が不正"""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """キーの値を不透明なカーソル文字列に変換"""
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Dict[str, type]) -> Dict[str, Any]:
+    """
+    カーソル文字列をキーの値に戻す（不正な場合は InvalidCursorError）
+    keys はキー名と値の型（int / str / datetime）。datetime は ISO 形式の文字列から戻す。
+    型の合わない値（改ざんされたカーソル）はSQLに渡さず、不正なカーソルとして扱う
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = {}
+        for key, value_type in keys.items():
+            value = payload[key]
+            if value_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, value_type) or isinstance(value, bool):
+                raise TypeError(f"cursor key '{key}' must be {value_type.__name__}")
+            values[key] = value
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    return values
@@ -0,0 +1,183 @@
+"""
+SQL実行の計測
+エンジンのイベントでSQLの実行回数・所要時間をリクエストごとに集計し、
+しきい値（SLOW_QUERY_THRESHOLD_MS）を超えたSQLは正規化してログに出力する
+
+テストでは count_queries / assert_max_queries でエンドポイントのラウンドトリップ数を検証できる
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from app.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+metrics_registry.describe("db_statements_total", "counter", "実行したSQL文の数")
+metrics_registry.describe("db_slow_statements_total", "counter", "しきい値を超えたSQL文の数")
+
+
+class QueryStats:
+    """1リクエスト分のSQL実行の集計"""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_sql")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql: Optional[str] = None
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+    def server_timing(self) -> str:
+        """Server-Timing ヘッダの値"""
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+# 実行中のリクエストの集計（スレッドプールで実行される同期エンドポイントにもコンテキストごと引き継がれる）
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\([^)]*\)s|:\w+)\s*,)+\s*(?:\?|%s|%\([^)]*\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQLをログ用に正規化（リテラルを ? に置換し、IN句などのプレースホルダ列を1つにまとめる）"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def current_stats() -> Optional[QueryStats]:
+    """実行中のリクエストの集計（リクエスト外では None）"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    metrics_registry.inc("db_statements_total")
+    if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        metrics_registry.inc("db_slow_statements_total")
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, normalize_sql(statement))
+
+
+def _handle_error(exception_context):
+    # 失敗したSQLの開始時刻を取り除く
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """エンジンに計測用のイベントを登録（AsyncEngine の場合は sync_engine を渡す）"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    リクエストごとにSQL実行を集計するASGIミドルウェア
+    結果は Server-Timing ヘッダ（db;dur=合計ミリ秒;desc="N queries"）で返す
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            if stats.count and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "%s %s: %d queries, %.1f ms (slowest %.1f ms: %s)",
+                    scope["method"], scope["path"], stats.count, stats.total_ms,
+                    stats.slowest_ms, normalize_sql(stats.slowest_sql or ""),
+                )
+
+
+# ==================== テスト用 ====================
+
+class QueryCounter:
+    """count_queries で記録したSQL"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine):
+    """ブロック内でエンジンが実行したSQLを記録する"""
+    counter = QueryCounter()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(normalize_sql(statement))
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+
+@contextmanager
+def assert_max_queries(engine, max_queries: int):
+    """
+    ブロック内で実行したSQLが max_queries 件以下であることを検証する
+
+    使用例:
+        with assert_max_queries(engine, 5):
+            client.post("/api/purchase", json=payload)
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    assert counter.count <= max_queries, (
+        f"expected at most {max_queries} queries, got {counter.count}:\n" + "\n".join(counter.statements)
+    )
@@ -0,0 +1,178 @@
+"""
+読み取りレプリカへの振り分け
+DATABASE_READ_URL を設定すると、商品の参照・レポートなど読み取りだけのエンドポイント（get_read_db）は
+レプリカから読み、購入などの書き込みとプライマリを奪い合わない。
+レプリカの遅延が READ_REPLICA_MAX_LAG_SECONDS を超えた場合や接続できない場合は、回復するまでプライマリから読む
+
+遅延はハートビートで計測する: プライマリの sequences テーブルに現在時刻を書き込み、直後にレプリカで読める値との差を遅延とする。
+レプリケーションの方式やDBの種類によらず、レプリカで実際に読める内容の古さを測れる
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal
+from app import sequences
+from app.metrics import registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+metrics_registry.describe("db_read_sessions_total", "counter", "読み取り専用のセッション数（target: replica / primary）")
+
+
+def is_replica(db: Session) -> bool:
+    """レプリカのセッションか（レプリカから読んだ値はキャッシュに載せない）"""
+    return bool(db.info.get("read_replica"))
+
+
+class ReplicaMonitor:
+    """レプリカの遅延と接続を定期的に確認し、読み取りをレプリカに振り分けてよいかを保持する"""
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica: sessionmaker,
+        max_lag: float,
+        interval: float,
+        async_replica: Optional[async_sessionmaker] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """async_replica: 非同期モードでレプリカから読むためのセッション（遅延の確認は replica で行う）"""
+        self.primary = primary
+        self.replica = replica
+        self.async_replica = async_replica
+        self.max_lag = max_lag
+        self.interval = interval
+        self._clock = clock  # ハートビートは他のワーカー・DBと比べるため壁時計を使う
+        self._result: Optional[dict] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check_once(self) -> dict:
+        """ハートビートを書き込み、レプリカの遅延を確認して結果を更新する"""
+        now = self._clock()
+        try:
+            with self.primary() as db:
+                sequences.set_value(db, sequences.REPLICA_HEARTBEAT, int(now * 1000))
+                db.commit()
+        except Exception as e:
+            # プライマリに書けない間はレプリカのハートビートが進まないため、遅延は大きく見積もられる
+            logger.warning("Failed to write replica heartbeat: %s", e)
+
+        lag = None
+        try:
+            with self.replica() as db:
+                heartbeat = sequences.current_value(db, sequences.REPLICA_HEARTBEAT)
+            database = "connected"
+            if heartbeat:
+                lag = round(max(now - heartbeat / 1000, 0.0), 3)
+        except Exception as e:
+            database = f"error: {str(e)}"
+
+        result = {
+            "database": database,
+            "lag_seconds": lag,
+            "max_lag_seconds": self.max_lag,
+            "use_replica": lag is not None and lag <= self.max_lag,
+        }
+        with self._lock:
+            self._result = result
+            self._checked_at = self._clock()
+        return result
+
+    def status(self) -> dict:
+        """
+        保持している最新の結果を返す
+        バックグラウンドのスレッドが動いていない場合は、結果が interval より古ければその場で確認する
+        """
+        with self._lock:
+            result, checked_at = self._result, self._checked_at
+        if self._thread is None and (result is None or self._clock() - checked_at > self.interval):
+            result = self.check_once()
+        return result
+
+    def use_replica(self) -> bool:
+        return self.status()["use_replica"]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check_once()
+
+    def start(self) -> None:
+        """最初の確認をその場で行ってからバックグラウンドのスレッドを開始する"""
+        if self._thread is None:
+            self.check_once()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# 読み取りレプリカの監視（DATABASE_READ_URL 指定時のみ）
+replica_monitor: Optional[ReplicaMonitor] = None
+
+if ReadSessionLocal is not None:
+    replica_monitor = ReplicaMonitor(
+        SessionLocal,
+        ReadSessionLocal,
+        max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+        interval=settings.READ_REPLICA_CHECK_INTERVAL_SECONDS,
+        async_replica=AsyncReadSessionLocal,
+    )
+
+
+def get_read_db():
+    """
+    読み取り専用のデータベースセッションを取得する依存性注入関数
+    レプリカが使える場合はレプリカ、そうでなければプライマリのセッションを返す（書き込みには使わない）
+
+    使用例:
+        @app.get("/items/")
+        def read_items(db: Session = Depends(get_read_db)):
+            ...
+    """
+    monitor = replica_monitor
+    if monitor is not None and monitor.use_replica():
+        target, db = "replica", monitor.replica()
+    else:
+        target, db = "primary", SessionLocal()
+    metrics_registry.inc("db_read_sessions_total", (("target", target),))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """
+    読み取り専用の非同期データベースセッションを取得する依存性注入関数（get_read_db の非同期版）
+    振り分けの判断は get_read_db と同じ（監視スレッドの動作中は保持している結果を読むだけで、イベントループを止めない）
+    """
+    monitor = replica_monitor
+    if monitor is not None and monitor.async_replica is not None and monitor.use_replica():
+        target, sessions = "replica", monitor.async_replica
+    else:
+        if AsyncSessionLocal is None:
+            raise RuntimeError("非同期モードが無効です（DB_ASYNC=True を設定してください）")
+        target, sessions = "primary", AsyncSessionLocal
+    metrics_registry.inc("db_read_sessions_total", (("target", target),))
+    async with sessions() as db:
+        yield db
@@ -0,0 +1,129 @@
+"""
+日次売上集計（ロールアップ）
+購入の登録と同じトランザクションで daily_sales / daily_product_sales に差分を加算するため、
+締め処理のレポートは取引・明細テーブルを走査せず集計テーブルだけを読めばよい
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from models import Transaction, TransactionArchive, TransactionDetail, TransactionDetailArchive, DailySales, DailyProductSales
+from app import archive
+from app.upsert import upsert
+
+
+def sales_date_of(dt: datetime) -> date:
+    """取引日時（UTC）から営業日を求める"""
+    return (dt + timedelta(hours=settings.ROLLUP_UTC_OFFSET_HOURS)).date()
+
+
+def utc_range_of(date_from: date, date_to: date) -> Tuple[datetime, datetime]:
+    """営業日の範囲（両端を含む）に対応する取引日時（UTC）の範囲 [開始, 終了)"""
+    offset = timedelta(hours=settings.ROLLUP_UTC_OFFSET_HOURS)
+    start = datetime.combine(date_from, time.min) - offset
+    end = datetime.combine(date_to + timedelta(days=1), time.min) - offset
+    return start, end
+
+
+class RollupAccumulator:
+    """取引・明細から集計テーブルへの差分を積み上げる"""
+
+    def __init__(self):
+        self.sales: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0, 0])
+        self.products: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add_transaction(self, dt: datetime, store_cd: str, pos_no: str, total_amt: int, ttl_amt_ex_tax: int) -> None:
+        totals = self.sales[(sales_date_of(dt), store_cd, pos_no)]
+        totals[0] += 1
+        totals[1] += total_amt or 0
+        totals[2] += ttl_amt_ex_tax or 0
+
+    def add_detail(self, dt: datetime, store_cd: str, pos_no: str, prd_id: int, price: int) -> None:
+        totals = self.products[(sales_date_of(dt), store_cd, pos_no, prd_id)]
+        totals[0] += 1
+        totals[1] += price or 0
+
+    def flush(self, db: Session) -> None:
+        """積み上げた差分をUPSERTで加算する"""
+        # 同時に更新するトランザクション同士がデッドロックしないよう、キー順に更新する
+        sales_rows = [
+            {"SALES_DATE": key[0], "STORE_CD": key[1], "POS_NO": key[2],
+             "SALES_CNT": cnt, "TOTAL_AMT": total, "TTL_AMT_EX_TAX": ex_tax}
+            for key, (cnt, total, ex_tax) in sorted(self.sales.items())
+        ]
+        product_rows = [
+            {"SALES_DATE": key[0], "STORE_CD": key[1], "POS_NO": key[2], "PRD_ID": key[3],
+             "QTY": qty, "AMT": amt}
+            for key, (qty, amt) in sorted(self.products.items())
+        ]
+        upsert(db, DailySales.__table__, sales_rows,
+               key_columns=["SALES_DATE", "STORE_CD", "POS_NO"],
+               increment_columns=["SALES_CNT", "TOTAL_AMT", "TTL_AMT_EX_TAX"])
+        upsert(db, DailyProductSales.__table__, product_rows,
+               key_columns=["SALES_DATE", "STORE_CD", "POS_NO", "PRD_ID"],
+               increment_columns=["QTY", "AMT"])
+        self.sales.clear()
+        self.products.clear()
+
+
+def apply_purchases(db: Session, headers: Iterable[Transaction], details: Iterable[dict]) -> None:
+    """登録した取引・明細の分だけ集計テーブルを加算する（購入と同じトランザクションで呼ぶ）"""
+    accumulator = RollupAccumulator()
+    headers_by_id = {}
+    for header in headers:
+        headers_by_id[header.TRD_ID] = header
+        accumulator.add_transaction(header.DATETIME, header.STORE_CD, header.POS_NO, header.TOTAL_AMT, header.TTL_AMT_EX_TAX)
+    for detail in details:
+        header = headers_by_id[detail["TRD_ID"]]
+        accumulator.add_detail(header.DATETIME, header.STORE_CD, header.POS_NO, detail["PRD_ID"], detail["PRD_PRICE"])
+    accumulator.flush(db)
+
+
+def rebuild(db: Session, date_from: date, date_to: date, chunk_size: int = 5000) -> Dict[str, int]:
+    """
+    営業日の範囲（両端を含む）の集計を取引・明細から再計算する（コミットは呼び出し側で行う）
+    取引・明細はサーバー側カーソルで chunk_size 行ずつ読み出す。範囲がアーカイブ済みの期間にかかる場合はアーカイブも読む
+    """
+    start, end = utc_range_of(date_from, date_to)
+    db.execute(delete(DailySales).where(DailySales.SALES_DATE.between(date_from, date_to)))
+    db.execute(delete(DailyProductSales).where(DailyProductSales.SALES_DATE.between(date_from, date_to)))
+
+    tables = [(Transaction, TransactionDetail)]
+    cutoff = archive.archived_before(db)
+    if cutoff is not None and start < cutoff:
+        tables.append((TransactionArchive, TransactionDetailArchive))
+
+    accumulator = RollupAccumulator()
+    transactions = details = 0
+    for header, detail in tables:
+        header_query = (
+            select(header.DATETIME, header.STORE_CD, header.POS_NO, header.TOTAL_AMT, header.TTL_AMT_EX_TAX)
+            .where(header.DATETIME >= start, header.DATETIME < end)
+        )
+        for row in db.execute(header_query.execution_options(yield_per=chunk_size)):
+            accumulator.add_transaction(*row)
+            transactions += 1
+
+        detail_query = (
+            select(header.DATETIME, header.STORE_CD, header.POS_NO, detail.PRD_ID, detail.PRD_PRICE)
+            .join(detail, detail.TRD_ID == header.TRD_ID)
+            .where(header.DATETIME >= start, header.DATETIME < end)
+        )
+        if header is TransactionArchive:
+            detail_query = detail_query.where(detail.DATETIME == header.DATETIME)
+        for row in db.execute(detail_query.execution_options(yield_per=chunk_size)):
+            accumulator.add_detail(*row)
+            details += 1
+
+    accumulator.flush(db)
+    return {"transactions": transactions, "details": details}
@@ -1,8 +1,8 @@
 """
 Pydantic schemas for API request/response models
 """
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, model_validator
+from datetime import date, datetime
 from typing import Optional, List
 
 
@@ -11,7 +11,8 @@ class Product(BaseModel):
     PRD_ID: int
     CODE: str
     NAME: str
-    PRICE: int
+    PRICE: int  # 税込単価
+    TAX_CD: str = "10"  # 消費税区分（10: 標準税率、08: 軽減税率）
 
     class Config:
         from_attributes = True  # SQLAlchemyモデルからPydanticモデルへ変換できるようにする
@@ -22,6 +23,37 @@ class ProductCreate(BaseModel):
     CODE: str
     NAME: str
     PRICE: int
+    TAX_CD: str = "10"
+
+
+class ProductLookupRequest(BaseModel):
+    """複数商品の一括検索リクエスト（商品コードと商品IDを混在可）"""
+    codes: List[str] = []
+    ids: List[int] = []
+
+
+class ProductLookupResponse(BaseModel):
+    """複数商品の一括検索結果"""
+    products: List[Product]   # 見つかった商品（リクエスト順、重複なし）
+    missing_codes: List[str]  # 見つからなかった商品コード
+    missing_ids: List[int]    # 見つからなかった商品ID
+
+
+class ProductImportError(BaseModel):
+    """取り込めなかった行"""
+    line: int
+    error: str
+
+
+class ProductImportResult(BaseModel):
+    """商品マスタの一括取り込み結果"""
+    inserted: int
+    updated: int
+    unchanged: int
+    rejected: int
+    duplicates: int
+    errors: List[ProductImportError]
+    version: Optional[int] = None  # 最後に書き込んだカタログのバージョン
 
 
 class Transaction(BaseModel):
@@ -38,6 +70,12 @@ class Transaction(BaseModel):
         from_attributes = True
 
 
+class TransactionPage(BaseModel):
+    """取引一覧の1ページ分（next_cursor を次のリクエストの cursor に指定する）"""
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
+
 class TransactionDetail(BaseModel):
     """取引明細スキーマ"""
     TRD_ID: int
@@ -52,14 +90,35 @@ class TransactionDetail(BaseModel):
         from_attributes = True
 
 
+class Receipt(Transaction):
+    """レシート（取引ヘッダと明細）。再発行・返品時の取引照会用"""
+    details: List[TransactionDetail]
+
+
+class ReceiptPage(BaseModel):
+    """レシート一覧の1ページ分（next_cursor を次のリクエストの cursor に指定する）"""
+    items: List[Receipt]
+    next_cursor: Optional[str] = None
+
+
 # === 購入API用のスキーマ ===
 
 class PurchaseItem(BaseModel):
-    """購入リクエストで受け取る商品リストの各アイテム"""
-    PRD_ID: int
-    CODE: str
-    NAME: str
-    PRICE: int
+    """
+    購入リクエストで受け取る商品リストの各アイテム
+    PRD_ID または CODE のどちらかで商品を指定する。
+    商品名・単価はサーバー側で商品マスタから解決するため、NAME / PRICE は省略可能（送られても使用しない）
+    """
+    PRD_ID: Optional[int] = None
+    CODE: Optional[str] = None
+    NAME: Optional[str] = None
+    PRICE: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_product_key(self):
+        if self.PRD_ID is None and self.CODE is None:
+            raise ValueError("PRD_ID または CODE のどちらかを指定してください")
+        return self
 
 
 class PurchaseRequest(BaseModel):
@@ -71,10 +130,119 @@ class PurchaseRequest(BaseModel):
 
 
 class PurchaseResponse(BaseModel):
-    """購入レスポンス"""
+    """
+    購入レスポンス
+    ジャーナルモード（PURCHASE_JOURNAL_ENABLED）では、DBへの登録前に journal_id で応答するため
+    transaction_id は None になる（登録後は GET /api/purchase/journal/{journal_id} で取得できる）
+    """
     success: bool
-    transaction_id: int
+    transaction_id: Optional[int] = None
     total_amount: int
     total_amount_ex_tax: int
     items_count: int
+    journal_id: Optional[str] = None
+
+
+class PurchaseJournalStatus(BaseModel):
+    """ジャーナルに記録した購入のDB登録状況"""
+    journal_id: str
+    status: str  # pending（DB登録待ち） / committed（登録済み） / duplicate（同じ冪等キーの購入が登録済み） / failed（登録できず退避）
+    transaction_id: Optional[int] = None
+
+
+
+# === 一括購入API用のスキーマ ===
+
+class PurchaseBatchRequest(BaseModel):
+    """一括購入リクエスト（オフライン中に端末へ溜まった購入をまとめて送信）"""
+    sales: List[PurchaseRequest]
+
+
+class PurchaseBatchResult(BaseModel):
+    """一括購入の1件ごとの結果"""
+    index: int  # リクエスト内の位置（0始まり）
+    success: bool
+    transaction_id: Optional[int] = None
+    total_amount: Optional[int] = None
+    total_amount_ex_tax: Optional[int] = None
+    items_count: Optional[int] = None
+    error: Optional[str] = None
+
+
+class PurchaseBatchResponse(BaseModel):
+    """一括購入レスポンス"""
+    succeeded: int
+    failed: int
+    results: List[PurchaseBatchResult]
+
+
+# === 日次売上レポート用のスキーマ ===
+
+class DailySales(BaseModel):
+    """日次売上集計（POS機ごと）"""
+    SALES_DATE: date
+    STORE_CD: str
+    POS_NO: str
+    SALES_CNT: int
+    TOTAL_AMT: int
+    TTL_AMT_EX_TAX: int
+
+    class Config:
+        from_attributes = True
+
+
+class DailySalesReport(BaseModel):
+    """日次締めレポート（店舗合計とPOS機ごとの内訳）"""
+    sales_date: date
+    store_cd: Optional[str] = None
+    sales_count: int
+    total_amount: int
+    total_amount_ex_tax: int
+    by_pos: List[DailySales]
+
+
+class DailyProductSales(BaseModel):
+    """日次商品別売上"""
+    PRD_ID: int
+    QTY: int
+    AMT: int
+
+
+class DailyProductSalesReport(BaseModel):
+    """日次商品別売上レポート"""
+    sales_date: date
+    store_cd: Optional[str] = None
+    pos_no: Optional[str] = None
+    products: List[DailyProductSales]
+
+
+class RollupRebuildResult(BaseModel):
+    """日次売上集計の再計算結果"""
+    date_from: date
+    date_to: date
+    transactions: int
+    details: int
+
+
+# ==================== カタログ配信 ====================
+
+class CatalogVersion(BaseModel):
+    """カタログの現在のバージョン"""
+    version: int
+
+
+class CatalogTombstone(BaseModel):
+    """削除された商品"""
+    PRD_ID: int
+    CODE: str
+
+    class Config:
+        from_attributes = True
+
 
+class CatalogDelta(BaseModel):
+    """バージョン since から version までの差分"""
+    since: int
+    version: int
+    products: List[Product]        # 追加・更新された商品
+    deleted: List[CatalogTombstone]  # 削除された商品
@@ -0,0 +1,496 @@
+"""
+商品名検索（インメモリのn-gram転置インデックス）
+バーコードのない商品を名称の一部（例: 「付箋」「ボールペン」）で探すため、
+正規化した商品名の1文字・2文字のn-gramから商品IDを引く転置インデックスと、
+商品コードの前方一致用のソート済みリストをワーカー内に持つ。LIKE '%...%' の全件走査は行わない
+
+- 正規化: NFKC（全角英数・半角カナの統一）、小文字化、ひらがな→カタカナ、空白除去
+- ポスティングは (n-gramの出現位置, 名称の長さ, PRD_ID) 順に並べておき、検索語の先頭のn-gramの
+  ポスティングを先頭から照合して、上位 limit 件が確定した時点で打ち切る（ヒット件数が多い語でも一定時間）
+- ヒットがまばらな語は、n-gramのポスティングの積集合で候補を絞ってから照合する
+- 構築後に追加・更新した商品は小さな差分インデックスに入れ、一定数たまったらバックグラウンドのスレッドで作り直す
+- 自ワーカーでの商品の追加・更新・削除は crud から即時反映し、他ワーカーでの変更は
+  カタログのバージョンを SEARCH_REFRESH_INTERVAL_SECONDS ごとに確認して差分を取り込む
+- 差分が多い場合（大量の取り込みなど）はバックグラウンドのスレッドでプライマリから作り直し、
+  完了するまでは古いインデックスで検索する（検索のリクエストで全件の構築を待たない）
+"""
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import SessionLocal
+from models import ProductMaster, ProductTombstone
+from app import schemas, sequences
+from app.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (ProductMaster.PRD_ID, ProductMaster.CODE, ProductMaster.NAME, ProductMaster.PRICE, ProductMaster.TAX_CD)
+
+# ひらがな（ぁ〜ゖ）をカタカナに変換する表
+_HIRAGANA_TO_KATAKANA = {code: code + 0x60 for code in range(0x3041, 0x3097)}
+
+# 先頭のn-gramのポスティングを照合する件数の上限（超えたら積集合で絞り込む方法に切り替える）
+_WALK_LIMIT = 4000
+
+
+def normalize(text: str) -> str:
+    """検索用に正規化（NFKC・小文字化・ひらがな→カタカナ・空白除去）"""
+    text = unicodedata.normalize("NFKC", text).lower().translate(_HIRAGANA_TO_KATAKANA)
+    return "".join(text.split())
+
+
+def first_positions(text: str) -> Dict[str, int]:
+    """正規化済みの文字列の1文字・2文字のn-gramと、その最初の出現位置"""
+    positions: Dict[str, int] = {}
+    for index in range(len(text) - 1, -1, -1):
+        positions[text[index]] = index
+        if index + 1 < len(text):
+            positions[text[index:index + 2]] = index
+    return positions
+
+
+def query_grams(term: str) -> List[str]:
+    """検索語を含む名称が必ず持つn-gram（1文字なら1文字、それ以外は2文字ずつ）"""
+    if len(term) == 1:
+        return [term]
+    return [term[index:index + 2] for index in range(len(term) - 1)]
+
+
+def _build_postings(names: Dict[int, str]) -> Dict[str, array]:
+    """(出現位置, 名称の長さ, PRD_ID) 順に並べたポスティングを作る"""
+    # 名称の長さ・PRD_ID順に (n-gram, 出現位置) ごとのリストへ振り分け、出現位置の順に連結する
+    buckets: Dict[Tuple[str, int], array] = {}
+    for product_id in sorted(names, key=lambda product_id: (len(names[product_id]), product_id)):
+        for key in first_positions(names[product_id]).items():
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = array("I")
+            bucket.append(product_id)
+    postings: Dict[str, array] = {}
+    for gram, position in sorted(buckets, key=lambda key: key[1]):
+        bucket = buckets.pop((gram, position))
+        posting = postings.get(gram)
+        if posting is None:
+            postings[gram] = bucket
+        else:
+            posting.extend(bucket)
+    return postings
+
+
+class ProductSearchIndex:
+    """商品名のn-gram転置インデックスと商品コードの前方一致検索"""
+
+    def __init__(
+        self,
+        refresh_interval: float = 5.0,
+        result_cache_size: int = 256,
+        clock=time.monotonic,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        # 作り直しはリクエストのセッション（レプリカの場合がある）ではなく、プライマリから読む
+        self.session_factory = session_factory
+        self._lock = threading.RLock()
+        # 商品は (CODE, NAME, PRICE, TAX_CD) のタプルで持つ（50万件でもPydanticモデルを常駐させない）
+        self._products: Dict[int, Tuple[str, str, int, str]] = {}
+        self._names: Dict[int, str] = {}
+        self._postings: Dict[str, array] = {}
+        self._codes: List[Tuple[str, int]] = []  # (正規化した商品コード, PRD_ID) のソート済みリスト
+        # 構築後に追加・更新した商品（_postings 側の同じPRD_IDは古いので無視する）
+        self._delta_postings: Dict[str, array] = {}
+        self._delta_ids: Set[int] = set()
+        self._stale = 0  # 構築後の追加・更新・削除の件数
+        # よく使われる検索語の結果（インデックスを変更するたびに破棄）
+        self._results = TTLCache(maxsize=result_cache_size, ttl=float("inf"), clock=clock)
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+        # 作り直し（DBからの構築・差分の畳み込み）を行うバックグラウンドのスレッド（同時に1つまで）
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    @property
+    def built(self) -> bool:
+        return self.version is not None
+
+    # ---------- 構築・更新 ----------
+
+    def build(self, db: Session) -> None:
+        """全商品からインデックスを作り直す"""
+        version = sequences.current_value(db, sequences.CATALOG_VERSION)
+        self.load(db.execute(select(*_COLUMNS)), version)
+
+    def load(self, products: Iterable, version: int) -> None:
+        """
+        商品の一覧（PRD_ID, CODE, NAME, PRICE, TAX_CD の属性を持つ行やモデル）からインデックスを作り直す
+        version はその時点のカタログのバージョン
+        """
+        products = {product.PRD_ID: (product.CODE, product.NAME, product.PRICE, product.TAX_CD) for product in products}
+        structures = self._build_structures(products)
+        with self._lock:
+            self._install(products, structures)
+            self.version = version
+            self._checked_at = self._clock()
+
+    @staticmethod
+    def _build_structures(products: Dict[int, Tuple[str, str, int, str]]) -> tuple:
+        # ロックの外で構築する（構築中も古いインデックスで検索できる）
+        names = {product_id: normalize(name) for product_id, (_, name, _, _) in products.items()}
+        codes = sorted((normalize(code), product_id) for product_id, (code, _, _, _) in products.items())
+        return names, _build_postings(names), codes
+
+    def _install(self, products: Dict[int, Tuple[str, str, int, str]], structures: tuple) -> None:
+        self._products = products
+        self._names, self._postings, self._codes = structures
+        self._delta_postings = {}
+        self._delta_ids = set()
+        self._stale = 0
+        self._results.clear()
+
+    def put(self, product) -> None:
+        """商品を追加・更新する（PRD_ID, CODE, NAME, PRICE の属性を持つもの）"""
+        with self._lock:
+            if not self.built:
+                return
+            self._put_locked(product.PRD_ID, (product.CODE, product.NAME, product.PRICE, product.TAX_CD))
+        self._compact_if_needed()
+
+    def remove(self, product_id: int) -> None:
+        """商品を削除する"""
+        with self._lock:
+            self._remove_locked(product_id)
+        self._compact_if_needed()
+
+    def _put_locked(self, product_id: int, row: Tuple[str, str, int, str]) -> None:
+        previous = self._products.get(product_id)
+        if previous == row:
+            return
+        if previous is not None:
+            self._remove_code(product_id, previous[0])
+        self._products[product_id] = row
+        name = normalize(row[1])
+        self._names[product_id] = name
+        for gram in first_positions(name):
+            posting = self._delta_postings.get(gram)
+            if posting is None:
+                posting = self._delta_postings[gram] = array("I")
+            posting.append(product_id)
+        self._delta_ids.add(product_id)
+        insort(self._codes, (normalize(row[0]), product_id))
+        self._stale += 1
+        self._results.clear()
+
+    def _remove_locked(self, product_id: int) -> None:
+        # ポスティングには残るが、_names にないPRD_IDは検索時に除外される
+        row = self._products.pop(product_id, None)
+        if row is None:
+            return
+        self._names.pop(product_id, None)
+        self._remove_code(product_id, row[0])
+        self._stale += 1
+        self._results.clear()
+
+    def _remove_code(self, product_id: int, code: str) -> None:
+        key = (normalize(code), product_id)
+        index = bisect_left(self._codes, key)
+        if index < len(self._codes) and self._codes[index] == key:
+            del self._codes[index]
+
+    def _compaction_threshold(self) -> int:
+        return max(1000, len(self._products) // 20)
+
+    def _compact_if_needed(self) -> None:
+        """差分がたまったら、バックグラウンドのスレッドで作り直す（呼び出し元は作り直しを待たない）"""
+        with self._lock:
+            if self._stale <= self._compaction_threshold():
+                return
+        self._start_background(self._compact, "search-index-compact")
+
+    def _compact(self) -> None:
+        """現在の商品から作り直す（構築中の変更は作り直した後に入れ直す）"""
+        with self._lock:
+            snapshot = dict(self._products)
+        structures = self._build_structures(snapshot)
+        with self._lock:
+            current = self._products
+            self._install(dict(snapshot), structures)
+            for product_id in snapshot.keys() - current.keys():
+                self._remove_locked(product_id)
+            for product_id, row in current.items():
+                if snapshot.get(product_id) != row:
+                    self._put_locked(product_id, row)
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """
+        未構築なら構築し、構築済みならカタログのバージョンを確認して他ワーカーでの変更を取り込む
+        （確認は refresh_interval 秒に1回まで）
+        起動時の構築（build_search_index）が終わる前の検索は、プライマリからの構築の完了を待つ
+        """
+        if not self.built:
+            with self._lock:
+                if not self.built:
+                    self._build_from_primary()
+            return
+        if not force and self._clock() - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = self._clock()
+        version = sequences.current_value(db, sequences.CATALOG_VERSION)
+        since = self.version
+        if version == since:
+            return
+        changed = db.execute(
+            select(*_COLUMNS).where(ProductMaster.VERSION > since, ProductMaster.VERSION <= version)
+        ).all()
+        deleted = db.execute(
+            select(ProductTombstone.PRD_ID)
+            .where(ProductTombstone.VERSION > since, ProductTombstone.VERSION <= version)
+        ).scalars().all()
+        if len(changed) + len(deleted) > self._compaction_threshold():
+            # 大量の取り込みなどは差分を当てるより作り直した方が速い（完了までは古いインデックスで検索する）
+            self.rebuild_in_background()
+            return
+        changed_ids = {product.PRD_ID for product in changed}
+        with self._lock:
+            # 削除後に同じPRD_IDで作り直された商品（SQLiteなど）は product_master 側を優先する
+            for product_id in deleted:
+                if product_id not in changed_ids:
+                    self._remove_locked(product_id)
+            for product in changed:
+                self._put_locked(product.PRD_ID, (product.CODE, product.NAME, product.PRICE, product.TAX_CD))
+            self.version = max(self.version, version)
+        self._compact_if_needed()
+
+    def _build_from_primary(self) -> None:
+        db = self.session_factory()
+        try:
+            self.build(db)
+        finally:
+            db.close()
+
+    def rebuild_in_background(self) -> Optional[threading.Thread]:
+        """
+        バックグラウンドのスレッドで全商品から作り直す（作り直し中なら何もしない）
+        作り直し中に確定した変更は、作り直した後に差分として取り込む
+        """
+        return self._start_background(self._rebuild, "search-index-rebuild")
+
+    def _rebuild(self) -> None:
+        self._build_from_primary()
+        db = self.session_factory()
+        try:
+            self.refresh(db, force=True)
+        finally:
+            db.close()
+
+    def _start_background(self, target: Callable[[], None], name: str) -> Optional[threading.Thread]:
+        """作り直しをバックグラウンドのスレッドで開始する（作り直し中なら何もせず None）"""
+        with self._lock:
+            if self._rebuild_thread is not None:
+                return None
+            thread = self._rebuild_thread = threading.Thread(
+                target=self._run_background, args=(target,), name=name, daemon=True
+            )
+        thread.start()
+        return thread
+
+    def _run_background(self, target: Callable[[], None]) -> None:
+        try:
+            target()
+        except Exception:
+            logger.exception("Failed to rebuild the product search index; keeping the current index")
+        finally:
+            with self._lock:
+                self._rebuild_thread = None
+
+    def wait_rebuild(self, timeout: Optional[float] = None) -> None:
+        """実行中の作り直しの完了を待つ"""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ---------- 検索 ----------
+
+    def search(self, query: str, limit: int = 20) -> List[schemas.Product]:
+        """
+        商品名の部分一致（空白区切りはAND）と商品コードの前方一致で検索し、順位の高い順に limit 件返す
+        順位: コード完全一致 → 名称の前方一致（完全一致を含む） → コード前方一致 → 名称の部分一致
+        （同順位は一致位置が前・名称が短い・PRD_IDが小さい順）
+        """
+        terms = [normalize(term) for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+        with self._lock:
+            cache_key = (tuple(terms), limit)
+            product_ids = self._results.get(cache_key)
+            if product_ids is None:
+                product_ids = self._rank(terms, limit)
+                self._results.set(cache_key, product_ids)
+            return [
+                schemas.Product(PRD_ID=product_id, CODE=code, NAME=name, PRICE=price, TAX_CD=tax_cd)
+                for product_id in product_ids
+                for code, name, price, tax_cd in (self._products[product_id],)
+            ]
+
+    def _rank(self, terms: List[str], limit: int) -> List[int]:
+        # 順位のキーは (一致位置, 名称の長さ, PRD_ID)。コード完全一致は -1、コード前方一致は
+        # 名称の前方一致（位置0）と位置1の間に入るよう 0.5 とする
+        keys = self._match_main(terms, limit) + self._match_delta(terms)
+        if len(terms) == 1:
+            for product_id, code in self._match_code_prefix(terms[0], limit):
+                keys.append((-1 if code == terms[0] else 0.5, len(code), product_id))
+        product_ids: List[int] = []
+        for _, _, product_id in heapq.nsmallest(limit * 2, keys):
+            if product_id not in product_ids:
+                product_ids.append(product_id)
+                if len(product_ids) == limit:
+                    break
+        return product_ids
+
+    def _key(self, product_id: int, terms: List[str]) -> Optional[tuple]:
+        """すべての語を名称に含めば順位のキー、含まなければ None"""
+        name = self._names.get(product_id)
+        if name is None:
+            return None
+        position = name.find(terms[0])
+        if position < 0:
+            return None
+        for term in terms[1:]:
+            if term not in name:
+                return None
+        return (position, len(name), product_id)
+
+    def _match_main(self, terms: List[str], limit: int) -> List[tuple]:
+        """構築時のインデックスから上位 limit 件の順位キー"""
+        # 語ごとにもっとも件数の少ないn-gramのポスティング（同じ語のn-gramはほぼ同じ商品を指すため）
+        postings = []
+        for term in terms:
+            term_postings = [self._postings.get(gram) for gram in query_grams(term)]
+            if any(posting is None for posting in term_postings):
+                return []
+            postings.append(min(term_postings, key=len))
+        first_gram = query_grams(terms[0])[0]
+        first_posting = self._postings[first_gram]
+
+        # ヒットが多い語は、先頭のn-gramのポスティングを少し照合するだけで上位が確定する
+        best = self._walk(first_posting, first_gram, terms, limit, max_walk=_WALK_LIMIT)
+        if best is not None:
+            return best
+
+        # ヒットがまばらな語は、ポスティングの積集合で候補を絞ってから照合する
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if len(posting) > 4 * len(candidates):
+                break
+            candidates.intersection_update(posting)
+        candidates -= self._delta_ids
+        if len(candidates) > _WALK_LIMIT:
+            return self._walk(first_posting, first_gram, terms, limit, allowed=candidates)
+        keys = [key for key in (self._key(product_id, terms) for product_id in candidates) if key is not None]
+        return heapq.nsmallest(limit, keys)
+
+    def _walk(
+        self,
+        posting: array,
+        first_gram: str,
+        terms: List[str],
+        limit: int,
+        allowed: Optional[Set[int]] = None,
+        max_walk: Optional[int] = None,
+    ) -> Optional[List[tuple]]:
+        """
+        先頭のn-gramのポスティングを順位の下限の順に照合し、上位 limit 件より下限が悪くなった時点で打ち切る
+        max_walk 件を照合しても確定しなければ None
+        """
+        delta_ids = self._delta_ids
+        names = self._names
+        best: List[tuple] = []
+        walked = 0
+        for product_id in posting:
+            if allowed is not None and product_id not in allowed:
+                continue
+            if max_walk is not None:
+                walked += 1
+                if walked > max_walk:
+                    return None
+            if product_id in delta_ids:
+                continue
+            name = names.get(product_id)
+            if name is None:
+                continue
+            if len(best) == limit and (name.find(first_gram), len(name), product_id) > best[-1]:
+                break
+            key = self._key(product_id, terms)
+            if key is not None:
+                insort(best, key)
+                del best[limit:]
+        return best
+
+    def _match_delta(self, terms: List[str]) -> List[tuple]:
+        """構築後に追加・更新した商品の順位キー"""
+        if not self._delta_ids:
+            return []
+        candidates: Optional[Set[int]] = None
+        for term in terms:
+            for gram in query_grams(term):
+                posting = self._delta_postings.get(gram)
+                if posting is None:
+                    return []
+                candidates = set(posting) if candidates is None else candidates.intersection(posting)
+        return [key for key in (self._key(product_id, terms) for product_id in candidates) if key is not None]
+
+    def _match_code_prefix(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """商品コードが prefix で始まる商品（コード順に limit 件まで）"""
+        matched = []
+        index = bisect_left(self._codes, (prefix, -1))
+        while index < len(self._codes) and len(matched) < limit:
+            code, product_id = self._codes[index]
+            if not code.startswith(prefix):
+                break
+            matched.append((product_id, code))
+            index += 1
+        return matched
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "products": len(self._products),
+                "grams": len(self._postings),
+                "postings": sum(len(posting) for posting in self._postings.values()),
+                "delta_products": len(self._delta_ids),
+                "stale": self._stale,
+                "version": self.version,
+                "rebuilding": self._rebuild_thread is not None,
+                "result_cache": self._results.stats(),
+            }
+
+
+def build_search_index(session_factory) -> None:
+    """起動時にインデックスを構築する（失敗した場合は最初の検索で構築し直す）"""
+    db = session_factory()
+    try:
+        product_search.refresh(db)
+    except Exception:
+        logger.exception("Failed to build the product search index at startup")
+    finally:
+        db.close()
+
+
+# アプリケーション全体で共有する商品名検索インデックス（ワーカープロセス単位）
+product_search = ProductSearchIndex(refresh_interval=settings.SEARCH_REFRESH_INTERVAL_SECONDS)
@@ -0,0 +1,65 @@
+"""
+採番カウンタ（sequences テーブル）
+名前ごとに単調増加する値を払い出す。カタログのバージョン、取引IDのブロック予約などに使用する
+"""
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from models import SequenceCounter
+
+# カタログ（商品マスタ）の変更カウンタ
+CATALOG_VERSION = "catalog_version"
+# これより前（YYYYMMDD の日付の 0時 UTC より前）の取引はアーカイブへ移動済み（app.archive）
+TRANSACTION_ARCHIVE_BEFORE = "transaction_archive_before"
+# 読み取りレプリカの遅延計測用のハートビート（プライマリに書き込んだ時刻、エポックミリ秒。app.replica）
+REPLICA_HEARTBEAT = "replica_heartbeat"
+# 取引ID（TRD_ID）の払い出し済みの上限（app.id_allocator がブロック単位で予約する）
+TRANSACTION_ID = "transaction_id"
+
+_sequences = SequenceCounter.__table__
+
+
+def next_value(db: Session, name: str, increment: int = 1, floor: int = 0) -> int:
+    """
+    カウンタを increment だけ進めて新しい値を返す（コミットは呼び出し側で行う）
+    floor を指定すると、カウンタが floor 未満なら floor から進める（既存データの最大値の後から払い出す場合など）
+    UPDATE で取った行ロックはコミットまで保持されるため、同じカウンタを進めるトランザクションは
+    払い出した値の順にコミットされる
+    """
+    value = _sequences.c.VALUE
+    if floor:
+        value = case((value < floor, floor), else_=value)
+    statement = update(_sequences).where(_sequences.c.NAME == name).values(VALUE=value + increment)
+    result = db.execute(statement)
+    if result.rowcount == 0:
+        # 初回はカウンタの行を作成する（同時に作成された場合は UPDATE をやり直す）
+        try:
+            with db.begin_nested():
+                db.execute(insert(_sequences).values(NAME=name, VALUE=floor + increment))
+        except IntegrityError:
+            db.execute(statement)
+    return db.execute(select(_sequences.c.VALUE).where(_sequences.c.NAME == name)).scalar_one()
+
+
+def current_value(db: Session, name: str) -> int:
+    """カウンタの現在値（未作成なら 0）"""
+    value = db.execute(select(_sequences.c.VALUE).where(_sequences.c.NAME == name)).scalar_one_or_none()
+    return value or 0
+
+
+def set_value(db: Session, name: str, value: int) -> None:
+    """カウンタを value にする（コミットは呼び出し側で行う）"""
+    result = db.execute(update(_sequences).where(_sequences.c.NAME == name).values(VALUE=value))
+    if result.rowcount == 0:
+        try:
+            with db.begin_nested():
+                db.execute(insert(_sequences).values(NAME=name, VALUE=value))
+        except IntegrityError:
+            db.execute(update(_sequences).where(_sequences.c.NAME == name).values(VALUE=value))
@@ -0,0 +1,131 @@
+"""
+消費税の計算
+商品の単価は税込。適格請求書（インボイス）の要件に合わせ、1会計の明細を税率（TAX_CD）ごとに合計してから
+税率ごとに1回だけ端数処理する（明細ごとに税額を丸めて足し合わせない）
+
+    税額 = 端数処理(税率ごとの税込合計 × 税率 / (100 + 税率))
+    税抜合計 = 税込合計 - 税額の合計
+
+計算はすべて整数で行い、浮動小数点の誤差が入らない。税率は tax_rates テーブルから読み込み、ワーカー内にキャッシュする
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from models import TaxRate
+
+logger = logging.getLogger(__name__)
+
+# 標準税率（10%）の消費税区分（商品マスタの既定値）
+STANDARD_TAX_CD = "10"
+
+# 税額の端数処理（切り捨て / 切り上げ / 四捨五入）
+ROUNDING_MODES = ("floor", "ceil", "half_up")
+
+
+class UnknownTaxCodeError(LookupError):
+    """税率マスタにない消費税区分の商品が含まれている"""
+
+    def __init__(self, tax_cd: str):
+        self.tax_cd = tax_cd
+        super().__init__(f"Unknown tax code: {tax_cd}")
+
+
+class TaxBreakdown(NamedTuple):
+    """1会計の税計算の結果"""
+    total: int  # 税込合計
+    ex_tax: int  # 税抜合計
+    by_rate: Dict[str, Tuple[int, int]]  # 消費税区分ごとの (税込合計, 税額)
+
+
+def included_tax(gross: int, rate: int, rounding: str = "floor") -> int:
+    """税込金額 gross に含まれる税率 rate% の税額（整数演算で端数処理）"""
+    numerator = gross * rate
+    denominator = 100 + rate
+    if rounding == "floor":
+        return numerator // denominator
+    if rounding == "ceil":
+        return -(-numerator // denominator)
+    if rounding == "half_up":
+        return (2 * numerator + denominator) // (2 * denominator)
+    raise ValueError(f"Unsupported rounding mode: {rounding}")
+
+
+def compute_tax(lines: Iterable[Tuple[str, int]], rates: Dict[str, int], rounding: str = "floor") -> TaxBreakdown:
+    """
+    明細（消費税区分, 税込単価）の並びから税込合計・税抜合計を計算する
+    明細を1回なめて税率ごとに合計し、税額の端数処理は税率ごとに1回だけ行う
+    """
+    gross_by_code: Dict[str, int] = defaultdict(int)
+    for tax_cd, price in lines:
+        gross_by_code[tax_cd] += price
+    by_rate = {}
+    total = tax = 0
+    for tax_cd, gross in gross_by_code.items():
+        rate = rates.get(tax_cd)
+        if rate is None:
+            raise UnknownTaxCodeError(tax_cd)
+        rate_tax = included_tax(gross, rate, rounding)
+        by_rate[tax_cd] = (gross, rate_tax)
+        total += gross
+        tax += rate_tax
+    return TaxBreakdown(total=total, ex_tax=total - tax, by_rate=by_rate)
+
+
+class TaxRateTable:
+    """
+    税率マスタのキャッシュ
+    ttl 秒ごとに読み直す（他ワーカーでの変更もこの間隔で反映される）。読み直しに失敗した場合は、
+    DBの一時的な停止で会計が止まらないよう前回の税率を使い続け、retry_interval 秒後まで読み直さない
+    （停止中に購入ごとにロックを取って失敗するクエリを繰り返さない）
+    """
+
+    def __init__(self, ttl: float = 300, clock: Callable[[], float] = time.monotonic, retry_interval: float = 5):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rates: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+
+    def get(self, db: Session) -> Dict[str, int]:
+        """消費税区分 → 税率（%）"""
+        rates = self._rates
+        if rates is not None and self._clock() - self._loaded_at < self.ttl:
+            return rates
+        with self._lock:
+            if self._rates is not None and self._clock() - self._loaded_at < self.ttl:
+                return self._rates
+            try:
+                rates = {row.TAX_CD: row.RATE for row in db.execute(select(TaxRate.TAX_CD, TaxRate.RATE))}
+            except SQLAlchemyError:
+                if self._rates is None:
+                    raise
+                logger.warning("Failed to reload tax rates; using cached rates", exc_info=True)
+                self._loaded_at = self._clock() - self.ttl + min(self.retry_interval, self.ttl)
+                return self._rates
+            self._rates = rates
+            self._loaded_at = self._clock()
+            return rates
+
+    def invalidate(self) -> None:
+        """次回の get で読み直す（税率マスタを変更したとき）"""
+        with self._lock:
+            self._loaded_at = float("-inf")
+
+
+# アプリケーション全体で共有する税率マスタのキャッシュ
+tax_rate_table = TaxRateTable(ttl=settings.TAX_RATE_CACHE_TTL_SECONDS)
@@ -0,0 +1,87 @@
+"""
+方言ごとのUPSERT（複数行INSERT + 重複時UPDATE）
+MySQL は INSERT ... ON DUPLICATE KEY UPDATE、SQLite は INSERT ... ON CONFLICT DO UPDATE を使う
+"""
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Table, bindparam
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert(
+    db: Session,
+    table: Table,
+    rows: List[dict],
+    key_columns: Sequence[str],
+    increment_columns: Iterable[str] = (),
+    replace_columns: Iterable[str] = (),
+    chunk_size: int = 1000
+) -> None:
+    """
+    rows を chunk_size 行ずつの複数行INSERTで登録し、キーが重複した行は更新する（rows はすべて同じ列を持つこと）
+
+    - increment_columns: 既存値に加算する列（集計値の積み上げ用）
+    - replace_columns: 新しい値で上書きする列
+    """
+    increment_columns = tuple(increment_columns)
+    replace_columns = tuple(replace_columns)
+    connection = db.connection()
+    dialect = connection.dialect
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        columns = tuple(chunk[0])
+        sql, positions, processors = _compiled_upsert(
+            dialect, table, columns, len(chunk), tuple(key_columns), increment_columns, replace_columns
+        )
+        params = {
+            f"p{index}_{column}": row[column]
+            for index, row in enumerate(chunk)
+            for column in columns
+        }
+        for name, processor in processors.items():
+            params[name] = processor(params[name])
+        connection.exec_driver_sql(sql, tuple(params[name] for name in positions) if positions else params)
+
+
+@lru_cache(maxsize=32)
+def _compiled_upsert(dialect, table: Table, columns: Tuple[str, ...], row_count: int, key_columns, increment_columns, replace_columns):
+    """
+    行数・列ごとにUPSERT文をコンパイルして再利用する
+    複数行VALUESの文は SQLAlchemy のコンパイルキャッシュに載らず、数千行では実行よりコンパイルの方が重いため、
+    SQL文字列・バインド変数の順序・型ごとの変換関数をここで保持する
+    """
+    stmt = _upsert_statement(dialect.name, table, columns, row_count, key_columns, increment_columns, replace_columns)
+    compiled = stmt.compile(dialect=dialect, column_keys=list(columns))
+    positions = tuple(compiled.positiontup) if compiled.positional else None
+    # 各バインド変数の型は列の型なので、列の型の変換関数（公開API）をそのまま使う
+    processors = {}
+    for column in columns:
+        processor = table.c[column].type.dialect_impl(dialect).bind_processor(dialect)
+        if processor is not None:
+            processors.update({f"p{index}_{column}": processor for index in range(row_count)})
+    return str(compiled), positions, processors
+
+
+def _upsert_statement(dialect: str, table: Table, columns, row_count: int, key_columns, increment_columns, replace_columns):
+    values = [
+        {column: bindparam(f"p{index}_{column}", type_=table.c[column].type) for column in columns}
+        for index in range(row_count)
+    ]
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(values)
+        new = stmt.inserted
+        set_ = {column: table.c[column] + new[column] for column in increment_columns}
+        set_.update({column: new[column] for column in replace_columns})
+        stmt = stmt.on_duplicate_key_update(set_)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).values(values)
+        new = stmt.excluded
+        set_ = {column: table.c[column] + new[column] for column in increment_columns}
+        set_.update({column: new[column] for column in replace_columns})
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=set_)
+    else:
+        raise NotImplementedError(f"UPSERTに対応していないデータベースです: {dialect}")
+    return stmt
@@ -0,0 +1,49 @@
+"""
+取引のアーカイブスクリプト
+直近 --keep-months か月より前の取引・明細を transactions_archive / transaction_details_archive へ移動し、
+アーカイブテーブルの月ごとのパーティション（MySQL）を翌月分まで作成します（月初の夜間バッチ用）
+
+使用例:
+    python archive_transactions.py
+    python archive_transactions.py --keep-months 6 --chunk-size 2000
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from config import settings
+from database import SessionLocal
+from app import archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取引のアーカイブ")
+    parser.add_argument("--keep-months", type=int, default=settings.TRANSACTION_HOT_MONTHS,
+                        help=f"取引テーブルに残す月数（デフォルト: {settings.TRANSACTION_HOT_MONTHS}）")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="1トランザクションで移動する取引数")
+    args = parser.parse_args()
+    if args.keep_months < 1:
+        parser.error("--keep-months は1以上を指定してください")
+
+    this_month = archive.month_start(datetime.now(timezone.utc).date())
+    before = archive.add_months(this_month, -args.keep_months)
+
+    db = SessionLocal()
+    try:
+        # 移動先と、これから登録される翌月分までのパーティションを用意しておく
+        added = archive.ensure_partitions(db, archive.add_months(this_month, 1))
+        if added:
+            print(f"📁 パーティションを追加しました: {', '.join(added)}")
+        counts = archive.archive_transactions(db, before, chunk_size=args.chunk_size)
+        print(f"✅ {before} より前の取引をアーカイブしました（取引 {counts['transactions']}件 / 明細 {counts['details']}件）")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ エラーが発生しました: {e}")
+        # 夜間バッチのスケジューラが失敗を検知できるよう、終了コードで返す
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
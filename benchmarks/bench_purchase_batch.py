@@ -0,0 +1,79 @@
+"""
+一括購入APIのスループットベンチマーク
+
+同じ件数の購入を
+- POST /api/purchase を1件ずつ呼ぶ方式
+- POST /api/purchase/batch にまとめて送る方式
+で登録し、1秒あたりの登録件数（sales/sec）を比較する。
+
+使用例:
+    python -m benchmarks.bench_purchase_batch
+    python -m benchmarks.bench_purchase_batch --sales 5000 --basket-size 5 --batch-size 1000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import setup_database, session_factory, print_json
+
+from starlette.testclient import TestClient
+
+from database import get_db
+from main import app
+
+
+def make_sales(count: int, basket_size: int, catalog_size: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        {"items": [{"PRD_ID": rng.randint(1, catalog_size)} for _ in range(basket_size)]}
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一括購入APIのスループットベンチマーク")
+    parser.add_argument("--url", help="対象DBのURL（省略時は一時SQLite）。テーブルを作り直すためベンチマーク専用DBを指定すること")
+    parser.add_argument("--sales", type=int, default=2000, help="登録する購入件数")
+    parser.add_argument("--basket-size", type=int, default=5, help="1購入あたりの明細数")
+    parser.add_argument("--batch-size", type=int, default=500, help="一括購入1リクエストあたりの件数")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = setup_database(args.url, catalog_size=args.catalog_size)
+    Session = session_factory(engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    sales = make_sales(args.sales, args.basket_size, args.catalog_size)
+
+    start = time.perf_counter()
+    for sale in sales:
+        response = client.post("/api/purchase", json=sale)
+        assert response.status_code == 201, response.text
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, len(sales), args.batch_size):
+        response = client.post("/api/purchase/batch", json={"sales": sales[offset:offset + args.batch_size]})
+        assert response.status_code == 200 and response.json()["failed"] == 0, response.text
+    batch_seconds = time.perf_counter() - start
+
+    print_json({
+        "sales": args.sales,
+        "basket_size": args.basket_size,
+        "batch_size": args.batch_size,
+        "single": {"seconds": round(single_seconds, 3), "sales_per_sec": round(args.sales / single_seconds, 1)},
+        "batch": {"seconds": round(batch_seconds, 3), "sales_per_sec": round(args.sales / batch_seconds, 1)},
+        "speedup": round(single_seconds / batch_seconds, 2),
+    })
+
+
+if __name__ == "__main__":
+    main()
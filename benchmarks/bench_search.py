@@ -0,0 +1,104 @@
+"""
+商品名検索ベンチマーク
+
+ブランド・品目・色・規格を組み合わせた商品名で catalog_size 件の商品マスタを作り、
+n-gramインデックス（app.search.ProductSearchIndex、結果キャッシュなし）での検索時間を検索語ごとに計測する。
+比較として、同じ商品マスタに対する LIKE '%...%' の検索時間（全件走査）も出力する。
+
+使用例:
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --catalog-size 500000 --repeat 50
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import setup_database, session_factory, measure, summarize, print_json
+
+from app import schemas
+from app.search import ProductSearchIndex
+from models import ProductMaster
+
+BRANDS = [
+    "ミドリ", "サクラ", "コクヨ", "パイロット", "ぺんてる", "トンボ", "ゼブラ", "ニチバン", "プラス", "カウネット",
+    "キングジム", "セキセイ", "ライオン", "ショウワノート", "マックス", "カール", "シヤチハタ", "ヤマト", "アスクル", "無印良品",
+]
+ITEMS = [
+    "ボールペン", "シャープペン", "消しゴム", "付箋", "ノート", "クリップ", "マーカー", "のり", "ハサミ", "定規",
+    "ホッチキス", "替芯", "修正テープ", "ファイル", "封筒", "メモ帳", "朱肉", "電卓", "カッター", "テープ",
+    "万年筆", "筆ペン", "蛍光ペン", "色鉛筆", "鉛筆削り", "クリアファイル", "バインダー", "ルーズリーフ", "レポート用紙", "便箋",
+    "画用紙", "スケッチブック", "絵の具", "水彩筆", "マスキングテープ", "両面テープ", "ガムテープ", "輪ゴム", "画鋲", "ダブルクリップ",
+    "ペンケース", "下敷き", "コンパス", "分度器", "三角定規", "スタンプ台", "印鑑ケース", "名札", "ラベルシール", "インデックス",
+    "乾電池", "ティッシュ", "ウェットティッシュ", "ハンドソープ", "紙コップ", "割り箸", "ゴミ袋", "ポリ袋", "レジ袋", "キッチンペーパー",
+]
+VARIANTS = [
+    "黒", "赤", "青", "緑", "0.3mm", "0.5mm", "0.7mm", "A4", "B5", "A5", "徳用", "詰替", "10本入", "5冊パック",
+    "ミニ", "太字", "細字", "ピンク", "オレンジ", "白", "大", "中", "小", "ロング", "業務用", "限定", "30枚", "100枚", "特大", "ハード",
+]
+
+QUERIES = ["ボールペン", "ぼーるぺん", "消しゴム ミニ", "付箋", "替芯 0.5", "ﾎｯﾁｷｽ", "4900000012", "存在しない商品"]
+
+
+def make_catalog(size: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            "CODE": f"49{index:011d}",
+            "NAME": f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(VARIANTS)} {rng.choice(VARIANTS)}",
+            "PRICE": 100 + index % 900,
+        }
+        for index in range(1, size + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品名検索ベンチマーク")
+    parser.add_argument("--url", help="LIKE検索の比較に使うDBのURL（省略時は一時SQLite）")
+    parser.add_argument("--catalog-size", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--like-repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.catalog_size)
+    # 検索結果のキャッシュは無効にして、毎回インデックスを引く時間を計測する
+    index = ProductSearchIndex(result_cache_size=0)
+    start = time.perf_counter()
+    index.load((schemas.Product(PRD_ID=i, **row) for i, row in enumerate(catalog, start=1)), version=0)
+    build_seconds = time.perf_counter() - start
+
+    engine = setup_database(args.url, catalog_size=0)
+    with engine.begin() as conn:
+        for offset in range(0, len(catalog), 5000):
+            conn.execute(insert(ProductMaster.__table__), catalog[offset:offset + 5000])
+    db = session_factory(engine)()
+
+    results = []
+    try:
+        for query in QUERIES:
+            hits = len(index.search(query, limit=args.limit))
+            indexed = summarize(measure(lambda: index.search(query, limit=args.limit), args.repeat))
+            pattern = f"%{query.split()[0]}%"
+            like = summarize(measure(
+                lambda: db.execute(
+                    select(ProductMaster.PRD_ID).where(ProductMaster.NAME.like(pattern)).limit(args.limit)
+                ).all(),
+                args.like_repeat,
+            ))
+            results.append({"query": query, "hits": hits, "index": indexed, "like_scan": like})
+    finally:
+        db.close()
+        engine.dispose()
+
+    print_json({
+        "catalog_size": args.catalog_size,
+        "build_seconds": round(build_seconds, 2),
+        "index": index.stats(),
+        "results": results,
+    })
+
+
+if __name__ == "__main__":
+    main()
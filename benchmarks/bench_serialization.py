@@ -0,0 +1,90 @@
+"""
+商品一覧レスポンスの直列化・圧縮ベンチマーク
+
+従来方式（ORMオブジェクト → 行ごとの schemas.Product → jsonable_encoder → 標準json）と
+現行方式（列だけを辞書で取得 → orjson）の所要時間を、商品件数ごとに比較する。
+あわせて gzip / brotli で圧縮した場合のバイト数と圧縮時間を出力する。
+
+使用例:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10000 100000 --repeat 5
+"""
+import argparse
+import gzip
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from benchmarks.common import setup_database, session_factory, measure, summarize, print_json
+
+from app import crud, schemas
+from models import ProductMaster
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def render_legacy(db) -> bytes:
+    """従来方式: ORMオブジェクトを schemas.Product に変換して標準のJSONエンコーダで直列化"""
+    products = db.query(ProductMaster).order_by(ProductMaster.PRD_ID).all()
+    content = jsonable_encoder([schemas.Product.model_validate(product) for product in products])
+    return JSONResponse(content).body
+
+
+def render_fast(db, size: int) -> bytes:
+    """現行方式: 列を辞書で取得して orjson で直列化"""
+    return ORJSONResponse(crud.get_product_rows(db, limit=size)).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品一覧の直列化・圧縮ベンチマーク")
+    parser.add_argument("--url", help="ベンチマーク用DBのURL（省略時は一時SQLite）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="商品件数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        engine = setup_database(args.url, catalog_size=size)
+        SessionLocal = session_factory(engine)
+        db = SessionLocal()
+        try:
+            legacy_body = render_legacy(db)
+            fast_body = render_fast(db, size)
+            assert len(fast_body) <= len(legacy_body)
+
+            def run_legacy():
+                db.expunge_all()
+                render_legacy(db)
+
+            def run_fast():
+                render_fast(db, size)
+
+            legacy = summarize(measure(run_legacy, args.repeat))
+            fast = summarize(measure(run_fast, args.repeat))
+        finally:
+            db.close()
+            engine.dispose()
+
+        compression = {"identity": {"bytes": len(fast_body)}}
+        gzip_times = measure(lambda: gzip.compress(fast_body, compresslevel=6), args.repeat)
+        compression["gzip"] = {"bytes": len(gzip.compress(fast_body, compresslevel=6)), **summarize(gzip_times)}
+        if brotli is not None:
+            br_times = measure(lambda: brotli.compress(fast_body, quality=4), args.repeat)
+            compression["br"] = {"bytes": len(brotli.compress(fast_body, quality=4)), **summarize(br_times)}
+
+        results.append({
+            "products": size,
+            "legacy_pydantic_json": legacy,
+            "rows_orjson": fast,
+            "speedup": round(legacy["mean_ms"] / fast["mean_ms"], 2) if fast["mean_ms"] else None,
+            "compression": compression,
+        })
+
+    print_json({"repeat": args.repeat, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+消費税計算ベンチマーク
+
+明細1行ごとに浮動小数点で税額を計算して丸める方式と、app.tax.compute_tax
+（税率ごとに整数で合計してから1回だけ端数処理）を比較する。
+大きなバスケット（1会計の明細数）と、一括購入の件数（1回の insert_purchases で計算する購入数）ごとに計測する。
+per_line_float の ex_tax は明細ごとの丸めのため、税率ごとの端数処理とは一致しないことがある（diff_yen）。
+
+使用例:
+    python -m benchmarks.bench_tax
+    python -m benchmarks.bench_tax --basket-sizes 10 1000 100000 --batch-sales 100 5000 --repeat 20
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, summarize, print_json
+
+from app.tax import compute_tax
+
+RATES = {"10": 10, "08": 8}
+
+
+def compute_tax_per_line(lines, rates):
+    """比較用: 明細ごとに浮動小数点で税額を計算して四捨五入する方式"""
+    total = ex_tax = 0
+    for tax_cd, price in lines:
+        total += price
+        ex_tax += price - round(price * rates[tax_cd] / (100 + rates[tax_cd]))
+    return total, ex_tax
+
+
+def make_basket(size: int, rng: random.Random):
+    # 食品（軽減税率）と日用品（標準税率）が混在するバスケット
+    return [(rng.choice(("10", "08")), rng.randint(50, 3000)) for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="消費税計算ベンチマーク")
+    parser.add_argument("--basket-sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--batch-sales", type=int, nargs="+", default=[200, 2000, 5000])
+    parser.add_argument("--batch-basket-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    baskets = []
+    for size in args.basket_sizes:
+        lines = make_basket(size, rng)
+        engine = compute_tax(lines, RATES)
+        _, float_ex_tax = compute_tax_per_line(lines, RATES)
+        baskets.append({
+            "basket_size": size,
+            "per_line_float": summarize(measure(lambda: compute_tax_per_line(lines, RATES), args.repeat)),
+            "per_rate_integer": summarize(measure(lambda: compute_tax(lines, RATES), args.repeat)),
+            "diff_yen": float_ex_tax - engine.ex_tax,
+        })
+
+    batches = []
+    for sales in args.batch_sales:
+        purchases = [make_basket(args.batch_basket_size, rng) for _ in range(sales)]
+        batches.append({
+            "sales": sales,
+            "basket_size": args.batch_basket_size,
+            "per_line_float": summarize(measure(
+                lambda: [compute_tax_per_line(lines, RATES) for lines in purchases], max(1, args.repeat // 5)
+            )),
+            "per_rate_integer": summarize(measure(
+                lambda: [compute_tax(lines, RATES) for lines in purchases], max(1, args.repeat // 5)
+            )),
+        })
+
+    print_json({"baskets": baskets, "batches": batches})
+
+
+if __name__ == "__main__":
+    main()
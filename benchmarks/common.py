@@ -0,0 +1,92 @@
+"""
+ベンチマーク共通ユーティリティ
+ローカルのSQLite（または --url で指定したDB）にテーブルと税率マスタ・商品データを用意する
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# プロジェクトルートをパスに追加し、設定読み込み用のDATABASE_URLを用意
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, _connect_args
+from models import ProductMaster, TaxRate
+from seed_data import tax_rates
+
+
+def temp_sqlite_url(name: str = "pos_bench.db") -> str:
+    """一時ディレクトリにSQLiteファイルを作成するURL"""
+    return f"sqlite:///{Path(tempfile.mkdtemp()) / name}"
+
+
+def make_products(count: int) -> List[dict]:
+    """ベンチマーク用の商品データを生成"""
+    return [
+        {"CODE": f"49{index:011d}", "NAME": f"ベンチマーク商品 {index}", "PRICE": 100 + index % 900}
+        for index in range(1, count + 1)
+    ]
+
+
+def setup_database(url: Optional[str] = None, catalog_size: int = 1000) -> Engine:
+    """
+    テーブルを作り直し、税率マスタ（seed_data.py と同じ内容）と商品マスタを投入したエンジンを返す
+    既存データは削除されるため、url にはベンチマーク専用のDBを指定すること
+    """
+    url = url or temp_sqlite_url()
+    engine = create_engine(url, connect_args=_connect_args(url))
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    products = make_products(catalog_size)
+    with engine.begin() as conn:
+        conn.execute(insert(TaxRate.__table__), tax_rates)
+        for start in range(0, len(products), 5000):
+            conn.execute(insert(ProductMaster.__table__), products[start:start + 5000])
+    return engine
+
+
+def session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def measure(func: Callable[[], None], repeat: int) -> List[float]:
+    """func を repeat 回実行し、1回ごとの所要時間（ミリ秒）を返す"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近傍法によるパーセンタイル"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """所要時間（ミリ秒）の要約統計"""
+    return {
+        "count": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 3) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
+
+
+def print_json(data) -> None:
+    print(json.dumps(data, ensure_ascii=False, indent=2))
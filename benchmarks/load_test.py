@@ -0,0 +1,197 @@
+"""
+POS API 負荷試験
+
+ローカルのSQLite（指定した件数の商品マスタを投入）に接続したAPIサーバーを起動し、
+バーコードスキャン・商品一覧・購入（バスケットサイズ可変）を混ぜた負荷を
+同時実行数ごとにかけて、エンドポイント別のスループットと p50/p95/p99 レイテンシをJSONで出力する。
+--seed を固定すれば同じ操作列になるため、実行結果どうしを比較できる。
+
+使用例:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --catalog-size 50000 --concurrency 1 8 32 --duration 20 --output result.json
+    python -m benchmarks.load_test --mix scan=80 list=5 purchase=15 --basket-sizes 1 5 20 50
+    python -m benchmarks.load_test --target http://localhost:8000  # 起動済みのサーバーに対して実行
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import setup_database, summarize, print_json, temp_sqlite_url
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# 操作名 → 集計するエンドポイント（ルートのテンプレート）
+ENDPOINTS = {
+    "scan": "GET /api/products/code/{code}",
+    "list": "GET /api/products/",
+    "purchase": "POST /api/purchase",
+}
+
+
+def parse_mix(values: List[str]) -> Dict[str, int]:
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown operation: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def start_server(database_url: str, port: int) -> subprocess.Popen:
+    """テスト用DBに接続したAPIサーバーを起動し、応答するまで待つ"""
+    env = dict(os.environ, DATABASE_URL=database_url, DEBUG="False")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("APIサーバーが起動しませんでした")
+
+
+def load_catalog(base_url: str, limit: int) -> List[dict]:
+    """商品一覧APIをカーソルでたどり、スキャン・購入に使う商品を集める"""
+    products, cursor = [], None
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        while len(products) < limit:
+            params = {"limit": min(1000, limit - len(products))}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/products/", params=params)
+            response.raise_for_status()
+            products.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    if not products:
+        raise RuntimeError("商品マスタが空です")
+    return products
+
+
+async def run_level(base_url: str, concurrency: int, duration: float, mix: Dict[str, int],
+                    basket_sizes: List[int], catalog: List[dict], seed: int) -> dict:
+    """同時実行数 concurrency で duration 秒間負荷をかけ、エンドポイント別に集計する"""
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    names, weights = zip(*mix.items())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 100003 + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                if name == "scan":
+                    request = client.get(f"/api/products/code/{rng.choice(catalog)['CODE']}")
+                elif name == "list":
+                    request = client.get("/api/products/", params={"limit": 100})
+                else:
+                    items = [{"PRD_ID": rng.choice(catalog)["PRD_ID"]} for _ in range(rng.choice(basket_sizes))]
+                    request = client.post("/api/purchase", json={"items": items})
+                start = time.perf_counter()
+                try:
+                    response = await request
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = (time.perf_counter() - start) * 1000
+                endpoint = ENDPOINTS[name]
+                timings[endpoint].append(elapsed)
+                if not ok:
+                    errors[endpoint] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {
+        endpoint: {**summarize(values), "errors": errors[endpoint], "throughput_rps": round(len(values) / elapsed, 1)}
+        for endpoint, values in sorted(timings.items())
+    }
+    total = sum(len(values) for values in timings.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "errors": sum(errors.values()),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="POS API 負荷試験")
+    parser.add_argument("--target", help="起動済みAPIサーバーのURL（省略時はローカルSQLiteでサーバーを起動）")
+    parser.add_argument("--db-url", help="サーバー起動時に使うDBのURL（省略時は一時SQLite）。テーブルを作り直すためベンチマーク専用DBを指定すること")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--catalog-size", type=int, default=10000, help="投入する商品マスタの件数")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="同時実行数（複数指定で段階的に実行）")
+    parser.add_argument("--duration", type=float, default=10, help="同時実行数ごとの実行秒数")
+    parser.add_argument("--warmup", type=float, default=2, help="計測前のウォームアップ秒数")
+    parser.add_argument("--mix", nargs="+", default=["scan=70", "list=10", "purchase=20"], help="操作の比率（scan / list / purchase）")
+    parser.add_argument("--basket-sizes", type=int, nargs="+", default=[1, 5, 20], help="購入1回あたりの明細数の候補")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果JSONの出力先（省略時は標準出力）")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    server = None
+    base_url = args.target
+    if base_url is None:
+        db_url = args.db_url or temp_sqlite_url("pos_load_test.db")
+        setup_database(db_url, catalog_size=args.catalog_size).dispose()
+        server = start_server(db_url, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        catalog = load_catalog(base_url, args.catalog_size)
+        if args.warmup > 0:
+            asyncio.run(run_level(base_url, 1, args.warmup, mix, args.basket_sizes, catalog, args.seed))
+        results = [
+            asyncio.run(run_level(base_url, concurrency, args.duration, mix, args.basket_sizes, catalog, args.seed))
+            for concurrency in args.concurrency
+        ]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "config": {
+            "target": args.target or "local-sqlite",
+            "catalog_size": len(catalog),
+            "duration_seconds": args.duration,
+            "mix": mix,
+            "basket_sizes": args.basket_sizes,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        print_json(report)
+
+
+if __name__ == "__main__":
+    main()
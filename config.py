@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,34 @@ class Settings(BaseSettings):
     
     # データベース
     DATABASE_URL: str
+
+    # コネクションプール
+    # DB_POOL_LIVENESS: pre_ping（貸し出しごとにSELECT 1） / background（一定間隔で待機中の接続を確認） / none
+    # DB_POOL_WARMUP: 起動時に確立しておく接続数（0: 無効）
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_LIVENESS: Literal["pre_ping", "background", "none"] = "pre_ping"
+    DB_POOL_VALIDATE_INTERVAL_SECONDS: float = 30
+    DB_POOL_WARMUP: int = 0
+
+    # ヘルスチェック（確認間隔と、未完了とみなすプール使用率）
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    HEALTH_POOL_SATURATION_THRESHOLD: float = 0.9
+
+    # 非同期モード（AsyncSessionで商品・購入APIを処理）
+    # ASYNC_DATABASE_URL 未指定時は DATABASE_URL から変換（pymysql→aiomysql, sqlite→aiosqlite）
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # 非同期モードのレプリカの接続URL（未指定時は DATABASE_READ_URL から変換）
+    ASYNC_DATABASE_READ_URL: Optional[str] = None
+
+    # 読み取りレプリカ（商品の参照・レポートの読み取り先。未指定ならプライマリから読む）
+    # レプリカの遅延が READ_REPLICA_MAX_LAG_SECONDS を超えた場合や接続できない場合はプライマリから読む
+    DATABASE_READ_URL: Optional[str] = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 30
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 5
     
     # アプリケーション
     APP_NAME: str = "POS API"
@@ -14,6 +42,61 @@ class Settings(BaseSettings):
     
     # CORS設定
     FRONTEND_URL: Optional[str] = None
+
+    # 商品キャッシュ（0でキャッシュ無効）
+    PRODUCT_CACHE_SIZE: int = 10000
+    PRODUCT_CACHE_TTL_SECONDS: float = 300
+
+    # 商品の一括検索（POST /api/products/lookup）で受け付けるコード・IDの最大件数
+    PRODUCT_LOOKUP_MAX_ITEMS: int = 500
+
+    # 商品マスタの一括取り込み（1回のUPSERT・コミットで処理する行数）
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 2000
+
+    # 商品名検索（他ワーカーでの商品変更を取り込む間隔と、1回に返す最大件数）
+    SEARCH_REFRESH_INTERVAL_SECONDS: float = 5
+    SEARCH_MAX_RESULTS: int = 100
+
+    # 一括購入API（1リクエストの上限件数と、1トランザクションで登録する件数）
+    PURCHASE_BATCH_MAX_SALES: int = 5000
+    PURCHASE_BATCH_CHUNK_SIZE: int = 200
+
+    # 消費税（税率マスタを読み直す間隔と、税率ごとの税額の端数処理: floor=切り捨て / ceil=切り上げ / half_up=四捨五入）
+    TAX_RATE_CACHE_TTL_SECONDS: float = 300
+    TAX_ROUNDING: Literal["floor", "ceil", "half_up"] = "floor"
+
+    # 取引ID（TRD_ID）をワーカーごとに予約しておく件数（sequences テーブルから1回の予約で確保する数）
+    TRD_ID_BLOCK_SIZE: int = 100
+
+    # 購入ジャーナル（有効時は購入をローカルファイルに fsync して応答し、DBへはバックグラウンドでまとめて登録する）
+    PURCHASE_JOURNAL_ENABLED: bool = False
+    PURCHASE_JOURNAL_DIR: str = "journal"
+    PURCHASE_JOURNAL_FLUSH_INTERVAL_SECONDS: float = 0.5
+    PURCHASE_JOURNAL_BATCH_SIZE: int = 500
+    PURCHASE_JOURNAL_SEGMENT_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # 購入APIの冪等キー（インメモリ保持件数と有効期限）
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 86400
+    # 有効期限切れの冪等キーを削除する間隔（各ワーカーのバックグラウンドで実行）
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 600
+
+    # 日次売上集計（購入登録時に集計テーブルへ加算）
+    # 営業日はUTCの取引日時にこの時差を足した日付（日本時間: 9）
+    SALES_ROLLUP_ENABLED: bool = True
+    ROLLUP_UTC_OFFSET_HOURS: int = 9
+
+    # 取引のアーカイブ（直近この月数分だけを transactions / transaction_details に残す。archive_transactions.py）
+    TRANSACTION_HOT_MONTHS: int = 3
+
+    # レスポンス圧縮（Accept-Encoding に応じて br / gzip、このバイト数未満は圧縮しない）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # メトリクス（/metrics でPrometheusテキスト形式を出力）
+    METRICS_ENABLED: bool = True
+    # このミリ秒数以上かかったSQLを正規化してログに出力
+    SLOW_QUERY_THRESHOLD_MS: float = 200
     
     class Config:
         env_file = ".env"
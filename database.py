@@ -1,22 +1,180 @@
-from sqlalchemy import create_engine
+import logging
+import ssl
+import threading
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from app.metrics import registry as metrics_registry
+from app.query_stats import instrument_engine
 
-# データベースエンジンの作成
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,  # 接続の健全性チェック
-    pool_recycle=3600,   # 1時間ごとに接続をリサイクル
-    connect_args={
+logger = logging.getLogger(__name__)
+
+
+def instrument_checkout_wait(engine: Engine) -> None:
+    """
+    コネクションプールからの接続の取得待ち時間を db_pool_checkout_wait_seconds に記録する（公開のイベントのみ使用）
+    engine.connect() の開始から pool の checkout イベントまでの時間から、その間に新しい接続の確立に
+    かかった時間（do_connect 〜 connect イベント）を除いたものを待ち時間とする（pre_ping の往復は含む）。
+    取得できずにタイムアウトした場合も、そこまでの待ち時間を記録する
+    """
+    local = threading.local()
+    connect = engine.connect
+
+    def observe() -> None:
+        wait = time.perf_counter() - local.started - local.connecting
+        local.started = None
+        metrics_registry.observe("db_pool_checkout_wait_seconds", (), max(wait, 0.0))
+
+    def timed_connect():
+        local.started = time.perf_counter()
+        local.connecting = 0.0
+        try:
+            return connect()
+        finally:
+            if local.started is not None:
+                # checkout まで進まなかった（タイムアウト・接続エラー）
+                observe()
+
+    @event.listens_for(engine, "do_connect")
+    def before_new_connection(dialect, connection_record, cargs, cparams):
+        local.connect_started = time.perf_counter()
+
+    @event.listens_for(engine.pool, "connect")
+    def after_new_connection(dbapi_connection, connection_record):
+        started = getattr(local, "connect_started", None)
+        if started is not None and getattr(local, "started", None) is not None:
+            local.connecting += time.perf_counter() - started
+        local.connect_started = None
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if getattr(local, "started", None) is not None:
+            observe()
+
+    # Session・AsyncEngine も engine.connect() で接続を取得する
+    engine.connect = timed_connect
+
+
+def _connect_args(url: str) -> dict:
+    """ドライバごとの接続引数（MySQLのみSSLを有効化）"""
+    if not url.startswith("mysql"):
+        return {}
+    return {
         "ssl": {"ca": None}  # Azure MySQLはSSL必須（証明書検証なし）
     }
-)
+
+
+def create_db_engine(url: str, liveness: Optional[str] = None, **overrides) -> Engine:
+    """
+    設定（DB_POOL_*）に従ってエンジンを作成
+
+    liveness（接続の死活確認の方式）:
+        pre_ping   - 貸し出しのたびに SELECT 1 を実行（確実だが1往復増える）
+        background - PoolValidator が一定間隔で待機中の接続を確認（貸し出し時の往復なし）
+        none       - 確認しない（pool_recycle による作り直しのみ）
+    """
+    liveness = liveness or settings.DB_POOL_LIVENESS
+    options = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    options.update(overrides)
+    engine = create_engine(
+        url,
+        echo=settings.DEBUG,
+        pool_pre_ping=liveness == "pre_ping",
+        connect_args=_connect_args(url),
+        **options,
+    )
+    instrument_checkout_wait(engine)
+    return engine
+
+
+def warm_up_pool(engine: Engine, connections: int) -> int:
+    """
+    接続を connections 本まで同時に確立してプールに戻す（起動直後の接続確立待ちを避ける）
+    確立できた本数を返す
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    except Exception as e:
+        logger.warning("Pool warm-up stopped after %d connections: %s", len(opened), e)
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+class PoolValidator:
+    """
+    待機中の接続をバックグラウンドで定期的に確認するスレッド
+    QueuePool は先入れ先出しのため、待機中の本数だけ順に貸し出せばすべての接続を1回ずつ確認できる。
+    切断を検出した場合は SQLAlchemy がプールを無効化し、古い接続は次の貸し出し時に作り直される
+    """
+
+    def __init__(self, engine: Engine, interval: float):
+        self.engine = engine
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def validate_once(self) -> int:
+        """待機中の接続を確認し、失敗した本数を返す"""
+        failures = 0
+        for _ in range(self.engine.pool.checkedin()):
+            try:
+                with self.engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT 1")
+            except Exception as e:
+                failures += 1
+                logger.warning("Pool validation failed: %s", e)
+        return failures
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.validate_once()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pool-validator", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# データベースエンジンの作成
+engine = create_db_engine(settings.DATABASE_URL)
+
+# SQLの実行回数・所要時間の計測と遅いSQLのログ出力
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
 
 # セッションファクトリーの作成
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 読み取りレプリカ（DATABASE_READ_URL 指定時のみ。振り分けは app.replica.get_read_db）
+read_engine = None
+ReadSessionLocal = None
+
+if settings.DATABASE_READ_URL:
+    read_engine = create_db_engine(settings.DATABASE_READ_URL)
+    if settings.METRICS_ENABLED:
+        instrument_engine(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, info={"read_replica": True})
+
 # モデルのベースクラス
 Base = declarative_base()
 
@@ -24,7 +182,7 @@ Base = declarative_base()
 def get_db():
     """
     データベースセッションを取得する依存性注入関数
-    
+
     使用例:
         @app.get("/items/")
         def read_items(db: Session = Depends(get_db)):
@@ -36,3 +194,83 @@ def get_db():
     finally:
         db.close()
 
+
+# ==================== 非同期モード ====================
+
+# 同期ドライバから非同期ドライバへの対応表
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """同期用の接続URLを非同期ドライバのURLに変換"""
+    backend = make_url(url).get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"非同期モードに対応していないデータベースです: {backend}")
+    return make_url(url).set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """非同期エンジンを作成"""
+    connect_args = {}
+    if url.startswith("mysql"):
+        # aiomysqlはSSLContextを受け取る（同期側と同じく証明書検証なし）
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = ssl_context
+    # バックグラウンド確認は同期エンジンのみ対応のため、非同期エンジンでは pre_ping で代替する
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_LIVENESS != "none",
+        connect_args=connect_args,
+    )
+
+
+# 非同期エンジン（DB_ASYNC=True のときのみ作成）
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    async_engine = create_async_db_engine(
+        settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# 非同期モードの読み取りレプリカ（DB_ASYNC=True かつ DATABASE_READ_URL 指定時のみ。振り分けは app.replica.get_async_read_db）
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if settings.DB_ASYNC and settings.DATABASE_READ_URL:
+    async_read_engine = create_async_db_engine(
+        settings.ASYNC_DATABASE_READ_URL or to_async_url(settings.DATABASE_READ_URL)
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(async_read_engine.sync_engine)
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False, info={"read_replica": True}
+    )
+
+
+async def get_async_db():
+    """
+    非同期データベースセッションを取得する依存性注入関数
+
+    使用例:
+        @app.get("/items/")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            ...
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("非同期モードが無効です（DB_ASYNC=True を設定してください）")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,45 @@
+"""
+取引エクスポートスクリプト
+取引ヘッダと取引明細を結合した行を NDJSON / CSV で出力します（夜間の会計連携用）
+
+使用例:
+    python export_transactions.py --from 2025-10-01 --to 2025-10-31 --format csv --output 202510.csv
+    python export_transactions.py --from 2025-10-01 --store 30 > 202510_store30.ndjson
+"""
+import argparse
+import sys
+from datetime import date
+
+from database import SessionLocal
+from app.export import stream_export, ENCODERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取引エクスポート（NDJSON/CSV）")
+    parser.add_argument("--format", choices=sorted(ENCODERS), default="ndjson", help="出力形式（デフォルト: ndjson）")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="開始日（UTC、YYYY-MM-DD、当日を含む）")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="終了日（UTC、YYYY-MM-DD、当日を含む）")
+    parser.add_argument("--store", dest="store_cd", help="店舗コード")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="1回に読み出す行数")
+    parser.add_argument("--output", help="出力ファイル（省略時は標準出力）")
+    args = parser.parse_args()
+
+    chunks = stream_export(
+        SessionLocal,
+        args.format,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        store_cd=args.store_cd,
+        chunk_size=args.chunk_size,
+    )
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+商品マスタ一括取り込みスクリプト
+本部の価格ファイル（CSV / NDJSON、列: CODE, NAME, PRICE）を商品コードをキーにUPSERTします
+
+使用例:
+    python import_products.py products.csv
+    python import_products.py weekly_prices.ndjson --chunk-size 5000
+    gunzip -c products.csv.gz | python import_products.py - --format csv
+"""
+import argparse
+import json
+import sys
+import time
+
+from database import SessionLocal
+from app.catalog_import import detect_format, import_products, IMPORT_FORMATS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="商品マスタ一括取り込み（CSV/NDJSON）")
+    parser.add_argument("path", help="商品ファイル（- で標準入力）")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="ファイル形式（省略時は拡張子から判定）")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="1回のUPSERT・コミットで処理する行数")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("ファイル形式を判定できません。--format を指定してください")
+
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        result = import_products(db, stream, fmt, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    elapsed = time.perf_counter() - started
+
+    processed = result["inserted"] + result["updated"] + result["unchanged"] + result["rejected"] + result["duplicates"]
+    result["seconds"] = round(elapsed, 3)
+    result["rows_per_second"] = round(processed / elapsed) if elapsed > 0 else None
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
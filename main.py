@@ -2,19 +2,67 @@
 FastAPI POSシステム - メインアプリケーション
 すべての機能を統合した単一エントリーポイント
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from sqlalchemy.orm import Session
 from config import settings
-from database import get_db
-from routers import products
-from app import crud, schemas
+from database import engine, SessionLocal, warm_up_pool, PoolValidator
+from app.compression import CompressionMiddleware
+from app.health import create_health_prober
+from app.idempotency import IdempotencyPurger, idempotency_store
+from app.journal import purchase_journal
+from app.metrics import MetricsMiddleware, pool_collector, registry as metrics_registry
+from app.query_stats import QueryStatsMiddleware
+from app import replica
+from app.search import build_search_index
+from routers import products, purchase, purchase_batch, transactions, reports, catalog, product_import, products_async, purchase_async
+
+# DBとコネクションプールの状態を定期的に確認するヘルスチェック
+health_prober = create_health_prober(engine)
+
+# 有効期限切れの冪等キーの定期削除
+idempotency_purger = IdempotencyPurger(idempotency_store, SessionLocal, settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    起動時にコネクションプールを温め、商品名検索のインデックスを構築し、
+    ヘルスチェックのプローブ（必要ならバックグラウンドの接続確認も）を開始する
+    購入ジャーナルが有効なら、停止前の未登録分の再生とバックグラウンドのDB登録も開始する
+    読み取りレプリカが設定されていれば、遅延の監視も開始する。有効期限切れの冪等キーの定期削除も開始する
+    """
+    if settings.DB_POOL_WARMUP > 0:
+        warm_up_pool(engine, settings.DB_POOL_WARMUP)
+    validator = None
+    if settings.DB_POOL_LIVENESS == "background":
+        validator = PoolValidator(engine, settings.DB_POOL_VALIDATE_INTERVAL_SECONDS)
+        validator.start()
+    # 商品名検索のインデックスはリクエストを受け付ける前に構築する（最初の検索で全件の構築を待たない）
+    build_search_index(SessionLocal)
+    if settings.PURCHASE_JOURNAL_ENABLED:
+        purchase_journal.start()
+    health_prober.start()
+    idempotency_purger.start()
+    if replica.replica_monitor is not None:
+        replica.replica_monitor.start()
+    yield
+    if replica.replica_monitor is not None:
+        replica.replica_monitor.stop()
+    idempotency_purger.stop()
+    health_prober.stop()
+    if settings.PURCHASE_JOURNAL_ENABLED:
+        purchase_journal.stop()
+    if validator is not None:
+        validator.stop()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="POSシステムのバックエンドAPI - 商品管理、取引管理",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS設定（フロントエンドからのアクセスを許可）
@@ -34,8 +82,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ルーターを登録
-app.include_router(products.router)
+# レスポンス圧縮（商品一覧・エクスポートなど大きいレスポンス向け）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# メトリクス（ルート別のリクエスト数・レイテンシ、コネクションプールの状態、リクエストごとのSQL実行数）
+if settings.METRICS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    metrics_registry.add_collector(pool_collector(engine))
+
+# ルーターを登録（DB_ASYNC=True の場合は AsyncSession 版を使用）
+if settings.DB_ASYNC:
+    app.include_router(products_async.router)
+    app.include_router(purchase_async.router)
+else:
+    app.include_router(products.router)
+    app.include_router(purchase.router)
+app.include_router(purchase_batch.router)
+app.include_router(product_import.router)
+app.include_router(transactions.router)
+app.include_router(reports.router)
+app.include_router(catalog.router)
 
 
 @app.get("/", tags=["Root"])
@@ -50,72 +118,88 @@ def read_root():
         "docs": "/docs",
         "endpoints": {
             "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "metrics": "/metrics",
             "products": "/api/products/",
             "product_by_id": "/api/products/{product_id}",
-            "product_by_code": "/api/products/code/{code}"
+            "product_by_code": "/api/products/code/{code}",
+            "product_search": "/api/products/search?q={query}",
+            "catalog_snapshot": "/api/catalog/snapshot",
+            "catalog_delta": "/api/catalog/delta?since={version}",
+            "purchase_journal_status": "/api/purchase/journal/{journal_id}",
+            "transactions": "/api/transactions/",
+            "daily_report": "/api/reports/daily"
         }
     }
 
 
 @app.get("/health", tags=["System"])
-def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
     ヘルスチェックエンドポイント
-    アプリケーションとデータベースの状態を確認
+    バックグラウンドで確認したDB・コネクションプールの状態を返す（age_seconds: 確認からの経過秒数）
+    読み取りレプリカが設定されていれば、その遅延と振り分け先（read_replica）も返す
+    DBに接続できなければ status は unhealthy（503）、プールが埋まっていて確認を見送った場合は degraded
     """
-    try:
-        # データベース接続テスト
-        db.execute(text("SELECT 1"))
-        db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-    
-    return {
-        "status": "healthy",
-        "database": db_status,
-        "version": "1.0.0"
+    health = health_prober.status()
+    monitor = replica.replica_monitor
+    if health["database"].startswith("error"):
+        status = "unhealthy"
+    elif health["database"] != "connected":
+        status = "degraded"
+    else:
+        status = "healthy"
+    body = {
+        "status": status,
+        "database": health["database"],
+        "version": "1.0.0",
+        "ready": health["ready"],
+        "database_latency_ms": health["database_latency_ms"],
+        "pool": health["pool"],
+        "checked_at": health["checked_at"],
+        "age_seconds": health["age_seconds"],
+        "read_replica": monitor.status() if monitor is not None else None,
     }
+    return JSONResponse(status_code=503 if status == "unhealthy" else 200, content=body)
+
+
+@app.get("/health/live", tags=["System"])
+async def liveness_check():
+    """
+    ライブネスチェック
+    プロセスが応答できれば常に200（DBの状態は見ない）
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["System"])
+async def readiness_check():
+    """
+    レディネスチェック
+    DBに接続でき、コネクションプールに余裕があれば200、そうでなければ503
+    """
+    health = health_prober.status()
+    return JSONResponse(
+        status_code=200 if health["ready"] else 503,
+        content={
+            "status": "ready" if health["ready"] else "not_ready",
+            "database": health["database"],
+            "pool": health["pool"],
+            "age_seconds": health["age_seconds"],
+        },
+    )
 
 
-@app.post("/api/purchase", response_model=schemas.PurchaseResponse, status_code=status.HTTP_201_CREATED, tags=["Purchase"])
-def purchase_items(purchase_request: schemas.PurchaseRequest, db: Session = Depends(get_db)):
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+def metrics():
     """
-    購入処理API
-    
-    購入リストを受け取り、取引と取引明細をデータベースに保存します。
-    
-    - **items**: 購入する商品のリスト
-    - **emp_cd**: レジ担当者コード（オプション、デフォルト: 999999999）
-    - **store_cd**: 店舗コード（オプション、デフォルト: 30）
-    - **pos_no**: POS機ID（オプション、デフォルト: 90）
-    
-    処理の流れ:
-    1. 取引テーブルへ登録
-    2. 取引明細テーブルへ登録
-    3. 合計金額を計算
-    4. 取引テーブルを更新
-    
-    トランザクション管理により、エラー時は自動的にロールバックされます。
+    メトリクスエンドポイント
+    Prometheusテキスト形式で出力（値はワーカープロセス単位）
     """
-    if not purchase_request.items:
-        raise HTTPException(status_code=400, detail="Purchase list cannot be empty")
-
-    try:
-        # トランザクション開始
-        transaction = crud.create_purchase(db, purchase_request)
-        db.commit()  # すべての処理が成功したらコミット
-        db.refresh(transaction)  # DBから最新の状態を読み込む
-    except Exception as e:
-        db.rollback()  # エラーが発生したらロールバック
-        print(f"Error during purchase: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process purchase: {str(e)}")
-
-    return schemas.PurchaseResponse(
-        success=True,
-        transaction_id=transaction.TRD_ID,
-        total_amount=transaction.TOTAL_AMT,
-        total_amount_ex_tax=transaction.TTL_AMT_EX_TAX,
-        items_count=len(purchase_request.items)
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
     )
 
 
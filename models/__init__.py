@@ -2,6 +2,13 @@ from database import Base
 from .product_master import ProductMaster
 from .transaction import Transaction
 from .transaction_detail import TransactionDetail
+from .idempotency_key import IdempotencyKey
+from .daily_sales import DailySales, DailyProductSales
+from .sequence import SequenceCounter
+from .product_tombstone import ProductTombstone
+from .tax_rate import TaxRate
+from .transaction_archive import TransactionArchive, TransactionDetailArchive
 
-__all__ = ['Base', 'ProductMaster', 'Transaction', 'TransactionDetail']
+__all__ = ['Base', 'ProductMaster', 'Transaction', 'TransactionDetail', 'IdempotencyKey', 'DailySales', 'DailyProductSales',
+           'SequenceCounter', 'ProductTombstone', 'TaxRate', 'TransactionArchive', 'TransactionDetailArchive']
 
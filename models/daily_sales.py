@@ -0,0 +1,87 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date
+from database import Base
+
+
+class DailySales(Base):
+    """日次売上集計（店舗・POS機・営業日ごと）"""
+    __tablename__ = 'daily_sales'
+    __table_args__ = {'comment': '日次売上集計'}
+
+    SALES_DATE = Column(
+        Date,
+        primary_key=True,
+        comment='営業日'
+    )
+    STORE_CD = Column(
+        String(5),
+        primary_key=True,
+        comment='店舗コード'
+    )
+    POS_NO = Column(
+        String(3),
+        primary_key=True,
+        comment='POS機ID'
+    )
+    SALES_CNT = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment='取引件数'
+    )
+    TOTAL_AMT = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='合計金額'
+    )
+    TTL_AMT_EX_TAX = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='合計金額（税抜）'
+    )
+
+    def __repr__(self):
+        return f"<DailySales(SALES_DATE={self.SALES_DATE}, STORE_CD={self.STORE_CD}, POS_NO={self.POS_NO}, TOTAL_AMT={self.TOTAL_AMT})>"
+
+
+class DailyProductSales(Base):
+    """日次商品別売上集計（店舗・POS機・営業日・商品ごと）"""
+    __tablename__ = 'daily_product_sales'
+    __table_args__ = {'comment': '日次商品別売上集計'}
+
+    SALES_DATE = Column(
+        Date,
+        primary_key=True,
+        comment='営業日'
+    )
+    STORE_CD = Column(
+        String(5),
+        primary_key=True,
+        comment='店舗コード'
+    )
+    POS_NO = Column(
+        String(3),
+        primary_key=True,
+        comment='POS機ID'
+    )
+    PRD_ID = Column(
+        Integer,
+        primary_key=True,
+        comment='商品一意キー'
+    )
+    QTY = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment='販売数量'
+    )
+    AMT = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='販売金額'
+    )
+
+    def __repr__(self):
+        return f"<DailyProductSales(SALES_DATE={self.SALES_DATE}, STORE_CD={self.STORE_CD}, PRD_ID={self.PRD_ID}, QTY={self.QTY})>"
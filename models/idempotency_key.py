@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from database import Base
+
+
+class IdempotencyKey(Base):
+    """購入APIの冪等キー"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = {'comment': '購入APIの冪等キー'}
+
+    ID = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment='冪等キー一意キー'
+    )
+    IDEMPOTENCY_KEY = Column(
+        String(64),
+        nullable=False,
+        unique=True,
+        index=True,
+        comment='Idempotency-Keyヘッダの値'
+    )
+    REQUEST_HASH = Column(
+        String(64),
+        nullable=False,
+        comment='リクエスト本文のハッシュ'
+    )
+    TRD_ID = Column(
+        Integer,
+        ForeignKey('transactions.TRD_ID', ondelete='NO ACTION', onupdate='NO ACTION'),
+        nullable=True,
+        comment='取引一意キー'
+    )
+    RESPONSE = Column(
+        Text,
+        nullable=False,
+        comment='初回レスポンス（JSON）'
+    )
+    CREATED_AT = Column(
+        DateTime,
+        nullable=False,
+        index=True,
+        comment='登録日時'
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(IDEMPOTENCY_KEY={self.IDEMPOTENCY_KEY}, TRD_ID={self.TRD_ID})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, BigInteger
 from database import Base
 
 
@@ -30,6 +30,20 @@ class ProductMaster(Base):
         nullable=False,
         comment='商品単価'
     )
+    TAX_CD = Column(
+        String(2),
+        nullable=False,
+        server_default='10',
+        comment='消費税区分（tax_rates.TAX_CD）'
+    )
+    VERSION = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default='0',
+        index=True,
+        comment='最終更新時のカタログバージョン'
+    )
 
     def __repr__(self):
         return f"<ProductMaster(PRD_ID={self.PRD_ID}, CODE={self.CODE}, NAME={self.NAME}, PRICE={self.PRICE})>"
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from database import Base
+
+
+class ProductTombstone(Base):
+    """削除された商品の記録（端末への差分配信用）"""
+    __tablename__ = 'product_tombstones'
+    __table_args__ = {'comment': '削除済み商品'}
+
+    PRD_ID = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='商品一意キー'
+    )
+    CODE = Column(
+        String(25),
+        nullable=False,
+        comment='商品コード(バーコード)'
+    )
+    VERSION = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        comment='削除時のカタログバージョン'
+    )
+    DELETED_AT = Column(
+        DateTime,
+        nullable=False,
+        comment='削除日時'
+    )
+
+    def __repr__(self):
+        return f"<ProductTombstone(PRD_ID={self.PRD_ID}, CODE={self.CODE}, VERSION={self.VERSION})>"
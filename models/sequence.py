@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, BigInteger
+from database import Base
+
+
+class SequenceCounter(Base):
+    """採番カウンタ（カタログのバージョンなど、名前ごとに単調増加する値）"""
+    __tablename__ = 'sequences'
+    __table_args__ = {'comment': '採番カウンタ'}
+
+    NAME = Column(
+        String(50),
+        primary_key=True,
+        comment='カウンタ名'
+    )
+    VALUE = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='現在値'
+    )
+
+    def __repr__(self):
+        return f"<SequenceCounter(NAME={self.NAME}, VALUE={self.VALUE})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+
+class TaxRate(Base):
+    """消費税率マスタ（商品マスタ・取引明細の TAX_CD に対応する税率）"""
+    __tablename__ = 'tax_rates'
+    __table_args__ = {'comment': '消費税率マスタ'}
+
+    TAX_CD = Column(
+        String(2),
+        primary_key=True,
+        comment='消費税区分'
+    )
+    NAME = Column(
+        String(20),
+        nullable=False,
+        comment='税率の名称'
+    )
+    RATE = Column(
+        Integer,
+        nullable=False,
+        comment='税率（%）'
+    )
+
+    def __repr__(self):
+        return f"<TaxRate(TAX_CD={self.TAX_CD}, NAME={self.NAME}, RATE={self.RATE})>"
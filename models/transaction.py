@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
@@ -6,7 +7,13 @@ from database import Base
 class Transaction(Base):
     """取引ヘッダ"""
     __tablename__ = 'transactions'
-    __table_args__ = {'comment': '取引ヘッダ'}
+    __table_args__ = (
+        # キーセットページネーション用（新しい順に (DATETIME, TRD_ID) でたどる）
+        Index('ix_transactions_DATETIME_TRD_ID', 'DATETIME', 'TRD_ID'),
+        Index('ix_transactions_STORE_CD_POS_NO_DATETIME', 'STORE_CD', 'POS_NO', 'DATETIME', 'TRD_ID'),
+        Index('ix_transactions_EMP_CD_DATETIME', 'EMP_CD', 'DATETIME', 'TRD_ID'),
+        {'comment': '取引ヘッダ'},
+    )
 
     TRD_ID = Column(
         Integer,
@@ -46,6 +53,13 @@ class Transaction(Base):
         comment='合計金額（税抜）'
     )
 
+    # 取引明細（明細ID順）。一覧で明細を参照する場合は selectinload などで一括読み込みする（N+1を避ける）
+    details = relationship(
+        "TransactionDetail",
+        back_populates="transaction",
+        order_by="TransactionDetail.DTL_ID",
+    )
+
     def __repr__(self):
         return f"<Transaction(TRD_ID={self.TRD_ID}, DATETIME={self.DATETIME}, TOTAL_AMT={self.TOTAL_AMT})>"
 
@@ -0,0 +1,120 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.orm import relationship
+from database import Base
+
+
+class TransactionArchive(Base):
+    """
+    取引ヘッダのアーカイブ（締めた月の取引を transactions から移す）
+    MySQLでは DATETIME の月ごとに RANGE パーティション分割する（パーティションキーを含めるため主キーは (TRD_ID, DATETIME)）
+    """
+    __tablename__ = 'transactions_archive'
+    __table_args__ = (
+        Index('ix_transactions_archive_DATETIME_TRD_ID', 'DATETIME', 'TRD_ID'),
+        Index('ix_transactions_archive_STORE_CD_POS_NO_DATETIME', 'STORE_CD', 'POS_NO', 'DATETIME', 'TRD_ID'),
+        Index('ix_transactions_archive_EMP_CD_DATETIME', 'EMP_CD', 'DATETIME', 'TRD_ID'),
+        {'comment': '取引ヘッダ（アーカイブ）'},
+    )
+
+    TRD_ID = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='取引一意キー'
+    )
+    DATETIME = Column(
+        DateTime,
+        primary_key=True,
+        comment='取引日時'
+    )
+    EMP_CD = Column(
+        String(10),
+        nullable=True,
+        comment='レジ担当者コード'
+    )
+    STORE_CD = Column(
+        String(5),
+        nullable=True,
+        comment='店舗コード'
+    )
+    POS_NO = Column(
+        String(3),
+        nullable=True,
+        comment='POS機ID'
+    )
+    TOTAL_AMT = Column(
+        Integer,
+        nullable=True,
+        comment='合計金額'
+    )
+    TTL_AMT_EX_TAX = Column(
+        Integer,
+        nullable=True,
+        comment='合計金額（税抜）'
+    )
+
+    # 外部キーはない（パーティション分割したテーブルでは使えない）ため、結合条件を明示する
+    details = relationship(
+        "TransactionDetailArchive",
+        primaryjoin="TransactionArchive.TRD_ID == foreign(TransactionDetailArchive.TRD_ID)",
+        order_by="TransactionDetailArchive.DTL_ID",
+        viewonly=True,
+    )
+
+    def __repr__(self):
+        return f"<TransactionArchive(TRD_ID={self.TRD_ID}, DATETIME={self.DATETIME}, TOTAL_AMT={self.TOTAL_AMT})>"
+
+
+class TransactionDetailArchive(Base):
+    """取引明細のアーカイブ（パーティション分割と日付での絞り込みのため、ヘッダの取引日時を持つ）"""
+    __tablename__ = 'transaction_details_archive'
+    __table_args__ = (
+        Index('ix_transaction_details_archive_DATETIME', 'DATETIME'),
+        {'comment': '取引明細（アーカイブ）'},
+    )
+
+    TRD_ID = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='取引一意キー'
+    )
+    DTL_ID = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment='取引明細一意キー'
+    )
+    DATETIME = Column(
+        DateTime,
+        primary_key=True,
+        comment='取引日時（ヘッダと同じ）'
+    )
+    PRD_ID = Column(
+        Integer,
+        nullable=False,
+        comment='商品一意キー'
+    )
+    PRD_CODE = Column(
+        String(13),
+        nullable=False,
+        comment='商品コード'
+    )
+    PRD_NAME = Column(
+        String(50),
+        nullable=False,
+        comment='商品名称'
+    )
+    PRD_PRICE = Column(
+        Integer,
+        nullable=False,
+        comment='商品単価'
+    )
+    TAX_CD = Column(
+        String(2),
+        nullable=True,
+        comment='消費税区分'
+    )
+
+    def __repr__(self):
+        return f"<TransactionDetailArchive(TRD_ID={self.TRD_ID}, DTL_ID={self.DTL_ID}, PRD_NAME={self.PRD_NAME})>"
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
 from database import Base
 
 
@@ -46,6 +47,8 @@ class TransactionDetail(Base):
         comment='消費税区分'
     )
 
+    transaction = relationship("Transaction", back_populates="details")
+
     def __repr__(self):
         return f"<TransactionDetail(TRD_ID={self.TRD_ID}, DTL_ID={self.DTL_ID}, PRD_NAME={self.PRD_NAME})>"
 
@@ -0,0 +1,37 @@
+"""
+日次売上集計の再計算スクリプト
+指定した営業日の範囲の daily_sales / daily_product_sales を取引・明細から作り直します
+
+使用例:
+    python rebuild_rollup.py --from 2025-10-01 --to 2025-10-31
+"""
+import argparse
+import sys
+from datetime import date
+
+from database import SessionLocal
+from app import rollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日次売上集計の再計算")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True, help="開始営業日（YYYY-MM-DD）")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True, help="終了営業日（YYYY-MM-DD、当日を含む）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        counts = rollup.rebuild(db, args.date_from, args.date_to)
+        db.commit()
+        print(f"✅ {args.date_from} 〜 {args.date_to} を再計算しました（取引 {counts['transactions']}件 / 明細 {counts['details']}件）")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ エラーが発生しました: {e}")
+        # 呼び出し元（スケジューラやシェル）が失敗を検知できるよう、終了コードで返す
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
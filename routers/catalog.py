@@ -0,0 +1,87 @@
+"""
+カタログ配信のAPIルーター
+端末は起動時にスナップショットで全商品を取得し、以降は差分（delta）で追従する
+"""
+import gzip
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import get_db
+from app import crud, schemas
+from app.catalog import catalog_etag, catalog_snapshot
+from app.compression import parse_accept_encoding
+
+router = APIRouter(
+    prefix="/api/catalog",
+    tags=["catalog"]
+)
+
+
+@router.get("/version", response_model=schemas.CatalogVersion, summary="カタログのバージョン")
+def get_catalog_version(db: Session = Depends(get_db)):
+    """
+    カタログの現在のバージョンを取得
+    商品の追加・更新・削除のたびに1ずつ増える
+    """
+    return schemas.CatalogVersion(version=crud.get_catalog_version(db))
+
+
+@router.get("/snapshot", summary="カタログのスナップショット")
+def get_catalog_snapshot(
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding"),
+):
+    """
+    全商品を1つのJSON（{"version": n, "products": [...]}）で取得
+
+    - ETag はカタログのバージョンごとに変わる。If-None-Match が一致すれば 304 を返す
+    - Accept-Encoding に gzip を含む場合（gzip;q=0 を除く）は圧縮したまま返す
+    """
+    version = crud.get_catalog_version(db)
+    etag = catalog_etag(version)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Catalog-Version": str(version),
+    }
+    if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = catalog_snapshot.get(db, version)
+    if accept_encoding and "gzip" in parse_accept_encoding(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/delta", response_model=schemas.CatalogDelta, summary="カタログの差分")
+def get_catalog_delta(
+    since: int = Query(..., ge=0, description="端末が保持しているカタログのバージョン"),
+    db: Session = Depends(get_db),
+):
+    """
+    バージョン since より後に追加・更新・削除された商品を取得
+    端末は products を上書き、deleted を削除したうえで、保持するバージョンを version に更新する
+    """
+    version = crud.get_catalog_version(db)
+    if since > version:
+        raise HTTPException(
+            status_code=400,
+            detail=f"since ({since}) is newer than the current catalog version ({version}); fetch a new snapshot",
+        )
+    products, tombstones = crud.get_catalog_changes(db, since, version)
+    return schemas.CatalogDelta(
+        since=since,
+        version=version,
+        products=products,
+        deleted=tombstones,
+    )
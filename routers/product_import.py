@@ -0,0 +1,49 @@
+"""
+商品マスタ一括取り込みのAPIルーター
+本部の価格ファイル（CSV / NDJSON）を受け取り、商品コードをキーにUPSERTする
+"""
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+from typing import Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import get_db
+from app import schemas
+from app.catalog_import import detect_format, import_products, ImportFormatError
+
+router = APIRouter(
+    prefix="/api/products",
+    tags=["products"]
+)
+
+
+@router.post("/import", response_model=schemas.ProductImportResult, summary="商品マスタ一括取り込み")
+def import_product_file(
+    file: UploadFile = File(..., description="商品ファイル（列: CODE, NAME, PRICE）"),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="省略時はファイル名から判定"),
+    db: Session = Depends(get_db)
+):
+    """
+    商品ファイルを取り込み、追加・更新・変更なし・不正の件数を返す
+
+    - **file**: CSV（ヘッダ行 CODE,NAME,PRICE）または NDJSON（1行1商品）
+    - **format**: `csv` / `ndjson`（省略時は拡張子・Content-Type から判定）
+
+    PRODUCT_IMPORT_CHUNK_SIZE 行ごとに検証・UPSERT・コミットするため、ファイルの大きさに関係なく一定のメモリで処理する。
+    不正な行は取り込まずに rejected として数え、行番号と理由を errors に返す。
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Cannot detect file format; specify format=csv or format=ndjson")
+
+    try:
+        result = import_products(db, file.file, fmt, chunk_size=settings.PRODUCT_IMPORT_CHUNK_SIZE)
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    return result
@@ -2,17 +2,23 @@
 商品関連のAPIルーター
 CRUD操作とスキーマを使用したベストプラクティス実装
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import sys
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from config import settings
 from database import get_db
 from app import crud, schemas
+from app.cache import product_cache
+from app.search import product_search
+from app.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.replica import get_read_db
 
 router = APIRouter(
     prefix="/api/products",
@@ -21,19 +27,60 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.Product], summary="商品一覧取得")
-def get_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_products(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
     """
     商品マスタから全商品を取得
     
-    - **skip**: スキップする件数（デフォルト: 0）
+    - **cursor**: 前ページのレスポンスヘッダ `X-Next-Cursor` の値（キーセット方式）
+    - **skip**: スキップする件数（デフォルト: 0、cursor 指定時は無視）
     - **limit**: 取得する最大件数（デフォルト: 100）
+
+    skip を指定しない場合は PRD_ID 順のキーセット方式で取得し、続きがあれば
+    `X-Next-Cursor` ヘッダを返す。深いページでも取得コストは一定。
+    """
+    if cursor is None and skip > 0:
+        # 従来のOFFSET方式（互換性のため残す）
+        return ORJSONResponse(crud.get_product_rows(db, limit=limit, skip=skip))
+
+    try:
+        after_id = decode_cursor(cursor, {"id": int})["id"] if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 行を辞書のまま orjson で直列化する（商品ごとのPydanticモデルの生成と検証を省く）
+    rows = crud.get_product_rows(db, limit=limit + 1, after_id=after_id)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor({"id": rows[-1]["PRD_ID"]})
+    return ORJSONResponse(rows, headers=headers)
+
+
+@router.get("/search", response_model=List[schemas.Product], summary="商品名検索")
+def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1),
+    db: Session = Depends(get_read_db)
+):
     """
-    products = crud.get_products(db, skip=skip, limit=limit)
-    return products
+    商品名の一部・商品コードの先頭で商品を検索（バーコードのない商品の手入力用）
+
+    - **q**: 検索語（ひらがな・カタカナ、全角・半角を区別しない。空白区切りはすべてを含む商品）
+    - **limit**: 取得する最大件数（デフォルト: 20、上限: SEARCH_MAX_RESULTS）
+
+    ワーカー内の n-gram インデックスで検索し、コード一致・名称の前方一致・部分一致の順に返す。
+    """
+    product_search.refresh(db)
+    return product_search.search(q, limit=min(limit, settings.SEARCH_MAX_RESULTS))
 
 
 @router.get("/{product_id}", response_model=schemas.Product, summary="商品詳細取得（ID指定）")
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, db: Session = Depends(get_read_db)):
     """
     指定されたIDの商品を取得
     
@@ -46,7 +93,7 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/code/{code}", response_model=schemas.Product, summary="商品詳細取得（コード指定）")
-def get_product_by_code(code: str, db: Session = Depends(get_db)):
+def get_product_by_code(code: str, db: Session = Depends(get_read_db)):
     """
     商品コードで商品を取得
     
@@ -56,3 +103,36 @@ def get_product_by_code(code: str, db: Session = Depends(get_db)):
     if not product:
         raise HTTPException(status_code=404, detail="商品が見つかりません")
     return product
+
+
+@router.post("/lookup", response_model=schemas.ProductLookupResponse, summary="商品一括検索")
+def lookup_products(lookup_request: schemas.ProductLookupRequest, db: Session = Depends(get_db)):
+    """
+    複数の商品コード・商品IDをまとめて検索（セルフレジ・ハンディスキャナーのかご単位の照会用）
+
+    - **codes**: 商品コード（バーコード）のリスト
+    - **ids**: 商品IDのリスト
+
+    合計 PRODUCT_LOOKUP_MAX_ITEMS 件まで。キャッシュにない商品だけを1回のクエリで取得し、
+    見つからなかったコード・IDは missing_codes / missing_ids で返す。
+    """
+    total = len(lookup_request.codes) + len(lookup_request.ids)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="codes or ids must not be empty")
+    if total > settings.PRODUCT_LOOKUP_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many codes/ids in one lookup (max {settings.PRODUCT_LOOKUP_MAX_ITEMS})"
+        )
+
+    resolved = crud.resolve_products(db, product_ids=lookup_request.ids, codes=lookup_request.codes)
+    return crud.build_lookup_response(resolved, lookup_request.ids, lookup_request.codes)
+
+
+@router.get("/cache/stats", summary="商品キャッシュ統計")
+def get_product_cache_stats():
+    """
+    商品キャッシュのヒット/ミス件数などを返す
+    （統計はワーカープロセス単位）
+    """
+    return product_cache.stats()
@@ -0,0 +1,133 @@
+"""
+商品関連のAPIルーター（非同期モード）
+DB_ASYNC=True のとき routers/products.py の代わりに登録される
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import get_async_db
+from app import crud, crud_async, schemas
+from app.cache import product_cache
+from app.search import product_search
+from app.pagination import encode_cursor, decode_cursor, InvalidCursorError
+from app.replica import get_async_read_db
+
+router = APIRouter(
+    prefix="/api/products",
+    tags=["products"]
+)
+
+
+@router.get("/", response_model=List[schemas.Product], summary="商品一覧取得")
+async def get_products(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    商品マスタから全商品を取得
+    
+    - **cursor**: 前ページのレスポンスヘッダ `X-Next-Cursor` の値（キーセット方式）
+    - **skip**: スキップする件数（デフォルト: 0、cursor 指定時は無視）
+    - **limit**: 取得する最大件数（デフォルト: 100）
+    """
+    if cursor is None and skip > 0:
+        # 従来のOFFSET方式（互換性のため残す）
+        return ORJSONResponse(await crud_async.get_product_rows(db, limit=limit, skip=skip))
+
+    try:
+        after_id = decode_cursor(cursor, {"id": int})["id"] if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 行を辞書のまま orjson で直列化する（商品ごとのPydanticモデルの生成と検証を省く）
+    rows = await crud_async.get_product_rows(db, limit=limit + 1, after_id=after_id)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor({"id": rows[-1]["PRD_ID"]})
+    return ORJSONResponse(rows, headers=headers)
+
+
+@router.get("/search", response_model=List[schemas.Product], summary="商品名検索")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    商品名の一部・商品コードの先頭で商品を検索（バーコードのない商品の手入力用）
+
+    - **q**: 検索語（ひらがな・カタカナ、全角・半角を区別しない。空白区切りはすべてを含む商品）
+    - **limit**: 取得する最大件数（デフォルト: 20、上限: SEARCH_MAX_RESULTS）
+    """
+    await db.run_sync(product_search.refresh)
+    return product_search.search(q, limit=min(limit, settings.SEARCH_MAX_RESULTS))
+
+
+@router.get("/{product_id}", response_model=schemas.Product, summary="商品詳細取得（ID指定）")
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    指定されたIDの商品を取得
+    
+    - **product_id**: 商品ID
+    """
+    product = await crud_async.get_product_by_id(db, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="商品が見つかりません")
+    return product
+
+
+@router.get("/code/{code}", response_model=schemas.Product, summary="商品詳細取得（コード指定）")
+async def get_product_by_code(code: str, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    商品コードで商品を取得
+    
+    - **code**: 商品コード（バーコード）
+    """
+    product = await crud_async.get_product_by_code(db, code)
+    if not product:
+        raise HTTPException(status_code=404, detail="商品が見つかりません")
+    return product
+
+
+@router.post("/lookup", response_model=schemas.ProductLookupResponse, summary="商品一括検索")
+async def lookup_products(lookup_request: schemas.ProductLookupRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    複数の商品コード・商品IDをまとめて検索（セルフレジ・ハンディスキャナーのかご単位の照会用）
+
+    - **codes**: 商品コード（バーコード）のリスト
+    - **ids**: 商品IDのリスト
+
+    合計 PRODUCT_LOOKUP_MAX_ITEMS 件まで。キャッシュにない商品だけを1回のクエリで取得し、
+    見つからなかったコード・IDは missing_codes / missing_ids で返す。
+    """
+    total = len(lookup_request.codes) + len(lookup_request.ids)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="codes or ids must not be empty")
+    if total > settings.PRODUCT_LOOKUP_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many codes/ids in one lookup (max {settings.PRODUCT_LOOKUP_MAX_ITEMS})"
+        )
+
+    resolved = await crud_async.resolve_products(db, product_ids=lookup_request.ids, codes=lookup_request.codes)
+    return crud.build_lookup_response(resolved, lookup_request.ids, lookup_request.codes)
+
+
+@router.get("/cache/stats", summary="商品キャッシュ統計")
+async def get_product_cache_stats():
+    """
+    商品キャッシュのヒット/ミス件数などを返す
+    （統計はワーカープロセス単位）
+    """
+    return product_cache.stats()
@@ -0,0 +1,185 @@
+"""
+購入関連のAPIルーター
+"""
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional, Tuple
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import get_db
+from app import crud, schemas
+from app.metrics import registry as metrics_registry
+from app.idempotency import idempotency_store, request_fingerprint, IdempotencyConflictError
+from app.journal import purchase_journal
+from app.tax import UnknownTaxCodeError, tax_rate_table
+
+router = APIRouter(
+    prefix="/api/purchase",
+    tags=["Purchase"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+@router.post("", response_model=schemas.PurchaseResponse, status_code=status.HTTP_201_CREATED)
+def purchase_items(
+    purchase_request: schemas.PurchaseRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64),
+):
+    """
+    購入処理API
+    
+    購入リストを受け取り、取引と取引明細をデータベースに保存します。
+    
+    - **items**: 購入する商品のリスト（各行は PRD_ID または CODE で指定。商品名・単価はサーバー側で解決）
+    - **emp_cd**: レジ担当者コード（オプション、デフォルト: 999999999）
+    - **store_cd**: 店舗コード（オプション、デフォルト: 30）
+    - **pos_no**: POS機ID（オプション、デフォルト: 90）
+    - **Idempotency-Key** ヘッダ（オプション）: 再送時に同じキーを付けると、取引を二重登録せず初回のレスポンスを返す
+    
+    ジャーナルモード（PURCHASE_JOURNAL_ENABLED）では、購入をローカルのジャーナルに記録した時点で
+    202 と journal_id を返し、3・4はバックグラウンドでまとめて行う（登録状況は GET /api/purchase/journal/{journal_id}）
+    
+    処理の流れ:
+    1. 商品マスタから商品名・単価を一括解決（存在しない商品があれば400）
+    2. 合計金額を計算
+    3. 取引テーブルへ登録
+    4. 取引明細テーブルへ登録
+    
+    トランザクション管理により、エラー時は自動的にロールバックされます。
+    """
+    if not purchase_request.items:
+        raise HTTPException(status_code=400, detail="Purchase list cannot be empty")
+
+    if idempotency_key is None:
+        purchase_response, _ = _create_purchase(db, purchase_request)
+        _set_status(response, purchase_response)
+        return purchase_response
+
+    fingerprint = request_fingerprint(purchase_request)
+    # 同じキーの同時リクエストは1件だけが登録処理を行い、残りはその結果を受け取る
+    with idempotency_store.lock(idempotency_key):
+        try:
+            stored = idempotency_store.lookup(db, idempotency_key, fingerprint)
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if stored is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            _set_status(response, stored)
+            return stored
+
+        purchase_response, replayed = _create_purchase(db, purchase_request, idempotency_key, fingerprint)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        _set_status(response, purchase_response)
+        return purchase_response
+
+
+@router.get("/journal/{journal_id}", response_model=schemas.PurchaseJournalStatus)
+def get_journal_status(journal_id: str, db: Session = Depends(get_db)):
+    """
+    ジャーナルに記録した購入のDB登録状況を取得するAPI
+
+    - **pending**: DBへの登録待ち
+    - **committed**: 登録済み（transaction_id に取引IDが入る）
+    - **duplicate**: 同じ冪等キーの購入が別に登録済みのため登録しなかった（transaction_id はその取引ID）
+    - **failed**: 登録できずに退避した（journal-failed.ndjson）
+    """
+    return purchase_journal.status(db, journal_id)
+
+
+def _set_status(response: Response, purchase_response: schemas.PurchaseResponse) -> None:
+    """DBへの登録前（ジャーナルに記録しただけ）のレスポンスは 202 Accepted で返す"""
+    if purchase_response.transaction_id is None:
+        response.status_code = status.HTTP_202_ACCEPTED
+
+
+def _journal_purchase(
+    db: Session,
+    purchase_request: schemas.PurchaseRequest,
+    idempotency_key: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Optional[Tuple[schemas.PurchaseResponse, bool]]:
+    """
+    購入をジャーナルに記録し、レスポンスと「既存の結果を返したか」を返す
+    （ジャーナルに書き込めない場合は None を返し、DBへ直接登録する）
+    """
+    try:
+        products = crud.resolve_purchase(db, purchase_request)
+        tax_rates = tax_rate_table.get(db)
+    except crud.ProductNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return purchase_journal.record_purchase(purchase_request, products, tax_rates, idempotency_key, fingerprint)
+    except UnknownTaxCodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (OSError, RuntimeError) as e:
+        logger.exception("Purchase journal append failed; committing directly")
+        metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+        return None
+
+
+def _create_purchase(
+    db: Session,
+    purchase_request: schemas.PurchaseRequest,
+    idempotency_key: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Tuple[schemas.PurchaseResponse, bool]:
+    """
+    購入を登録し、レスポンスと「既存の結果を返したか」を返す
+    冪等キーが指定された場合は、同じトランザクションでキーとレスポンスを保存する
+    """
+    if purchase_journal.active:
+        journaled = _journal_purchase(db, purchase_request, idempotency_key, fingerprint)
+        if journaled is not None:
+            return journaled
+    try:
+        # トランザクション開始
+        transaction = crud.create_purchase(db, purchase_request)
+        # 採番済みの値からレスポンスを作るため、コミット後の再読み込みは不要
+        purchase_response = schemas.PurchaseResponse(
+            success=True,
+            transaction_id=transaction.TRD_ID,
+            total_amount=transaction.TOTAL_AMT,
+            total_amount_ex_tax=transaction.TTL_AMT_EX_TAX,
+            items_count=len(purchase_request.items)
+        )
+        if idempotency_key is not None:
+            idempotency_store.save(db, idempotency_key, fingerprint, purchase_response)
+        db.commit()  # すべての処理が成功したらコミット
+    except (crud.ProductNotFoundError, UnknownTaxCodeError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError as e:
+        db.rollback()
+        # 別ワーカーが同じ冪等キーで先に登録した場合は、その結果を返す
+        stored = None
+        if idempotency_key is not None:
+            try:
+                stored = idempotency_store.lookup(db, idempotency_key, fingerprint)
+            except IdempotencyConflictError as conflict:
+                raise HTTPException(status_code=409, detail=str(conflict))
+        if stored is None:
+            logger.exception("Error during purchase")
+            metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+            raise HTTPException(status_code=500, detail=f"Failed to process purchase: {str(e)}")
+        return stored, True
+    except Exception as e:
+        db.rollback()  # エラーが発生したらロールバック
+        logger.exception("Error during purchase")
+        metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+        raise HTTPException(status_code=500, detail=f"Failed to process purchase: {str(e)}")
+
+    if idempotency_key is not None:
+        idempotency_store.remember(idempotency_key, fingerprint, purchase_response)
+    return purchase_response, False
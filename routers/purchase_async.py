@@ -0,0 +1,156 @@
+"""
+購入関連のAPIルーター（非同期モード）
+DB_ASYNC=True のとき routers/purchase.py の代わりに登録される
+"""
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import get_async_db
+from app import crud, crud_async, schemas
+from app.metrics import registry as metrics_registry
+from app.idempotency import idempotency_store, request_fingerprint, IdempotencyConflictError
+from app.journal import purchase_journal
+from app.tax import UnknownTaxCodeError, tax_rate_table
+
+router = APIRouter(
+    prefix="/api/purchase",
+    tags=["Purchase"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+@router.post("", response_model=schemas.PurchaseResponse, status_code=status.HTTP_201_CREATED)
+async def purchase_items(
+    purchase_request: schemas.PurchaseRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64),
+):
+    """
+    購入処理API（非同期版）
+
+    処理内容は同期版と同じ。DB待ちの間もイベントループを解放するため、
+    スレッドプールの上限に縛られず多数の購入を同時に処理できる。
+    """
+    if not purchase_request.items:
+        raise HTTPException(status_code=400, detail="Purchase list cannot be empty")
+
+    if idempotency_key is None:
+        purchase_response, _ = await _create_purchase(db, purchase_request)
+        _set_status(response, purchase_response)
+        return purchase_response
+
+    fingerprint = request_fingerprint(purchase_request)
+    async with idempotency_store.async_lock(idempotency_key):
+        try:
+            stored = await db.run_sync(idempotency_store.lookup, idempotency_key, fingerprint)
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if stored is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            _set_status(response, stored)
+            return stored
+
+        purchase_response, replayed = await _create_purchase(db, purchase_request, idempotency_key, fingerprint)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        _set_status(response, purchase_response)
+        return purchase_response
+
+
+@router.get("/journal/{journal_id}", response_model=schemas.PurchaseJournalStatus)
+async def get_journal_status(journal_id: str, db: AsyncSession = Depends(get_async_db)):
+    """ジャーナルに記録した購入のDB登録状況を取得するAPI（非同期版）"""
+    return await db.run_sync(purchase_journal.status, journal_id)
+
+
+def _set_status(response: Response, purchase_response: schemas.PurchaseResponse) -> None:
+    """DBへの登録前（ジャーナルに記録しただけ）のレスポンスは 202 Accepted で返す"""
+    if purchase_response.transaction_id is None:
+        response.status_code = status.HTTP_202_ACCEPTED
+
+
+async def _journal_purchase(
+    db: AsyncSession,
+    purchase_request: schemas.PurchaseRequest,
+    idempotency_key: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Optional[Tuple[schemas.PurchaseResponse, bool]]:
+    """購入をジャーナルに記録する（routers.purchase と同じ手順。fsync はスレッドプールで待つ）"""
+    try:
+        products = await crud_async.resolve_purchase(db, purchase_request)
+        tax_rates = await db.run_sync(tax_rate_table.get)
+    except crud.ProductNotFoundError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await run_in_threadpool(
+            purchase_journal.record_purchase, purchase_request, products, tax_rates, idempotency_key, fingerprint
+        )
+    except UnknownTaxCodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (OSError, RuntimeError) as e:
+        logger.exception("Purchase journal append failed; committing directly")
+        metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+        return None
+
+
+async def _create_purchase(
+    db: AsyncSession,
+    purchase_request: schemas.PurchaseRequest,
+    idempotency_key: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Tuple[schemas.PurchaseResponse, bool]:
+    """購入を登録し、レスポンスと「既存の結果を返したか」を返す（routers.purchase と同じ手順）"""
+    if purchase_journal.active:
+        journaled = await _journal_purchase(db, purchase_request, idempotency_key, fingerprint)
+        if journaled is not None:
+            return journaled
+    try:
+        transaction = await crud_async.create_purchase(db, purchase_request)
+        purchase_response = schemas.PurchaseResponse(
+            success=True,
+            transaction_id=transaction.TRD_ID,
+            total_amount=transaction.TOTAL_AMT,
+            total_amount_ex_tax=transaction.TTL_AMT_EX_TAX,
+            items_count=len(purchase_request.items)
+        )
+        if idempotency_key is not None:
+            idempotency_store.save(db, idempotency_key, fingerprint, purchase_response)
+        await db.commit()
+    except (crud.ProductNotFoundError, UnknownTaxCodeError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError as e:
+        await db.rollback()
+        stored = None
+        if idempotency_key is not None:
+            try:
+                stored = await db.run_sync(idempotency_store.lookup, idempotency_key, fingerprint)
+            except IdempotencyConflictError as conflict:
+                raise HTTPException(status_code=409, detail=str(conflict))
+        if stored is None:
+            logger.exception("Error during purchase")
+            metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+            raise HTTPException(status_code=500, detail=f"Failed to process purchase: {str(e)}")
+        return stored, True
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Error during purchase")
+        metrics_registry.inc("purchase_errors_total", (("error", type(e).__name__),))
+        raise HTTPException(status_code=500, detail=f"Failed to process purchase: {str(e)}")
+
+    if idempotency_key is not None:
+        idempotency_store.remember(idempotency_key, fingerprint, purchase_response)
+    return purchase_response, False
@@ -0,0 +1,50 @@
+"""
+一括購入のAPIルーター
+オフライン中に端末へ溜まった購入をまとめて登録する
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import settings
+from database import get_db
+from app import crud, schemas
+
+router = APIRouter(
+    prefix="/api/purchase",
+    tags=["Purchase"]
+)
+
+
+@router.post("/batch", response_model=schemas.PurchaseBatchResponse, summary="一括購入")
+def purchase_batch(batch_request: schemas.PurchaseBatchRequest, db: Session = Depends(get_db)):
+    """
+    一括購入API
+
+    複数の購入（`POST /api/purchase` と同じ形式）を受け取り、
+    PURCHASE_BATCH_CHUNK_SIZE 件ごとのトランザクションで一括登録します。
+
+    - **sales**: 購入リクエストのリスト（最大 PURCHASE_BATCH_MAX_SALES 件）
+
+    結果は購入ごとに返し、1件の失敗（空の購入、存在しない商品など）で他の購入は中断されません。
+    """
+    if not batch_request.sales:
+        raise HTTPException(status_code=400, detail="Sales list cannot be empty")
+    if len(batch_request.sales) > settings.PURCHASE_BATCH_MAX_SALES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many sales in one batch (max {settings.PURCHASE_BATCH_MAX_SALES})"
+        )
+
+    results = crud.create_purchase_batch(db, batch_request.sales, chunk_size=settings.PURCHASE_BATCH_CHUNK_SIZE)
+    succeeded = sum(1 for result in results if result.success)
+
+    return schemas.PurchaseBatchResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
@@ -0,0 +1,100 @@
+"""
+売上レポートのAPIルーター
+日次売上集計テーブルだけを読むため、取引履歴の量に関係なく即座に応答する
+"""
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import get_db
+from models import DailySales, DailyProductSales
+from app import rollup, schemas
+from app.replica import get_read_db
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"]
+)
+
+
+@router.get("/daily", response_model=schemas.DailySalesReport, summary="日次締めレポート")
+def get_daily_report(
+    sales_date: date,
+    store_cd: Optional[str] = None,
+    pos_no: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    営業日の売上合計とPOS機ごとの内訳を取得
+
+    - **sales_date**: 営業日（YYYY-MM-DD）
+    - **store_cd** / **pos_no**: 店舗・POS機で絞り込み
+    """
+    query = db.query(DailySales).filter(DailySales.SALES_DATE == sales_date)
+    if store_cd is not None:
+        query = query.filter(DailySales.STORE_CD == store_cd)
+    if pos_no is not None:
+        query = query.filter(DailySales.POS_NO == pos_no)
+    rows = query.order_by(DailySales.STORE_CD, DailySales.POS_NO).all()
+
+    return schemas.DailySalesReport(
+        sales_date=sales_date,
+        store_cd=store_cd,
+        sales_count=sum(row.SALES_CNT for row in rows),
+        total_amount=sum(row.TOTAL_AMT for row in rows),
+        total_amount_ex_tax=sum(row.TTL_AMT_EX_TAX for row in rows),
+        by_pos=rows
+    )
+
+
+@router.get("/daily/products", response_model=schemas.DailyProductSalesReport, summary="日次商品別売上")
+def get_daily_product_report(
+    sales_date: date,
+    store_cd: Optional[str] = None,
+    pos_no: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    営業日の商品別販売数量・金額を取得（数量の多い順）
+
+    - **sales_date**: 営業日（YYYY-MM-DD）
+    - **store_cd** / **pos_no**: 店舗・POS機で絞り込み
+    """
+    query = (
+        select(
+            DailyProductSales.PRD_ID,
+            func.sum(DailyProductSales.QTY).label("QTY"),
+            func.sum(DailyProductSales.AMT).label("AMT"),
+        )
+        .where(DailyProductSales.SALES_DATE == sales_date)
+        .group_by(DailyProductSales.PRD_ID)
+        .order_by(func.sum(DailyProductSales.QTY).desc(), DailyProductSales.PRD_ID)
+    )
+    if store_cd is not None:
+        query = query.where(DailyProductSales.STORE_CD == store_cd)
+    if pos_no is not None:
+        query = query.where(DailyProductSales.POS_NO == pos_no)
+
+    products = [schemas.DailyProductSales(**row) for row in db.execute(query).mappings()]
+    return schemas.DailyProductSalesReport(sales_date=sales_date, store_cd=store_cd, pos_no=pos_no, products=products)
+
+
+@router.post("/daily/rebuild", response_model=schemas.RollupRebuildResult, summary="日次売上集計の再計算")
+def rebuild_daily_sales(date_from: date, date_to: date, db: Session = Depends(get_db)):
+    """
+    営業日の範囲（両端を含む）の日次売上集計を取引・明細から再計算
+
+    - **date_from** / **date_to**: 営業日（YYYY-MM-DD）
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must be on or before date_to")
+    counts = rollup.rebuild(db, date_from, date_to)
+    db.commit()
+    return schemas.RollupRebuildResult(date_from=date_from, date_to=date_to, **counts)
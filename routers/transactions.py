@@ -0,0 +1,120 @@
+"""
+取引関連のAPIルーター
+"""
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import get_db, SessionLocal
+from app import crud, schemas
+from app.export import stream_export, EXPORT_FORMATS
+from app.pagination import encode_cursor, decode_cursor, InvalidCursorError
+
+router = APIRouter(
+    prefix="/api/transactions",
+    tags=["transactions"]
+)
+
+
+@router.get("/export", summary="取引エクスポート（NDJSON/CSV）")
+def export_transactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    store_cd: Optional[str] = None
+):
+    """
+    取引ヘッダと取引明細を結合し、明細1行ごとにストリーミングで出力（会計連携用）
+
+    - **format**: `ndjson`（デフォルト）または `csv`
+    - **date_from** / **date_to**: 取引日（UTC、両端を含む）
+    - **store_cd**: 店舗コード
+
+    サーバー側カーソルでチャンク単位に読み出しながら送信するため、
+    期間が長くてもメモリ使用量は一定で、すぐに先頭から受信できます。
+    """
+    filename = f"transactions_{date_from or 'all'}_{date_to or 'all'}.{format}"
+    return StreamingResponse(
+        stream_export(SessionLocal, format, date_from=date_from, date_to=date_to, store_cd=store_cd),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/", response_model=schemas.TransactionPage, summary="取引一覧取得")
+def get_transactions(
+    store_cd: Optional[str] = None,
+    pos_no: Optional[str] = None,
+    emp_cd: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    取引を新しい順に取得（キーセット方式）
+
+    - **store_cd** / **pos_no** / **emp_cd**: 店舗・POS機・レジ担当者で絞り込み
+    - **limit**: 取得する最大件数（デフォルト: 100）
+    - **cursor**: 前ページの `next_cursor`（続きがなければ `null`）
+    """
+    transactions, next_cursor = _get_page(db, cursor, limit, store_cd=store_cd, pos_no=pos_no, emp_cd=emp_cd)
+    return schemas.TransactionPage(items=transactions, next_cursor=next_cursor)
+
+
+@router.get("/receipts", response_model=schemas.ReceiptPage, summary="レシート一覧取得")
+def get_receipts(
+    store_cd: Optional[str] = None,
+    pos_no: Optional[str] = None,
+    emp_cd: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    取引を明細付きで新しい順に取得（キーセット方式、パラメータは取引一覧と同じ）
+
+    ページ内の全取引の明細は1回のクエリでまとめて読み込むため、件数によらずSQLは2回です。
+    """
+    transactions, next_cursor = _get_page(
+        db, cursor, limit, store_cd=store_cd, pos_no=pos_no, emp_cd=emp_cd, with_details=True
+    )
+    return schemas.ReceiptPage(items=transactions, next_cursor=next_cursor)
+
+
+@router.get("/{transaction_id}", response_model=schemas.Receipt, summary="レシート取得")
+def get_receipt(transaction_id: int, db: Session = Depends(get_db)):
+    """
+    取引を明細付きで取得（レシート再発行・返品時の照会用）
+
+    ヘッダと明細は1回のクエリ（JOIN）で取得します。
+    """
+    transaction = crud.get_receipt(db, transaction_id)
+    if transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
+
+def _get_page(db: Session, cursor: Optional[str], limit: int, **filters):
+    """cursor の次から limit 件の取引と、次ページの cursor（続きがなければ None）を返す"""
+    try:
+        before = None
+        if cursor:
+            values = decode_cursor(cursor, {"dt": datetime, "id": int})
+            before = (values["dt"], values["id"])
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    transactions = crud.get_transactions_before(db, before=before, limit=limit + 1, **filters)
+    next_cursor = None
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor({"dt": last.DATETIME, "id": last.TRD_ID})
+    return transactions, next_cursor
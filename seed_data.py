@@ -1,10 +1,16 @@
 """
 テストデータ投入スクリプト
-商品マスタに5件のテストデータを投入します
+商品マスタに5件のテストデータを投入します（税率マスタが空なら標準税率・軽減税率も投入します）
 """
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
-from models import ProductMaster
+from models import ProductMaster, TaxRate
+
+# 税率マスタ（マイグレーションと同じ内容）
+tax_rates = [
+    {"TAX_CD": "10", "NAME": "標準税率", "RATE": 10},
+    {"TAX_CD": "08", "NAME": "軽減税率", "RATE": 8},
+]
 
 # テストデータ
 test_products = [
@@ -41,6 +47,12 @@ def seed_products():
     db = SessionLocal()
     
     try:
+        # 税率マスタ（create_all で作成したDBなどマイグレーションを通していない場合）
+        if db.query(TaxRate).count() == 0:
+            db.add_all(TaxRate(**tax_rate) for tax_rate in tax_rates)
+            db.commit()
+            print(f"税率マスタを{len(tax_rates)}件投入しました。")
+
         # 既存データを確認
         existing_count = db.query(ProductMaster).count()
         print(f"現在の商品数: {existing_count}件")
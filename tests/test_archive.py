@@ -0,0 +1,168 @@
+"""
+取引のアーカイブ（app.archive）のテスト
+"""
+import json
+import sys
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from starlette.testclient import TestClient
+from sqlalchemy import func, select, update
+from main import app
+import archive_transactions
+from database import SessionLocal
+from models import DailySales, IdempotencyKey, Transaction, TransactionArchive, TransactionDetailArchive
+from app import archive, rollup, sequences
+
+client = TestClient(app)
+
+ARCHIVE_BEFORE = date(2020, 4, 1)
+
+
+def _purchase(store_cd: str, headers=None) -> int:
+    response = client.post("/api/purchase", json={
+        "items": [{"PRD_ID": 1}, {"PRD_ID": 2}],
+        "store_cd": store_cd,
+    }, headers=headers)
+    assert response.status_code == 201
+    return response.json()["transaction_id"]
+
+
+def _set_datetime(trd_id: int, dt: datetime) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(update(Transaction).where(Transaction.TRD_ID == trd_id).values(DATETIME=dt))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _archive():
+    db = SessionLocal()
+    try:
+        return archive.archive_transactions(db, ARCHIVE_BEFORE, chunk_size=1)
+    finally:
+        db.close()
+
+
+def test_archive_old_transactions():
+    """締めた月の取引がアーカイブへ移動し、照会・一覧・エクスポート・集計の再計算では引き続き見えるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    old_ids = [_purchase(store_cd, headers={"Idempotency-Key": str(uuid.uuid4())}) for _ in range(2)]
+    recent_id = _purchase(store_cd)
+    _set_datetime(old_ids[0], datetime(2020, 3, 10, 1, 0))
+    _set_datetime(old_ids[1], datetime(2020, 3, 10, 2, 0))
+
+    counts = _archive()
+    assert counts["transactions"] >= 2
+    assert counts["details"] >= 4
+
+    db = SessionLocal()
+    try:
+        assert db.get(Transaction, old_ids[0]) is None
+        assert db.get(Transaction, recent_id) is not None
+        archived = db.execute(
+            select(func.count()).select_from(TransactionDetailArchive).where(TransactionDetailArchive.TRD_ID.in_(old_ids))
+        ).scalar_one()
+        assert archived == 4
+        # 移動した取引を参照する冪等キーは削除される
+        keys = db.execute(
+            select(func.count()).select_from(IdempotencyKey).where(IdempotencyKey.TRD_ID.in_(old_ids))
+        ).scalar_one()
+        assert keys == 0
+        assert archive.archived_before(db) == datetime(2020, 4, 1)
+    finally:
+        db.close()
+
+    # レシートはアーカイブからも取得できる
+    receipt = client.get(f"/api/transactions/{old_ids[0]}").json()
+    assert receipt["TRD_ID"] == old_ids[0]
+    assert [line["PRD_ID"] for line in receipt["details"]] == [1, 2]
+
+    # 一覧は直近の取引の続きをアーカイブからたどる
+    first = client.get("/api/transactions/receipts", params={"store_cd": store_cd, "limit": 2}).json()
+    assert [item["TRD_ID"] for item in first["items"]] == [recent_id, old_ids[1]]
+    rest = client.get("/api/transactions/", params={"store_cd": store_cd, "limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [item["TRD_ID"] for item in rest["items"]] == [old_ids[0]]
+    assert rest["next_cursor"] is None
+
+    # エクスポートはアーカイブ → 直近の順に取引日時順で出力する
+    response = client.get("/api/transactions/export", params={"store_cd": store_cd})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["TRD_ID"] for row in rows] == [old_ids[0], old_ids[0], old_ids[1], old_ids[1], recent_id, recent_id]
+
+    # 集計の再計算はアーカイブ済みの期間も取引から作り直せる
+    db = SessionLocal()
+    try:
+        assert rollup.rebuild(db, date(2020, 3, 10), date(2020, 3, 10))["transactions"] >= 2
+        db.commit()
+        sales = db.execute(select(DailySales.SALES_CNT).where(
+            DailySales.STORE_CD == store_cd, DailySales.SALES_DATE == date(2020, 3, 10)
+        )).scalar_one()
+        assert sales == 2
+    finally:
+        db.close()
+
+
+def test_late_arrivals_are_archived_next_run():
+    """移動済みの境界より前に遅れて登録された取引は、次回の実行で移動されるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    late_id = _purchase(store_cd)
+    _set_datetime(late_id, datetime(2020, 2, 1))
+
+    # 移動前も一覧には見える
+    items = client.get("/api/transactions/", params={"store_cd": store_cd}).json()["items"]
+    assert [item["TRD_ID"] for item in items] == [late_id]
+
+    _archive()
+    db = SessionLocal()
+    try:
+        assert db.get(Transaction, late_id) is None
+        assert db.execute(select(TransactionArchive).where(TransactionArchive.TRD_ID == late_id)).scalar_one() is not None
+    finally:
+        db.close()
+    items = client.get("/api/transactions/", params={"store_cd": store_cd}).json()["items"]
+    assert [item["TRD_ID"] for item in items] == [late_id]
+
+
+def test_watermark_moved_by_other_process_is_seen_immediately():
+    """別のプロセスが境界を進めた直後から、アーカイブを読む対象に含めるテスト"""
+    reader = SessionLocal()
+    writer = SessionLocal()
+    try:
+        previous = sequences.current_value(writer, sequences.TRANSACTION_ARCHIVE_BEFORE)
+        archive.archived_before(reader)
+        reader.commit()
+        sequences.set_value(writer, sequences.TRANSACTION_ARCHIVE_BEFORE, 20200501)
+        writer.commit()
+        try:
+            assert archive.archived_before(reader) == datetime(2020, 5, 1)
+        finally:
+            sequences.set_value(writer, sequences.TRANSACTION_ARCHIVE_BEFORE, previous)
+            writer.commit()
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_script_exits_with_error(monkeypatch):
+    """アーカイブに失敗した場合、スクリプトは終了コード1で終了するテスト"""
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(archive, "archive_transactions", fail)
+    monkeypatch.setattr(sys, "argv", ["archive_transactions.py"])
+    with pytest.raises(SystemExit) as exc_info:
+        archive_transactions.main()
+    assert exc_info.value.code == 1
+
+
+def test_add_months():
+    """月の加算（年をまたぐ場合を含む）のテスト"""
+    assert archive.add_months(date(2025, 11, 15), 2) == date(2026, 1, 1)
+    assert archive.add_months(date(2026, 1, 1), -3) == date(2025, 10, 1)
@@ -0,0 +1,93 @@
+"""
+カタログ配信API のテスト
+"""
+import gzip
+import json
+import uuid
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+from database import SessionLocal
+from app import crud
+
+client = TestClient(main.app)
+
+
+def _new_code():
+    return "99" + uuid.uuid4().hex[:11]
+
+
+def test_snapshot_etag_and_not_modified():
+    """スナップショットのETagと304応答のテスト"""
+    response = client.get("/api/catalog/snapshot", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    data = response.json()  # httpx が gzip を展開する
+    assert data["version"] == int(response.headers["x-catalog-version"])
+    assert len(data["products"]) > 0
+
+    response = client.get("/api/catalog/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_snapshot_without_gzip():
+    """gzip 非対応のクライアントには展開して返すテスト"""
+    response = client.get("/api/catalog/snapshot", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "products" in json.loads(response.content)
+
+
+def test_snapshot_gzip_refused_with_zero_quality():
+    """gzip;q=0 で拒否したクライアントには展開して返すテスト"""
+    response = client.get("/api/catalog/snapshot", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "products" in json.loads(response.content)
+
+
+def test_delta_tracks_create_update_delete():
+    """追加・更新・削除が差分に含まれるテスト"""
+    since = client.get("/api/catalog/version").json()["version"]
+    etag = client.get("/api/catalog/snapshot").headers["etag"]
+
+    db = SessionLocal()
+    try:
+        created_id = crud.create_product(db, code=_new_code(), name="差分テスト商品", price=100).PRD_ID
+        updated_id = crud.create_product(db, code=_new_code(), name="更新前", price=200).PRD_ID
+        deleted_id = crud.create_product(db, code=_new_code(), name="削除する商品", price=300).PRD_ID
+        crud.update_product(db, updated_id, name="更新後")
+        crud.delete_product(db, deleted_id)
+    finally:
+        db.close()
+
+    response = client.get(f"/api/catalog/delta?since={since}")
+    assert response.status_code == 200
+    delta = response.json()
+    assert delta["version"] == since + 5
+    products = {product["PRD_ID"]: product for product in delta["products"]}
+    assert products[created_id]["NAME"] == "差分テスト商品"
+    assert products[updated_id]["NAME"] == "更新後"
+    assert deleted_id not in products
+    assert [tombstone["PRD_ID"] for tombstone in delta["deleted"]] == [deleted_id]
+
+    # バージョンが進んだのでスナップショットも作り直される
+    response = client.get("/api/catalog/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == since + 5
+
+    # 最新のバージョンからの差分は空
+    latest = client.get(f"/api/catalog/delta?since={since + 5}").json()
+    assert latest["products"] == [] and latest["deleted"] == []
+
+
+def test_delta_since_newer_than_current():
+    """端末のバージョンが新しすぎる場合は400のテスト"""
+    version = client.get("/api/catalog/version").json()["version"]
+    response = client.get(f"/api/catalog/delta?since={version + 1000}")
+    assert response.status_code == 400
@@ -0,0 +1,95 @@
+"""
+レスポンス圧縮 のテスト
+"""
+import gzip
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+import main
+from app.compression import CompressionMiddleware, parse_accept_encoding, choose_encoding
+
+BIG_BODY = "商品データ," * 1000
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@app.get("/big")
+def big():
+    return PlainTextResponse(BIG_BODY)
+
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("ok")
+
+
+@app.get("/encoded")
+def encoded():
+    return Response(gzip.compress(BIG_BODY.encode("utf-8")), headers={"Content-Encoding": "gzip"})
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((f"{index}\n" for index in range(1000)), media_type="text/plain")
+
+
+client = TestClient(app)
+
+
+def test_parse_accept_encoding():
+    """Accept-Encoding の解析のテスト"""
+    assert parse_accept_encoding("gzip, deflate, br;q=0") == ["gzip", "deflate"]
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip") == "gzip"
+
+
+def test_gzip_large_response():
+    """大きいレスポンスが gzip で圧縮されるテスト"""
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BIG_BODY
+    assert response.num_bytes_downloaded < len(BIG_BODY.encode("utf-8")) // 10
+
+
+def test_brotli_preferred():
+    """brotli に対応しているクライアントには brotli で返すテスト"""
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    expected = "br" if choose_encoding("br") == "br" else "gzip"
+    assert response.headers["content-encoding"] == expected
+    assert response.text == BIG_BODY
+
+
+def test_small_and_already_encoded_responses_are_not_compressed():
+    """小さいレスポンスと圧縮済みのレスポンスはそのまま返すテスト"""
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BIG_BODY
+
+
+def test_streaming_response():
+    """StreamingResponse が逐次圧縮されるテスト"""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "".join(f"{index}\n" for index in range(1000))
+
+
+def test_product_list_uses_fast_path():
+    """商品一覧が従来と同じ形式で返るテスト"""
+    api = TestClient(main.app)
+    response = api.get("/api/products/?limit=2", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    products = response.json()
+    assert set(products[0]) == {"PRD_ID", "CODE", "NAME", "PRICE", "TAX_CD"}
+    assert products[0]["PRD_ID"] < products[1]["PRD_ID"]
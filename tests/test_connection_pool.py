@@ -0,0 +1,80 @@
+"""
+コネクションプール のテスト
+"""
+import tempfile
+import sys
+import threading
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database import create_db_engine, warm_up_pool, PoolValidator
+from app.metrics import registry as metrics_registry
+
+
+def _temp_url():
+    return f"sqlite:///{Path(tempfile.mkdtemp()) / 'pool.db'}"
+
+
+def test_warm_up_pool_opens_connections():
+    """起動時のウォームアップで接続がプールに用意されるテスト"""
+    engine = create_db_engine(_temp_url(), liveness="none", pool_size=3, max_overflow=0)
+    try:
+        assert warm_up_pool(engine, 3) == 3
+        assert engine.pool.checkedin() == 3
+        assert engine.pool.checkedout() == 0
+    finally:
+        engine.dispose()
+
+
+def test_liveness_option_controls_pre_ping():
+    """死活確認の方式による pre_ping の切り替えのテスト"""
+    url = _temp_url()
+    assert create_db_engine(url, liveness="pre_ping").pool._pre_ping is True
+    assert create_db_engine(url, liveness="background").pool._pre_ping is False
+    assert create_db_engine(url, liveness="none").pool._pre_ping is False
+
+
+def test_pool_validator_checks_idle_connections():
+    """バックグラウンドの接続確認で待機中の接続をすべて確認するテスト"""
+    engine = create_db_engine(_temp_url(), liveness="background", pool_size=4, max_overflow=0)
+    try:
+        warm_up_pool(engine, 4)
+        validator = PoolValidator(engine, interval=60)
+        assert validator.validate_once() == 0
+        assert engine.pool.checkedin() == 4
+
+        validator.start()
+        validator.stop()
+    finally:
+        engine.dispose()
+
+
+def _checkout_wait():
+    """db_pool_checkout_wait_seconds の (件数, 合計秒数)"""
+    histogram = metrics_registry.snapshot()[1].get(("db_pool_checkout_wait_seconds", ()))
+    if histogram is None:
+        return 0, 0.0
+    return sum(histogram[:-1]), histogram[-1]
+
+
+def test_checkout_wait_is_recorded():
+    """プールが空くまでの待ち時間だけを記録するテスト（接続の確立時間は含めない）"""
+    engine = create_db_engine(_temp_url(), liveness="none", pool_size=1, max_overflow=0)
+    try:
+        warm_up_pool(engine, 1)
+        before = _checkout_wait()
+        held = engine.connect()
+        waited = threading.Thread(target=lambda: engine.connect().close())
+        waited.start()
+        time.sleep(0.2)
+        held.close()
+        waited.join()
+
+        count, total = _checkout_wait()
+        assert count - before[0] == 2
+        assert 0.15 <= total - before[1] < 1.0
+    finally:
+        engine.dispose()
@@ -0,0 +1,102 @@
+"""
+ヘルスチェック のテスト
+"""
+import tempfile
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+from database import create_db_engine
+from app.health import HealthProber
+
+client = TestClient(main.app)
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _engine():
+    url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'health.db'}"
+    return create_db_engine(url, liveness="none", pool_size=2, max_overflow=0)
+
+
+def test_status_is_cached_until_interval():
+    """確認結果が interval の間は再利用されるテスト"""
+    clock = FakeClock()
+    prober = HealthProber(_engine(), interval=5, saturation_threshold=0.9, clock=clock)
+
+    first = prober.status()
+    assert first["database"] == "connected"
+    assert first["ready"] is True
+    assert first["age_seconds"] == 0
+
+    clock.now = 3
+    second = prober.status()
+    assert second["checked_at"] == first["checked_at"]
+    assert second["age_seconds"] == 3
+
+    clock.now = 10
+    assert prober.status()["age_seconds"] == 0
+
+
+def test_not_ready_when_pool_saturated():
+    """プールが使い切られている場合はDBを確認せず未完了とするテスト"""
+    engine = _engine()
+    prober = HealthProber(engine, interval=5, saturation_threshold=0.9, pool_capacity=2)
+    connections = [engine.connect(), engine.connect()]
+    try:
+        result = prober.probe_once()
+        assert result["ready"] is False
+        assert result["database"].startswith("skipped")
+        assert result["pool"]["checked_out"] == 2
+    finally:
+        for connection in connections:
+            connection.close()
+    assert prober.probe_once()["ready"] is True
+
+
+def test_background_prober_start_and_stop():
+    """バックグラウンドの確認を開始した時点で結果が用意されるテスト"""
+    prober = HealthProber(_engine(), interval=60, saturation_threshold=0.9)
+    prober.start()
+    try:
+        assert prober.status()["database"] == "connected"
+    finally:
+        prober.stop()
+
+
+def test_health_endpoints():
+    """ライブネス・レディネスのエンドポイントのテスト"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert "age_seconds" in response.json()
+
+    assert client.get("/health/live").json() == {"status": "alive"}
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_health_reports_unhealthy_when_database_unreachable(monkeypatch):
+    """DBに接続できない場合に /health が unhealthy（503）を返すテスト"""
+    engine = create_db_engine(
+        f"sqlite:///{Path(tempfile.mkdtemp()) / 'missing' / 'health.db'}", liveness="none", pool_size=1, max_overflow=0
+    )
+    monkeypatch.setattr(main, "health_prober", HealthProber(engine, interval=5, saturation_threshold=0.9))
+
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unhealthy"
+    assert response.json()["database"].startswith("error")
@@ -0,0 +1,86 @@
+"""
+取引IDのブロック採番 のテスト
+"""
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select
+from database import SessionLocal
+from models import Transaction
+from app import crud, schemas, sequences
+from app.id_allocator import BlockIdAllocator
+
+
+def _allocator(block_size=5):
+    # テストごとに別のカウンタを使う
+    return BlockIdAllocator(f"test_{uuid.uuid4().hex[:12]}", Transaction.TRD_ID, block_size=block_size)
+
+
+def test_allocate_in_blocks():
+    """ブロック内は連番で払い出し、使い切ったら次のブロックを予約するテスト"""
+    allocator = _allocator()
+    db = SessionLocal()
+    try:
+        first = allocator.allocate(db, 3)
+        second = allocator.allocate(db, 4)  # 残り2件 + 次のブロックから2件
+        assert first + second == list(range(first[0], first[0] + 7))
+        assert sequences.current_value(db, allocator.name) == first[0] + 9
+
+        # ブロックより多い件数は1回の予約で確保する
+        many = allocator.allocate(db, 12)
+        assert len(set(many)) == 12
+    finally:
+        db.close()
+
+
+def test_allocate_after_existing_transactions():
+    """カウンタ導入前（AUTO_INCREMENT）に登録された取引より後ろから払い出すテスト"""
+    allocator = _allocator()
+    db = SessionLocal()
+    try:
+        current_max = db.execute(select(func.max(Transaction.TRD_ID))).scalar() or 0
+        assert allocator.allocate(db)[0] > current_max
+    finally:
+        db.close()
+
+
+def test_workers_never_share_ids():
+    """同じカウンタを使う複数ワーカー（再起動後を含む）で重複しないテスト"""
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    workers = [BlockIdAllocator(name, Transaction.TRD_ID, block_size=5) for _ in range(4)]
+
+    def run(allocator):
+        db = SessionLocal()
+        try:
+            return [trd_id for _ in range(10) for trd_id in allocator.allocate(db, 2)]
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(run, workers))
+    # 再起動したワーカー（予約済みの範囲を持たない）
+    results.append(run(BlockIdAllocator(name, Transaction.TRD_ID, block_size=5)))
+
+    ids = [trd_id for result in results for trd_id in result]
+    assert len(ids) == len(set(ids)) == 100
+
+
+def test_purchase_uses_allocated_id():
+    """購入の取引IDが払い出したIDになり、明細も同じIDで登録されるテスト"""
+    db = SessionLocal()
+    try:
+        request = schemas.PurchaseRequest(items=[schemas.PurchaseItem(PRD_ID=1), schemas.PurchaseItem(PRD_ID=2)])
+        first = crud.create_purchase(db, request)
+        db.commit()
+        second = crud.create_purchase(db, request)
+        db.commit()
+        assert second.TRD_ID != first.TRD_ID
+        assert len(crud.get_transaction_details(db, first.TRD_ID)) == 2
+        assert crud.get_transaction(db, second.TRD_ID).TOTAL_AMT == second.TOTAL_AMT
+    finally:
+        db.close()
@@ -0,0 +1,108 @@
+"""
+購入APIの冪等キー（Idempotency-Key）のテスト
+"""
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.testclient import TestClient
+from sqlalchemy import select
+from main import app
+from database import SessionLocal
+from models import IdempotencyKey
+from app.idempotency import IdempotencyPurger, idempotency_store
+
+client = TestClient(app)
+
+purchase_data = {"items": [{"PRD_ID": 1}, {"PRD_ID": 2}]}
+
+
+def test_idempotent_retry_returns_original_response():
+    """同じキーの再送で初回のレスポンスが返るテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/api/purchase", json=purchase_data, headers=headers)
+    second = client.post("/api/purchase", json=purchase_data, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_idempotent_retry_after_memory_eviction():
+    """インメモリから消えてもDBに保存されたレスポンスが返るテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/api/purchase", json=purchase_data, headers=headers)
+    idempotency_store._cache.clear()
+    second = client.post("/api/purchase", json=purchase_data, headers=headers)
+
+    assert second.status_code == 201
+    assert second.json()["transaction_id"] == first.json()["transaction_id"]
+
+
+def test_idempotency_key_reused_with_different_request():
+    """同じキーで内容の違うリクエストは409になるテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    client.post("/api/purchase", json=purchase_data, headers=headers)
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": 3}]}, headers=headers)
+
+    assert response.status_code == 409
+
+
+def test_concurrent_duplicates_create_one_transaction():
+    """同じキーの同時リクエストで取引が1件だけ登録されるテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(
+            lambda _: client.post("/api/purchase", json=purchase_data, headers=headers),
+            range(5)
+        ))
+
+    assert all(response.status_code == 201 for response in responses)
+    assert len({response.json()["transaction_id"] for response in responses}) == 1
+
+
+def test_purchase_without_idempotency_key():
+    """キーなしの場合は毎回新しい取引になるテスト"""
+    first = client.post("/api/purchase", json=purchase_data)
+    second = client.post("/api/purchase", json=purchase_data)
+    assert first.json()["transaction_id"] != second.json()["transaction_id"]
+
+
+def test_purger_deletes_expired_keys():
+    """有効期限切れのキーだけを batch_size 件ずつ削除するテスト"""
+    expired_at = datetime.utcnow() - timedelta(seconds=idempotency_store.ttl + 60)
+    expired = [f"expired-{uuid.uuid4()}" for _ in range(5)]
+    fresh = f"fresh-{uuid.uuid4()}"
+    db = SessionLocal()
+    try:
+        db.add_all(
+            IdempotencyKey(IDEMPOTENCY_KEY=key, REQUEST_HASH="x", RESPONSE="{}", CREATED_AT=expired_at)
+            for key in expired
+        )
+        db.add(IdempotencyKey(IDEMPOTENCY_KEY=fresh, REQUEST_HASH="x", RESPONSE="{}", CREATED_AT=datetime.utcnow()))
+        db.commit()
+    finally:
+        db.close()
+
+    purger = IdempotencyPurger(idempotency_store, SessionLocal, interval=600, batch_size=2)
+    assert purger.purge_once() >= 5
+
+    db = SessionLocal()
+    try:
+        remaining = db.execute(
+            select(IdempotencyKey.IDEMPOTENCY_KEY).where(IdempotencyKey.IDEMPOTENCY_KEY.in_(expired + [fresh]))
+        ).scalars().all()
+        assert remaining == [fresh]
+    finally:
+        db.close()
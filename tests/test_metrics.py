@@ -0,0 +1,64 @@
+"""
+メトリクス のテスト
+"""
+import threading
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+from app.metrics import MetricsRegistry
+
+client = TestClient(main.app)
+
+
+def test_histogram_buckets_are_cumulative():
+    """ヒストグラムのバケットが累積値で出力されるテスト"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    labels = (("route", "/x"),)
+    for value in (0.05, 0.5, 0.5, 5.0):
+        registry.observe("latency_seconds", labels, value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{worker="' in text
+    assert 'route="/x",le="0.1"} 1' in text
+    assert 'route="/x",le="1"} 3' in text
+    assert 'route="/x",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{' in text and 'route="/x"} 4' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_counters_are_merged_across_threads():
+    """スレッドごとのシャードが出力時に合算されるテスト"""
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.inc("requests_total", (("route", "/x"),))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counters, _ = registry.snapshot()
+    assert counters[("requests_total", (("route", "/x"),))] == 4000
+
+
+def test_metrics_endpoint_records_route_template():
+    """ルートのテンプレート・ステータス別に記録されるテスト"""
+    client.get("/api/products/code/4589901001018")
+    client.get("/api/products/code/0000000000000")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'route="/api/products/code/{code}",status="200"' in text
+    assert 'route="/api/products/code/{code}",status="404"' in text
+    assert "http_request_duration_seconds_bucket{" in text
+    assert "db_pool_checked_out{" in text
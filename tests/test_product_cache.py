@@ -0,0 +1,90 @@
+"""
+商品キャッシュ のテスト
+"""
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import schemas
+from app.cache import TTLCache, ProductCache
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _product(prd_id=1, code="4589901001018", name="テクワン・消せるボールペン 黒", price=180):
+    return schemas.Product(PRD_ID=prd_id, CODE=code, NAME=name, PRICE=price)
+
+
+def test_ttl_cache_hit_and_miss():
+    """ヒット/ミス件数のテスト"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_lru_eviction():
+    """上限を超えたら最も古く参照されたエントリが破棄されるテスト"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a を最近参照したことにする
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry():
+    """TTL経過後はミスになるテスト"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_disabled():
+    """maxsize=0 ではキャッシュしないテスト"""
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_product_cache_lookup_by_code_and_id():
+    """CODE と PRD_ID の両方で引けるテスト"""
+    cache = ProductCache(maxsize=10, ttl=60)
+    product = _product()
+    cache.put(product)
+    assert cache.get_by_code("4589901001018") == product
+    assert cache.get_by_id(1) == product
+
+
+def test_product_cache_invalidate_removes_both_keys():
+    """片方のキーで無効化すると両方のキーから削除されるテスト"""
+    cache = ProductCache(maxsize=10, ttl=60)
+    cache.put(_product())
+    cache.invalidate(product_id=1)
+    assert cache.get_by_code("4589901001018") is None
+    assert cache.get_by_id(1) is None
+
+    cache.put(_product())
+    cache.invalidate(code="4589901001018")
+    assert cache.get_by_id(1) is None
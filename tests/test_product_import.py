@@ -0,0 +1,92 @@
+"""
+商品マスタ一括取り込み のテスト
+"""
+import io
+import json
+import uuid
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+
+client = TestClient(main.app)
+
+
+def _codes(count):
+    prefix = uuid.uuid4().hex[:8]
+    return [f"{prefix}{index:05d}" for index in range(count)]
+
+
+def _upload(filename, content, **params):
+    files = {"file": (filename, io.BytesIO(content.encode("utf-8")))}
+    return client.post("/api/products/import", files=files, params=params)
+
+
+def test_import_csv_insert_update_unchanged():
+    """CSVの取り込みで追加・更新・変更なしを数えるテスト"""
+    codes = _codes(3)
+    csv_text = "CODE,NAME,PRICE\n" + "".join(f"{code},取り込み商品{index},{100 + index}\n" for index, code in enumerate(codes))
+    response = _upload("products.csv", csv_text)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["unchanged"], result["rejected"]) == (3, 0, 0, 0)
+
+    csv_text = (
+        "CODE,NAME,PRICE\n"
+        f"{codes[0]},取り込み商品0,100\n"      # 変更なし
+        f"{codes[1]},取り込み商品1,999\n"      # 価格変更
+        f"{codes[2]},,100\n"                   # 名称なし
+        f"{codes[2]},取り込み商品2,-1\n"       # 負の価格
+    )
+    result = _upload("products.csv", csv_text).json()
+    assert (result["inserted"], result["updated"], result["unchanged"], result["rejected"]) == (0, 1, 1, 2)
+    assert [error["line"] for error in result["errors"]] == [4, 5]
+
+    response = client.get(f"/api/products/code/{codes[1]}")
+    assert response.json()["PRICE"] == 999
+
+
+def test_import_ndjson_bumps_catalog_version():
+    """NDJSONの取り込みがカタログの差分に反映されるテスト"""
+    since = client.get("/api/catalog/version").json()["version"]
+    codes = _codes(5)
+    lines = [json.dumps({"CODE": code, "NAME": "NDJSON商品", "PRICE": 200}, ensure_ascii=False) for code in codes]
+    lines.append("{not json")
+    response = _upload("products.ndjson", "\n".join(lines) + "\n")
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 5
+    assert result["rejected"] == 1
+
+    delta = client.get(f"/api/catalog/delta?since={since}").json()
+    assert {product["CODE"] for product in delta["products"]} >= set(codes)
+
+
+def test_import_rejects_unknown_format_and_bad_header():
+    """形式が判定できない・ヘッダが不足しているファイルは400のテスト"""
+    assert _upload("products.txt", "CODE,NAME,PRICE\n").status_code == 400
+    assert _upload("products.csv", "CODE,PRICE\n123,100\n").status_code == 400
+    assert _upload("products.txt", "CODE,NAME,PRICE\n", format="csv").status_code == 200
+
+
+def test_import_tax_cd():
+    """TAX_CD 列の取り込みと、TAX_CD のない行で既存の消費税区分を変えないテスト"""
+    codes = _codes(2)
+    csv_text = f"CODE,NAME,PRICE,TAX_CD\n{codes[0]},おにぎり,150,08\n{codes[1]},ノート,200,\n"
+    result = _upload("products.csv", csv_text).json()
+    assert (result["inserted"], result["rejected"]) == (2, 0)
+    assert client.get(f"/api/products/code/{codes[0]}").json()["TAX_CD"] == "08"
+    assert client.get(f"/api/products/code/{codes[1]}").json()["TAX_CD"] == "10"
+
+    csv_text = f"CODE,NAME,PRICE\n{codes[0]},おにぎり,160\n"
+    result = _upload("products.csv", csv_text).json()
+    assert result["updated"] == 1
+    product = client.get(f"/api/products/code/{codes[0]}").json()
+    assert (product["PRICE"], product["TAX_CD"]) == (160, "08")
+
+    result = _upload("products.csv", f"CODE,NAME,PRICE,TAX_CD\n{codes[1]},ノート,200,99\n").json()
+    assert result["rejected"] == 1
@@ -1,6 +1,8 @@
 """
 商品API のテスト
 """
+import base64
+import json
 import sys
 from pathlib import Path
 
@@ -9,6 +11,11 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from starlette.testclient import TestClient
 from main import app
+from config import settings
+from database import engine
+from app.cache import product_cache
+from app.pagination import encode_cursor
+from app.query_stats import count_queries
 
 client = TestClient(app)
 
@@ -78,3 +85,67 @@ def test_get_products_with_pagination():
     assert isinstance(data, list)
     assert len(data) <= 2
 
+
+
+def test_get_products_with_cursor():
+    """カーソル（キーセット）方式で全商品をたどるテスト"""
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/products/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) <= 2
+        seen.extend(product["PRD_ID"] for product in data)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) >= 5
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen))
+
+
+def test_get_products_with_invalid_cursor():
+    """不正なカーソルで400になるテスト"""
+    response = client.get("/api/products/?cursor=invalid")
+    assert response.status_code == 400
+
+
+def test_get_products_with_forged_cursor():
+    """型の合わない値を詰めた（改ざんされた）カーソルで400になるテスト"""
+    for forged in ({"id": "1 OR 1=1"}, {"id": [1]}, {"id": True}, {"id": None}):
+        cursor = base64.urlsafe_b64encode(json.dumps(forged).encode("utf-8")).decode("ascii").rstrip("=")
+        response = client.get("/api/products/", params={"cursor": cursor})
+        assert response.status_code == 400
+
+    forged = encode_cursor({"dt": 12345, "id": 1})
+    assert client.get("/api/transactions/", params={"cursor": forged}).status_code == 400
+
+
+def test_lookup_products():
+    """商品一括検索のテスト（見つからないコード・IDも返す）"""
+    product_cache.clear()
+    payload = {
+        "codes": ["4589901001018", "0000000000000", "4589901001018"],
+        "ids": [2, 999999],
+    }
+    with count_queries(engine) as counter:
+        response = client.post("/api/products/lookup", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert [product["PRD_ID"] for product in data["products"]][0] == 2
+    assert "4589901001018" in [product["CODE"] for product in data["products"]]
+    assert data["missing_codes"] == ["0000000000000"]
+    assert data["missing_ids"] == [999999]
+    assert counter.count == 1
+
+
+def test_lookup_products_validation():
+    """商品一括検索の件数チェックのテスト"""
+    assert client.post("/api/products/lookup", json={}).status_code == 400
+    too_many = {"codes": [f"{index:013d}" for index in range(settings.PRODUCT_LOOKUP_MAX_ITEMS + 1)]}
+    assert client.post("/api/products/lookup", json=too_many).status_code == 400
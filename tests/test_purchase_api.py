@@ -2,13 +2,18 @@
 購入API のテスト
 """
 import sys
+import uuid
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from starlette.testclient import TestClient
+from sqlalchemy import update
 from main import app
+from database import SessionLocal
+from models import ProductMaster
+from app import crud, sequences
 
 client = TestClient(app)
 
@@ -30,7 +35,7 @@ def test_purchase_success():
     assert "transaction_id" in data
     assert data["transaction_id"] > 0
     assert data["total_amount"] == 630  # 180 + 450
-    assert data["total_amount_ex_tax"] == 630
+    assert data["total_amount_ex_tax"] == 573  # 630 - 630 × 10/110（切り捨て）
     assert data["items_count"] == 2
 
 
@@ -97,3 +102,82 @@ def test_purchase_high_value():
     data = response.json()
     assert data["total_amount"] == 24000  # 12000 * 2
 
+
+
+def test_purchase_slim_payload():
+    """PRD_ID または CODE だけを送る購入テスト"""
+    purchase_data = {
+        "items": [
+            {"PRD_ID": 1},
+            {"CODE": "4589901001025"}
+        ]
+    }
+
+    response = client.post("/api/purchase", json=purchase_data)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["total_amount"] == 630  # 180 + 450（商品マスタの単価）
+    assert data["items_count"] == 2
+
+
+def test_purchase_uses_master_price():
+    """端末から送られた単価ではなく商品マスタの単価で計算されるテスト"""
+    purchase_data = {
+        "items": [
+            {"PRD_ID": 1, "CODE": "4589901001018", "NAME": "改ざんされた商品名", "PRICE": 1}
+        ]
+    }
+
+    response = client.post("/api/purchase", json=purchase_data)
+
+    assert response.status_code == 201
+    assert response.json()["total_amount"] == 180
+
+
+def test_purchase_sees_price_changed_by_other_worker():
+    """他ワーカーで変更された単価（このワーカーのキャッシュは無効化されていない）が次の購入に反映されるテスト"""
+    db = SessionLocal()
+    try:
+        product = crud.create_product(db, code=uuid.uuid4().hex[:13], name="価格改定の商品", price=300)
+        product_id = product.PRD_ID
+    finally:
+        db.close()
+    # キャッシュに載せる
+    assert client.post("/api/purchase", json={"items": [{"PRD_ID": product_id}]}).json()["total_amount"] == 300
+
+    # 他ワーカーでの更新（このワーカーの product_cache.invalidate は呼ばれない）
+    db = SessionLocal()
+    try:
+        db.execute(update(ProductMaster).where(ProductMaster.PRD_ID == product_id).values(
+            PRICE=350, VERSION=sequences.next_value(db, sequences.CATALOG_VERSION),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": product_id}]})
+    assert response.json()["total_amount"] == 350
+    response = client.post("/api/purchase/batch", json={"sales": [{"items": [{"PRD_ID": product_id}]}]})
+    assert response.json()["results"][0]["total_amount"] == 350
+
+
+def test_purchase_unknown_product():
+    """存在しない商品を含む購入でエラーになるテスト"""
+    purchase_data = {
+        "items": [
+            {"PRD_ID": 1},
+            {"CODE": "9999999999999"}
+        ]
+    }
+
+    response = client.post("/api/purchase", json=purchase_data)
+
+    assert response.status_code == 400
+    assert "9999999999999" in response.json()["detail"]
+
+
+def test_purchase_item_without_key():
+    """PRD_ID も CODE もない明細でバリデーションエラーになるテスト"""
+    response = client.post("/api/purchase", json={"items": [{"NAME": "名前だけ", "PRICE": 100}]})
+    assert response.status_code == 422
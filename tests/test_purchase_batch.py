@@ -0,0 +1,68 @@
+"""
+一括購入API のテスト
+"""
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def test_purchase_batch_success():
+    """一括購入成功のテスト"""
+    batch_data = {
+        "sales": [
+            {"items": [{"PRD_ID": 1}, {"PRD_ID": 2}]},
+            {"items": [{"CODE": "4589901001032"}], "store_cd": "ST001", "pos_no": "P01"},
+            {"items": [{"PRD_ID": 5}, {"PRD_ID": 5}]}
+        ]
+    }
+
+    response = client.post("/api/purchase/batch", json=batch_data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 3
+    assert data["failed"] == 0
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert [result["total_amount"] for result in data["results"]] == [630, 800, 24000]
+    transaction_ids = [result["transaction_id"] for result in data["results"]]
+    assert len(set(transaction_ids)) == 3
+
+
+def test_purchase_batch_partial_failure():
+    """不正な購入があっても他の購入は登録されるテスト"""
+    batch_data = {
+        "sales": [
+            {"items": [{"PRD_ID": 1}]},
+            {"items": []},
+            {"items": [{"CODE": "9999999999999"}]},
+            {"items": [{"PRD_ID": 4}]}
+        ]
+    }
+
+    response = client.post("/api/purchase/batch", json=batch_data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 2
+    results = data["results"]
+    assert results[0]["success"] is True
+    assert results[1]["success"] is False
+    assert results[1]["error"] == "Purchase list cannot be empty"
+    assert results[2]["success"] is False
+    assert "9999999999999" in results[2]["error"]
+    assert results[3]["success"] is True
+    assert results[3]["total_amount"] == 320
+
+
+def test_purchase_batch_empty():
+    """空の一括購入でエラーになるテスト"""
+    response = client.post("/api/purchase/batch", json={"sales": []})
+    assert response.status_code == 400
@@ -0,0 +1,245 @@
+"""
+購入ジャーナル（PURCHASE_JOURNAL_ENABLED）のテスト
+"""
+import sys
+import uuid
+from pathlib import Path
+
+import orjson
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.testclient import TestClient
+from sqlalchemy import func, select
+from main import app
+from database import SessionLocal
+from models import IdempotencyKey, Transaction, TransactionDetail
+from app import crud, journal as journal_module, schemas
+from app.idempotency import idempotency_store, request_fingerprint
+from app.journal import FAILED_FILE, KEYS_DIR, PurchaseJournal, journal_key
+from routers import purchase
+
+client = TestClient(app)
+
+purchase_data = {"items": [{"PRD_ID": 1}, {"PRD_ID": 2}]}
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    journal = PurchaseJournal(tmp_path, SessionLocal)
+    journal.open()
+    monkeypatch.setattr(purchase, "purchase_journal", journal)
+    yield journal
+    journal.close()
+
+
+def _count_journal_rows(journal_id):
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(func.count()).select_from(IdempotencyKey).where(IdempotencyKey.IDEMPOTENCY_KEY == journal_key(journal_id))
+        ).scalar_one()
+    finally:
+        db.close()
+
+
+def test_purchase_is_accepted_then_flushed(journal):
+    """ジャーナルに記録した時点で202を返し、フラッシュ後に取引として登録されるテスト"""
+    response = client.post("/api/purchase", json=purchase_data)
+    assert response.status_code == 202
+    data = response.json()
+    assert data["transaction_id"] is None
+    assert data["items_count"] == 2
+    journal_id = data["journal_id"]
+
+    assert client.get(f"/api/purchase/journal/{journal_id}").json()["status"] == "pending"
+
+    assert journal.flush_once() == 1
+    status = client.get(f"/api/purchase/journal/{journal_id}").json()
+    assert status["status"] == "committed"
+
+    db = SessionLocal()
+    try:
+        transaction = db.get(Transaction, status["transaction_id"])
+        assert transaction.TOTAL_AMT == data["total_amount"]
+        details = db.execute(
+            select(func.count()).select_from(TransactionDetail).where(TransactionDetail.TRD_ID == transaction.TRD_ID)
+        ).scalar_one()
+        assert details == 2
+    finally:
+        db.close()
+
+    # 登録済みの分は再び登録しない
+    assert journal.flush_once() == 0
+
+
+def test_unknown_product_is_rejected_before_journal(journal):
+    """存在しない商品はジャーナルに記録せず400を返すテスト"""
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": 999999999}]})
+    assert response.status_code == 400
+    assert journal.flush_once() == 0
+
+
+def test_idempotent_retry_while_pending(journal):
+    """DB登録前の再送でも同じ journal_id が返り、登録は1件だけになるテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/api/purchase", json=purchase_data, headers=headers)
+    second = client.post("/api/purchase", json=purchase_data, headers=headers)
+    assert second.status_code == 202
+    assert second.json()["journal_id"] == first.json()["journal_id"]
+
+    assert journal.flush_once() == 1
+    # 登録後はDBに保存したレスポンス（取引ID付き）が返る
+    idempotency_store._cache.clear()
+    third = client.post("/api/purchase", json=purchase_data, headers=headers)
+    assert third.status_code == 201
+    assert third.json()["transaction_id"] is not None
+    assert third.json()["journal_id"] == first.json()["journal_id"]
+
+
+def test_idempotent_retry_on_other_worker(journal, tmp_path, monkeypatch):
+    """DB登録前の再送が別のワーカーに届いても同じ journal_id が返り、登録は1件だけになるテスト"""
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/api/purchase", json=purchase_data, headers=headers)
+    assert len(list((tmp_path / KEYS_DIR).iterdir())) == 1
+
+    # 同じディレクトリを使う別のワーカー（メモリ上の冪等キーは持っていない）
+    other = PurchaseJournal(tmp_path, SessionLocal)
+    other.open()
+    monkeypatch.setattr(purchase, "purchase_journal", other)
+    idempotency_store._cache.clear()
+    try:
+        second = client.post("/api/purchase", json=purchase_data, headers=headers)
+        assert second.status_code == 202
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert second.json()["journal_id"] == first.json()["journal_id"]
+        conflict = client.post("/api/purchase", json={"items": [{"PRD_ID": 3}]}, headers=headers)
+        assert conflict.status_code == 409
+        assert other.flush_once() == 0
+    finally:
+        other.close()
+
+    assert journal.flush_once() == 1
+    # 登録後は記録を削除し、DBに保存したレスポンスを返す
+    assert list((tmp_path / KEYS_DIR).iterdir()) == []
+
+
+def test_key_is_claimed_before_append(journal, tmp_path, monkeypatch):
+    """冪等キーはジャーナルへの書き込み前に確保し、書き込み後にレスポンスで置き換えるテスト"""
+    append = journal.append
+    claims = []
+
+    def checked_append(*args):
+        claims.append(orjson.loads(next((tmp_path / KEYS_DIR).iterdir()).read_bytes()))
+        return append(*args)
+
+    monkeypatch.setattr(journal, "append", checked_append)
+    response = client.post("/api/purchase", json=purchase_data, headers={"Idempotency-Key": str(uuid.uuid4())})
+    assert response.status_code == 202
+    assert claims[0]["response"] is None
+    entry = orjson.loads(next((tmp_path / KEYS_DIR).iterdir()).read_bytes())
+    assert entry["response"]["journal_id"] == response.json()["journal_id"]
+    assert journal.flush_once() == 1
+
+
+def test_pending_claim_blocks_retry_until_stale(journal, monkeypatch):
+    """確保中（書き込み前）の冪等キーへの再送は409になり、確保したワーカーが停止していれば引き継ぐテスト"""
+    key = str(uuid.uuid4())
+    fingerprint = request_fingerprint(schemas.PurchaseRequest.model_validate(purchase_data))
+    other = PurchaseJournal(journal.directory, SessionLocal)
+    assert other._claim_key(key, fingerprint) is None
+
+    monkeypatch.setattr(journal_module, "KEY_CLAIM_WAIT_SECONDS", 0.05)
+    response = client.post("/api/purchase", json=purchase_data, headers={"Idempotency-Key": key})
+    assert response.status_code == 409
+    assert journal.flush_once() == 0
+
+    monkeypatch.setattr(journal_module, "KEY_CLAIM_STALE_SECONDS", 0)
+    response = client.post("/api/purchase", json=purchase_data, headers={"Idempotency-Key": key})
+    assert response.status_code == 202
+    assert "Idempotent-Replayed" not in response.headers
+    assert journal.flush_once() == 1
+
+
+def _resolved_request(prd_id=1):
+    request = schemas.PurchaseRequest(items=[schemas.PurchaseItem(PRD_ID=prd_id)])
+    db = SessionLocal()
+    try:
+        return request, crud.resolve_purchase(db, request)
+    finally:
+        db.close()
+
+
+def test_replay_after_restart(tmp_path):
+    """停止前に登録できなかった購入が、次の起動時に1回だけ登録されるテスト"""
+    request, products = _resolved_request()
+    first = PurchaseJournal(tmp_path, SessionLocal)
+    first.open()
+    journal_ids = [first.append(request, products)[0] for _ in range(3)]
+    first.close()  # 登録せずに停止
+
+    segment = next(tmp_path.glob("journal-*.log"))
+    content = segment.read_bytes()
+
+    second = PurchaseJournal(tmp_path, SessionLocal, batch_size=2)
+    second.open()
+    try:
+        assert second.flush_once() == 3
+        assert not segment.exists()  # 再生し終えたファイルは削除する
+
+        # コミット後・チェックポイント記録前に停止した場合（チェックポイントなしで同じ内容が残る）も二重に登録しない
+        segment.write_bytes(content)
+        assert second.flush_once() == 0
+        assert not segment.exists()
+    finally:
+        second.close()
+
+    for journal_id in journal_ids:
+        assert _count_journal_rows(journal_id) == 1
+
+
+def test_incomplete_and_invalid_records(tmp_path):
+    """書き込み途中の末尾の行は登録せず、解析できない行は退避して先へ進むテスト"""
+    request, products = _resolved_request()
+    first = PurchaseJournal(tmp_path, SessionLocal)
+    first.open()
+    with open(first._segment.path, "ab") as f:
+        f.write(b"not a journal record\n")
+    journal_id, _ = first.append(request, products)
+    with open(first._segment.path, "ab") as f:
+        f.write(b'{"journal_id": "trunc')
+    first.close()
+
+    second = PurchaseJournal(tmp_path, SessionLocal)
+    second.open()
+    try:
+        assert second.flush_once() == 1
+    finally:
+        second.close()
+
+    assert _count_journal_rows(journal_id) == 1
+    assert "not a journal record" in (tmp_path / FAILED_FILE).read_text()
+    assert list(tmp_path.glob("journal-*.log")) == []
+
+
+def test_duplicate_and_failed_records_are_terminal(journal):
+    """同時に記録された同じ冪等キーの購入は duplicate、登録できない購入は failed になるテスト"""
+    request, products = _resolved_request()
+    key = str(uuid.uuid4())
+    fingerprint = request_fingerprint(request)
+    # 2つのワーカーが同時に記録した場合（どちらも記録前の確認をすり抜けた）
+    first_id, _ = journal.append(request, products, key, fingerprint)
+    second_id, _ = journal.append(request, products, key, fingerprint)
+    unknown_tax = [product.model_copy(update={"TAX_CD": "99"}) for product in products]
+    failed_id, _ = journal.append(request, unknown_tax)
+
+    assert journal.flush_once() == 1
+    first = client.get(f"/api/purchase/journal/{first_id}").json()
+    assert first["status"] == "committed"
+    second = client.get(f"/api/purchase/journal/{second_id}").json()
+    assert second["status"] == "duplicate"
+    assert second["transaction_id"] == first["transaction_id"]
+    assert client.get(f"/api/purchase/journal/{failed_id}").json()["status"] == "failed"
+    assert failed_id in (journal.directory / FAILED_FILE).read_text()
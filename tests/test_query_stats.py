@@ -0,0 +1,47 @@
+"""
+SQL実行の計測 のテスト
+"""
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+from database import engine
+from app.query_stats import assert_max_queries, count_queries, normalize_sql
+
+client = TestClient(main.app)
+
+
+def test_normalize_sql():
+    """リテラルとプレースホルダ列の正規化のテスト"""
+    sql = "SELECT * FROM product_master\n  WHERE CODE = '4589901001018' AND PRD_ID IN (%s, %s, %s) LIMIT 10"
+    assert normalize_sql(sql) == "SELECT * FROM product_master WHERE CODE = ? AND PRD_ID IN (?, ...) LIMIT ?"
+
+
+def test_server_timing_header():
+    """レスポンスにSQLの実行数と合計時間が付与されるテスト"""
+    response = client.get("/api/products/?limit=5")
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+
+def test_cached_product_lookup_issues_no_queries():
+    """キャッシュ済みの商品コード検索でSQLが実行されないテスト"""
+    client.get("/api/products/code/4589901001018")
+    with count_queries(engine) as counter:
+        response = client.get("/api/products/code/4589901001018")
+    assert response.status_code == 200
+    assert counter.count == 0
+
+
+def test_purchase_round_trips():
+    """購入1件あたりのSQL実行数が増えていないことのテスト"""
+    payload = {"items": [{"PRD_ID": 1}, {"PRD_ID": 2}, {"CODE": "4589901001018"}]}
+    # 商品解決・取引・明細・日次集計2件
+    with assert_max_queries(engine, 5):
+        response = client.post("/api/purchase", json=payload)
+    assert response.status_code == 201
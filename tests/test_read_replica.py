@@ -0,0 +1,178 @@
+"""
+読み取りレプリカへの振り分け（app.replica）のテスト
+プライマリ（DATABASE_URL）とは別のSQLiteファイルをレプリカに見立てる
+"""
+import asyncio
+import tempfile
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import main
+from database import Base, SessionLocal, create_db_engine, to_async_url
+from models import DailySales, ProductMaster
+from app import crud, crud_async, replica, sequences
+from app.cache import product_cache
+from app.replica import ReplicaMonitor
+
+client = TestClient(main.app)
+
+# レプリカにだけ存在する商品（プライマリとの区別用）
+REPLICA_PRD_ID = 990000001
+REPLICA_CODE = "9900000000017"
+REPORT_DATE = date(2001, 1, 2)
+
+
+class FakeClock:
+    """テスト用の時計（壁時計）"""
+
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _replica_sessions(path: Path, create_tables: bool = False) -> sessionmaker:
+    engine = create_db_engine(f"sqlite:///{path}", liveness="none", pool_size=2, max_overflow=0)
+    if create_tables:
+        Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine, info={"read_replica": True})
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def monitor(clock, monkeypatch):
+    sessions = _replica_sessions(Path(tempfile.mkdtemp()) / "replica.db", create_tables=True)
+    with sessions() as db:
+        db.add(ProductMaster(PRD_ID=REPLICA_PRD_ID, CODE=REPLICA_CODE, NAME="レプリカの商品", PRICE=100, VERSION=0))
+        db.add(DailySales(SALES_DATE=REPORT_DATE, STORE_CD="R1", POS_NO="P01", SALES_CNT=3, TOTAL_AMT=300, TTL_AMT_EX_TAX=273))
+        db.commit()
+    monitor = ReplicaMonitor(SessionLocal, sessions, max_lag=30, interval=5, clock=clock)
+    monkeypatch.setattr(replica, "replica_monitor", monitor)
+    return monitor
+
+
+def _replicate_heartbeat(monitor: ReplicaMonitor, clock: FakeClock) -> None:
+    """プライマリに書いたハートビートがレプリカに届いた状態にする"""
+    with monitor.replica() as db:
+        sequences.set_value(db, sequences.REPLICA_HEARTBEAT, int(clock.now * 1000))
+        db.commit()
+
+
+def test_reads_land_on_replica(monitor, clock):
+    """レプリカが遅れていなければ、商品の参照とレポートはレプリカから読むテスト"""
+    _replicate_heartbeat(monitor, clock)
+    clock.now += 2
+    assert monitor.check_once() == {
+        "database": "connected", "lag_seconds": 2.0, "max_lag_seconds": 30, "use_replica": True,
+    }
+
+    response = client.get(f"/api/products/{REPLICA_PRD_ID}")
+    assert response.status_code == 200
+    assert response.json()["NAME"] == "レプリカの商品"
+    assert client.get(f"/api/products/code/{REPLICA_CODE}").status_code == 200
+    # レプリカから読んだ商品はキャッシュしない
+    assert product_cache.get_by_id(REPLICA_PRD_ID) is None
+
+    report = client.get("/api/reports/daily", params={"sales_date": REPORT_DATE.isoformat()}).json()
+    assert report["sales_count"] == 3
+
+    # 書き込み（購入）は常にプライマリ
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": REPLICA_PRD_ID}]})
+    assert response.status_code == 400
+
+    assert client.get("/health").json()["read_replica"]["use_replica"] is True
+
+
+def test_falls_back_to_primary_when_lagging(monitor, clock):
+    """遅延がしきい値を超えたらプライマリから読み、追いついたらレプリカに戻るテスト"""
+    _replicate_heartbeat(monitor, clock)
+    clock.now += 31
+    result = monitor.check_once()
+    assert result["use_replica"] is False
+    assert result["lag_seconds"] == 31.0
+    assert client.get(f"/api/products/{REPLICA_PRD_ID}").status_code == 404
+
+    _replicate_heartbeat(monitor, clock)
+    monitor.check_once()
+    assert client.get(f"/api/products/{REPLICA_PRD_ID}").status_code == 200
+
+
+def test_falls_back_to_primary_when_unreachable(clock, monkeypatch):
+    """レプリカに接続できない（ハートビートが読めない）場合はプライマリから読むテスト"""
+    sessions = _replica_sessions(Path(tempfile.mkdtemp()) / "missing" / "replica.db")
+    monitor = ReplicaMonitor(SessionLocal, sessions, max_lag=30, interval=5, clock=clock)
+    monkeypatch.setattr(replica, "replica_monitor", monitor)
+
+    result = monitor.status()
+    assert result["database"].startswith("error:")
+    assert result["use_replica"] is False
+    assert client.get("/api/products/1").status_code == 200
+
+
+def test_replica_reads_are_not_cached_by_any_lookup(monitor):
+    """一括解決（同期・非同期）でも、レプリカから読んだ商品はキャッシュに載せないテスト"""
+    with monitor.replica() as db:
+        assert crud.resolve_products(db, product_ids=[REPLICA_PRD_ID]).get(product_id=REPLICA_PRD_ID) is not None
+    assert product_cache.get_by_id(REPLICA_PRD_ID) is None
+
+    engine = create_async_engine(to_async_url(str(monitor.replica.kw["bind"].url)), poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, info={"read_replica": True})
+
+    async def lookup():
+        async with sessions() as db:
+            resolved = await crud_async.resolve_products(db, codes=[REPLICA_CODE])
+            product = await crud_async.get_product_by_id(db, REPLICA_PRD_ID)
+        await engine.dispose()
+        return resolved.get(code=REPLICA_CODE), product
+
+    resolved, product = asyncio.run(lookup())
+    assert resolved is not None and product is not None
+    assert product_cache.get_by_id(REPLICA_PRD_ID) is None
+    assert product_cache.get_by_code(REPLICA_CODE) is None
+
+
+def test_async_reads_follow_replica_lag(monitor, clock, monkeypatch):
+    """非同期モードの読み取り（get_async_read_db）も遅延の確認に従ってレプリカとプライマリを切り替えるテスト"""
+    replica_engine = create_async_engine(to_async_url(str(monitor.replica.kw["bind"].url)), poolclass=NullPool)
+    primary_engine = create_async_engine(to_async_url(str(SessionLocal.kw["bind"].url)), poolclass=NullPool)
+    monitor.async_replica = async_sessionmaker(replica_engine, expire_on_commit=False, info={"read_replica": True})
+    monkeypatch.setattr(replica, "AsyncSessionLocal", async_sessionmaker(primary_engine, expire_on_commit=False))
+
+    async def read_product():
+        sessions = replica.get_async_read_db()
+        db = await sessions.__anext__()
+        try:
+            return await crud_async.get_product_by_id(db, REPLICA_PRD_ID)
+        finally:
+            await sessions.aclose()
+
+    _replicate_heartbeat(monitor, clock)
+    clock.now += 2
+    monitor.check_once()
+    assert asyncio.run(read_product()).NAME == "レプリカの商品"
+    assert product_cache.get_by_id(REPLICA_PRD_ID) is None
+
+    clock.now += 60
+    monitor.check_once()
+    assert asyncio.run(read_product()) is None
+
+    async def dispose():
+        await replica_engine.dispose()
+        await primary_engine.dispose()
+
+    asyncio.run(dispose())
@@ -0,0 +1,65 @@
+"""
+売上レポートAPI のテスト
+"""
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.testclient import TestClient
+from main import app
+from app.rollup import sales_date_of
+
+client = TestClient(app)
+
+
+def _today() -> str:
+    return sales_date_of(datetime.utcnow()).isoformat()
+
+
+def test_daily_report_updated_by_purchase():
+    """購入で日次締めレポートが加算されるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 1}, {"PRD_ID": 2}], "store_cd": store_cd, "pos_no": "P01"})
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 1}], "store_cd": store_cd, "pos_no": "P02"})
+    client.post("/api/purchase/batch", json={"sales": [{"items": [{"PRD_ID": 3}], "store_cd": store_cd, "pos_no": "P02"}]})
+
+    response = client.get("/api/reports/daily", params={"sales_date": _today(), "store_cd": store_cd})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sales_count"] == 3
+    assert data["total_amount"] == 630 + 180 + 800
+    assert [(row["POS_NO"], row["SALES_CNT"]) for row in data["by_pos"]] == [("P01", 1), ("P02", 2)]
+
+
+def test_daily_product_report():
+    """商品別の販売数量が集計されるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 1}, {"PRD_ID": 1}, {"PRD_ID": 4}], "store_cd": store_cd})
+
+    response = client.get("/api/reports/daily/products", params={"sales_date": _today(), "store_cd": store_cd})
+
+    assert response.status_code == 200
+    products = response.json()["products"]
+    assert products == [
+        {"PRD_ID": 1, "QTY": 2, "AMT": 360},
+        {"PRD_ID": 4, "QTY": 1, "AMT": 320},
+    ]
+
+
+def test_rebuild_daily_sales():
+    """再計算で取引・明細から同じ集計が作り直されるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 2}], "store_cd": store_cd})
+    before = client.get("/api/reports/daily", params={"sales_date": _today(), "store_cd": store_cd}).json()
+
+    response = client.post("/api/reports/daily/rebuild", params={"date_from": _today(), "date_to": _today()})
+    assert response.status_code == 200
+    assert response.json()["transactions"] >= 1
+
+    after = client.get("/api/reports/daily", params={"sales_date": _today(), "store_cd": store_cd}).json()
+    assert after == before
@@ -0,0 +1,265 @@
+"""
+商品名検索 のテスト
+"""
+import io
+import random
+import threading
+import uuid
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+import main
+from database import SessionLocal, engine
+from app import crud, schemas
+from app.catalog_import import import_products
+from app.query_stats import count_queries
+from app import search
+from app.search import ProductSearchIndex, normalize, product_search
+
+client = TestClient(main.app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _product(prd_id, code, name, price=100):
+    return schemas.Product(PRD_ID=prd_id, CODE=code, NAME=name, PRICE=price)
+
+
+def _index(products):
+    index = ProductSearchIndex()
+    index.load(products, version=0)
+    return index
+
+
+def _unique_word():
+    # 他のテストの商品と衝突しない検索語（カタカナ）
+    return "".join("アイウエオカキクケコサシスセソタチツテト"[int(c, 16)] for c in uuid.uuid4().hex[:8])
+
+
+def test_normalize():
+    """全角・半角、ひらがな・カタカナ、大文字・小文字、空白の正規化のテスト"""
+    assert normalize("ﾎﾞｰﾙﾍﾟﾝ　ＢＬＡＣＫ") == "ボールペンblack"
+    assert normalize("ぼーるぺん") == normalize("ボールペン")
+
+
+def test_search_ranking():
+    """コード一致 → 名称前方一致 → 部分一致（位置・長さ順）の順位のテスト"""
+    index = _index([
+        _product(1, "4900000000011", "油性ボールペン 黒"),
+        _product(2, "4900000000028", "ボールペン 赤"),
+        _product(3, "4900000000035", "ボールペン替芯"),
+        _product(4, "4900000000042", "付箋 75mm"),
+    ])
+    assert [p.PRD_ID for p in index.search("ぼーるぺん")] == [2, 3, 1]
+    assert [p.PRD_ID for p in index.search("ボールペン 黒")] == [1]
+    assert [p.PRD_ID for p in index.search("付")] == [4]
+    assert [p.PRD_ID for p in index.search("4900000000042")] == [4]
+    assert [p.PRD_ID for p in index.search("49000000000", limit=2)] == [1, 2]
+    assert index.search("万年筆") == []
+    assert index.search("   ") == []
+
+
+def test_put_and_remove():
+    """追加・名称変更・削除がインデックスに反映されるテスト"""
+    index = _index([_product(1, "4900000000011", "ボールペン")])
+    index.put(_product(2, "4900000000028", "シャープペン"))
+    assert [p.PRD_ID for p in index.search("ペン")] == [1, 2]
+
+    index.put(_product(1, "4900000000011", "消しゴム"))
+    assert [p.PRD_ID for p in index.search("ペン")] == [2]
+    assert [p.NAME for p in index.search("4900000000011")] == ["消しゴム"]
+
+    index.remove(2)
+    assert index.search("ペン") == []
+    assert index.search("4900000000028") == []
+
+
+def test_search_matches_full_scan(monkeypatch):
+    """ヒットが多い語・まばらな語・構築後の変更を含めて、全件照合と同じ結果になるテスト"""
+    # 照合件数の上限を下げて、積集合で絞り込む経路も通す
+    monkeypatch.setattr(search, "_WALK_LIMIT", 100)
+    rng = random.Random(0)
+    words = ["ボールペン", "替芯", "消しゴム", "ノート", "黒", "赤", "0.5mm", "ミニ", "徳用"]
+    products = [
+        _product(prd_id, f"49{prd_id:011d}", " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))))
+        for prd_id in range(1, 8001)
+    ]
+    index = _index(products[:6000])
+    for product in products[6000:]:
+        index.put(product)
+    for prd_id in range(1, 8001, 7):
+        index.remove(prd_id)
+    live = {product.PRD_ID: normalize(product.NAME) for product in products if product.PRD_ID % 7 != 1}
+
+    for query in ["ボールペン", "替芯 0.5", "ミニ 徳用 黒", "ゴム", "赤", "ノート 替芯 赤 ミニ"]:
+        terms = [normalize(term) for term in query.split()]
+        expected = sorted(
+            (name.find(terms[0]), len(name), prd_id)
+            for prd_id, name in live.items()
+            if all(term in name for term in terms)
+        )[:20]
+        assert [p.PRD_ID for p in index.search(query)] == [prd_id for _, _, prd_id in expected], query
+
+
+def test_compaction():
+    """差分がたまるとインデックスを作り直し、検索結果は変わらないテスト"""
+    index = _index([_product(1, "4900000000011", "ボールペン")])
+    for prd_id in range(2, 1100):
+        index.put(_product(prd_id, f"49{prd_id:011d}", f"付箋 {prd_id}"))
+    index.wait_rebuild(5)
+    stats = index.stats()
+    assert stats["rebuilding"] is False
+    assert stats["delta_products"] < 1098
+    assert stats["products"] == 1099
+    assert [p.PRD_ID for p in index.search("ボールペン")] == [1]
+    assert len(index.search("付箋", limit=100)) == 100
+
+
+def test_refresh_applies_other_worker_changes():
+    """他ワーカーでの変更をカタログのバージョン差分から取り込むテスト"""
+    clock = FakeClock()
+    index = ProductSearchIndex(refresh_interval=5, clock=clock)
+    word = _unique_word()
+    db = SessionLocal()
+    try:
+        index.refresh(db)
+        created = crud.create_product(db, "99" + uuid.uuid4().hex[:11], f"{word}ノート", 300)
+        product_id = created.PRD_ID
+
+        # 確認間隔内は取り込まない
+        clock.now = 1
+        index.refresh(db)
+        assert index.search(word) == []
+
+        clock.now = 10
+        index.refresh(db)
+        assert [p.PRD_ID for p in index.search(word)] == [product_id]
+
+        crud.delete_product(db, product_id)
+        clock.now = 20
+        index.refresh(db)
+        assert index.search(word) == []
+    finally:
+        db.close()
+
+
+def test_compaction_does_not_block_writers(monkeypatch):
+    """差分の畳み込みはバックグラウンドで行い、put は作り直しを待たずに戻るテスト"""
+    index = _index([_product(1, "4900000000011", "ボールペン")])
+    release = threading.Event()
+    build_structures = ProductSearchIndex._build_structures
+
+    def slow_build(products):
+        release.wait(5)
+        return build_structures(products)
+
+    monkeypatch.setattr(index, "_build_structures", slow_build)
+    for prd_id in range(2, 1100):
+        index.put(_product(prd_id, f"49{prd_id:011d}", f"付箋 {prd_id}"))
+    # 作り直し中も差分インデックスで検索できる
+    assert index.stats()["rebuilding"] is True
+    assert len(index.search("付箋", limit=2000)) == 1098
+
+    release.set()
+    index.wait_rebuild(5)
+    stats = index.stats()
+    assert stats["rebuilding"] is False
+    # 作り直し中に追加した商品だけが差分に残る
+    assert stats["delta_products"] < 1098
+    assert len(index.search("付箋", limit=2000)) == 1098
+
+
+def test_large_change_rebuilds_in_background():
+    """差分が多い場合はバックグラウンドでプライマリから作り直し、完了までは古いインデックスで検索するテスト"""
+    release = threading.Event()
+
+    def slow_sessions():
+        release.wait(5)
+        return SessionLocal()
+
+    clock = FakeClock()
+    index = ProductSearchIndex(refresh_interval=5, clock=clock, session_factory=slow_sessions)
+    index._compaction_threshold = lambda: 0
+    word = _unique_word()
+    db = SessionLocal()
+    try:
+        index.build(db)
+        created = crud.create_product(db, "99" + uuid.uuid4().hex[:11], f"{word}ファイル", 250)
+
+        clock.now = 10
+        index.refresh(db)  # 作り直しの完了を待たずに戻る
+        thread = index._rebuild_thread
+        assert index.stats()["rebuilding"] is True
+        assert index.search(word) == []
+        index.refresh(db, force=True)  # 作り直し中は重ねて開始しない
+        assert index._rebuild_thread is thread
+
+        release.set()
+        index.wait_rebuild(5)
+        assert index.stats()["rebuilding"] is False
+        assert [p.PRD_ID for p in index.search(word)] == [created.PRD_ID]
+    finally:
+        db.close()
+
+
+def test_search_api():
+    """商品名検索APIと、商品の作成・更新・削除の即時反映のテスト"""
+    word = _unique_word()
+    db = SessionLocal()
+    try:
+        product_search.refresh(db)
+        created = crud.create_product(db, "99" + uuid.uuid4().hex[:11], f"{word}消しゴム", 120)
+        product_id = created.PRD_ID
+
+        response = client.get("/api/products/search", params={"q": word.translate({c: c - 0x60 for c in range(0x30A1, 0x30F7)})})
+        assert response.status_code == 200
+        assert [p["PRD_ID"] for p in response.json()] == [product_id]
+
+        crud.update_product(db, product_id, name=f"定規{word}")
+        assert [p["NAME"] for p in client.get("/api/products/search", params={"q": word}).json()] == [f"定規{word}"]
+
+        crud.delete_product(db, product_id)
+        assert client.get("/api/products/search", params={"q": word}).json() == []
+    finally:
+        db.close()
+
+
+def test_search_api_does_not_query_products():
+    """検索でSQLを実行しない（インデックス構築済み・確認間隔内）テスト"""
+    client.get("/api/products/search", params={"q": "ペン"})
+    product_search._checked_at = product_search._clock()
+    with count_queries(engine) as counter:
+        response = client.get("/api/products/search", params={"q": "ペン", "limit": 5})
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
+    assert counter.count == 0
+
+
+def test_search_api_validation():
+    """検索語なしのリクエストのテスト"""
+    assert client.get("/api/products/search").status_code == 422
+    assert client.get("/api/products/search", params={"q": ""}).status_code == 422
+
+
+def test_import_updates_index():
+    """一括取り込みした商品が検索できるテスト"""
+    word = _unique_word()
+    db = SessionLocal()
+    try:
+        product_search.refresh(db)
+        code = "99" + uuid.uuid4().hex[:11]
+        data = f"CODE,NAME,PRICE\n{code},{word}クリップ,80\n".encode()
+        import_products(db, io.BytesIO(data), "csv")
+        assert [p.CODE for p in product_search.search(word)] == [code]
+    finally:
+        db.close()
@@ -0,0 +1,139 @@
+"""
+消費税の計算 のテスト
+"""
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from starlette.testclient import TestClient
+from main import app
+from database import SessionLocal
+from models import ProductMaster
+from app import crud
+from app.tax import TaxRateTable, UnknownTaxCodeError, compute_tax, included_tax
+
+client = TestClient(app)
+
+RATES = {"10": 10, "08": 8}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_included_tax_rounding():
+    """税込金額に含まれる税額の端数処理のテスト"""
+    assert included_tax(1000, 10) == 90  # 90.9...
+    assert included_tax(1000, 10, "ceil") == 91
+    assert included_tax(1000, 10, "half_up") == 91
+    assert included_tax(1080, 8) == 80
+    assert included_tax(1080, 8, "ceil") == 80
+    with pytest.raises(ValueError):
+        included_tax(1000, 10, "bankers")
+
+
+def test_compute_tax_rounds_once_per_rate():
+    """税率ごとに合計してから1回だけ端数処理するテスト（明細ごとの端数処理とは結果が異なる）"""
+    lines = [("08", 100)] * 3 + [("10", 180), ("10", 450)]
+    tax = compute_tax(lines, RATES)
+    # 8%: 300 × 8/108 = 22.2 → 22（明細ごとなら 7 × 3 = 21）、10%: 630 × 10/110 = 57.2 → 57
+    assert tax.by_rate == {"08": (300, 22), "10": (630, 57)}
+    assert tax.total == 930
+    assert tax.ex_tax == 930 - 22 - 57
+
+    assert compute_tax([], RATES) == (0, 0, {})
+    with pytest.raises(UnknownTaxCodeError):
+        compute_tax([("99", 100)], RATES)
+
+
+def test_rate_table_cache():
+    """税率マスタを有効期限内はキャッシュし、読み直しに失敗したら前回の税率を使うテスト"""
+    clock = FakeClock()
+    table = TaxRateTable(ttl=300, clock=clock)
+
+    class FailingSession:
+        calls = 0
+
+        def execute(self, *args, **kwargs):
+            FailingSession.calls += 1
+            raise OperationalError("SELECT", {}, Exception("database is unavailable"))
+
+    with pytest.raises(OperationalError):
+        table.get(FailingSession())
+
+    db = SessionLocal()
+    try:
+        rates = table.get(db)
+    finally:
+        db.close()
+    assert rates["10"] == 10 and rates["08"] == 8
+
+    assert table.get(FailingSession()) is rates  # 有効期限内はDBを見ない
+    clock.now = 301
+    assert table.get(FailingSession()) is rates  # 読み直しに失敗しても前回の税率を返す
+    # 失敗後は retry_interval 秒が過ぎるまで読み直さない
+    calls = FailingSession.calls
+    clock.now = 304
+    assert table.get(FailingSession()) is rates
+    assert FailingSession.calls == calls
+    clock.now = 307
+    assert table.get(FailingSession()) is rates
+    assert FailingSession.calls == calls + 1
+    table.invalidate()
+    assert table.get(FailingSession()) is rates
+
+
+def test_purchase_with_mixed_rates():
+    """標準税率と軽減税率の商品を含む購入の税抜合計と明細の消費税区分のテスト"""
+    db = SessionLocal()
+    try:
+        reduced = crud.create_product(db, "88" + uuid.uuid4().hex[:11], "緑茶 500ml", 216, tax_cd="08")
+        reduced_id = reduced.PRD_ID
+    finally:
+        db.close()
+
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": 1}, {"PRD_ID": reduced_id}]})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["total_amount"] == 180 + 216
+    # 10%: 180 × 10/110 = 16.3 → 16、8%: 216 × 8/108 = 16
+    assert data["total_amount_ex_tax"] == 180 + 216 - 16 - 16
+
+    db = SessionLocal()
+    try:
+        details = crud.get_transaction_details(db, data["transaction_id"])
+        assert [(detail.PRD_ID, detail.TAX_CD) for detail in details] == [(1, "10"), (reduced_id, "08")]
+    finally:
+        db.close()
+
+
+def test_unknown_tax_code_is_rejected():
+    """税率マスタにない消費税区分は商品の登録時に拒否し、既存の商品の購入は400になるテスト"""
+    db = SessionLocal()
+    try:
+        with pytest.raises(UnknownTaxCodeError):
+            crud.create_product(db, "88" + uuid.uuid4().hex[:11], "区分不明の商品", 100, tax_cd="99")
+        product_id = crud.create_product(db, "88" + uuid.uuid4().hex[:11], "区分を変える商品", 100).PRD_ID
+        with pytest.raises(UnknownTaxCodeError):
+            crud.update_product(db, product_id, tax_cd="99")
+
+        # 税率マスタから区分が削除された場合など、登録済みの商品の区分が不明になったとき
+        db.execute(update(ProductMaster).where(ProductMaster.PRD_ID == product_id).values(TAX_CD="99"))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": product_id}]})
+    assert response.status_code == 400
+    assert "99" in response.json()["detail"]
@@ -0,0 +1,148 @@
+"""
+取引API のテスト
+"""
+import csv
+import io
+import json
+import sys
+import uuid
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.testclient import TestClient
+from main import app
+from database import engine
+from app.query_stats import assert_max_queries
+
+client = TestClient(app)
+
+
+def _purchase(store_cd: str, pos_no: str = "P01") -> int:
+    response = client.post("/api/purchase", json={
+        "items": [{"PRD_ID": 1}],
+        "store_cd": store_cd,
+        "pos_no": pos_no
+    })
+    assert response.status_code == 201
+    return response.json()["transaction_id"]
+
+
+def test_get_transactions_keyset_pagination():
+    """店舗で絞り込んだ取引を新しい順にカーソルでたどるテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    created = [_purchase(store_cd) for _ in range(5)]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"store_cd": store_cd, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/transactions/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) <= 2
+        assert all(item["STORE_CD"] == store_cd for item in data["items"])
+        seen.extend(item["TRD_ID"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(created, reverse=True)
+
+
+def test_get_transactions_filter_by_pos():
+    """POS機で絞り込むテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    _purchase(store_cd, "P01")
+    target = _purchase(store_cd, "P02")
+
+    response = client.get("/api/transactions/", params={"store_cd": store_cd, "pos_no": "P02"})
+    assert response.status_code == 200
+    assert [item["TRD_ID"] for item in response.json()["items"]] == [target]
+
+
+def test_get_transactions_invalid_cursor():
+    """不正なカーソルで400になるテスト"""
+    response = client.get("/api/transactions/?cursor=%%%")
+    assert response.status_code == 400
+
+
+def test_export_transactions_ndjson():
+    """NDJSON形式のエクスポートテスト（明細1行ごとに1オブジェクト）"""
+    store_cd = uuid.uuid4().hex[:5]
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": 1}, {"PRD_ID": 2}], "store_cd": store_cd})
+    transaction_id = response.json()["transaction_id"]
+
+    response = client.get("/api/transactions/export", params={"store_cd": store_cd})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["TRD_ID"], row["DTL_ID"]) for row in rows] == [(transaction_id, 1), (transaction_id, 2)]
+    assert rows[0]["PRD_NAME"] == "テクワン・消せるボールペン 黒"
+    assert rows[0]["TOTAL_AMT"] == 630
+
+
+def test_export_transactions_csv():
+    """CSV形式のエクスポートテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 3}], "store_cd": store_cd})
+
+    response = client.get("/api/transactions/export", params={"store_cd": store_cd, "format": "csv"})
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["PRD_CODE"] == "4589901001032"
+    assert rows[0]["PRD_PRICE"] == "800"
+
+
+def test_export_transactions_date_range():
+    """期間外の取引が含まれないテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    client.post("/api/purchase", json={"items": [{"PRD_ID": 1}], "store_cd": store_cd})
+
+    response = client.get("/api/transactions/export", params={
+        "store_cd": store_cd, "date_from": "2000-01-01", "date_to": "2000-01-31"
+    })
+
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+def test_get_receipt():
+    """取引を明細付きで1回のクエリで取得するテスト"""
+    response = client.post("/api/purchase", json={"items": [{"PRD_ID": 1}, {"PRD_ID": 2}, {"PRD_ID": 1}]})
+    transaction_id = response.json()["transaction_id"]
+
+    with assert_max_queries(engine, 1):
+        response = client.get(f"/api/transactions/{transaction_id}")
+    assert response.status_code == 200
+    receipt = response.json()
+    assert receipt["TRD_ID"] == transaction_id
+    assert receipt["TOTAL_AMT"] == 180 + 450 + 180
+    assert [(line["DTL_ID"], line["PRD_ID"]) for line in receipt["details"]] == [(1, 1), (2, 2), (3, 1)]
+
+    assert client.get("/api/transactions/999999999").status_code == 404
+
+
+def test_get_receipts_without_n_plus_one():
+    """レシート一覧のSQL実行数がページの件数によらず一定のテスト"""
+    store_cd = uuid.uuid4().hex[:5]
+    created = [_purchase(store_cd) for _ in range(6)]
+
+    with assert_max_queries(engine, 2):
+        small = client.get("/api/transactions/receipts", params={"store_cd": store_cd, "limit": 1}).json()
+    with assert_max_queries(engine, 2):
+        large = client.get("/api/transactions/receipts", params={"store_cd": store_cd, "limit": 5}).json()
+
+    assert [receipt["TRD_ID"] for receipt in small["items"]] == created[-1:]
+    assert [receipt["TRD_ID"] for receipt in large["items"]] == created[::-1][:5]
+    assert all(len(receipt["details"]) == 1 for receipt in large["items"])
+
+    rest = client.get("/api/transactions/receipts", params={"store_cd": store_cd, "limit": 5, "cursor": large["next_cursor"]}).json()
+    assert [receipt["TRD_ID"] for receipt in rest["items"]] == created[:1]
+    assert rest["next_cursor"] is None
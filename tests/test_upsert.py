@@ -0,0 +1,46 @@
+"""
+方言ごとのUPSERT（app.upsert）のテスト
+"""
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert, text
+from database import SessionLocal
+from models import IdempotencyKey
+from app.upsert import upsert
+
+TABLE = IdempotencyKey.__table__
+
+
+def _raw_created_at(db, key):
+    """ドライバに渡った値（型の変換後）をそのまま読む"""
+    return db.execute(
+        text("SELECT CREATED_AT FROM idempotency_keys WHERE IDEMPOTENCY_KEY = :key"), {"key": key}
+    ).scalar_one()
+
+
+def test_upsert_converts_values_like_core_insert():
+    """型ごとの変換（DateTimeなど）が通常のINSERTと同じ値になり、重複したキーは更新されるテスト"""
+    created_at = datetime(2026, 1, 2, 3, 4, 5)
+    core_key, upsert_key = uuid.uuid4().hex, uuid.uuid4().hex
+    row = {"REQUEST_HASH": "a" * 64, "RESPONSE": "{}", "CREATED_AT": created_at}
+    db = SessionLocal()
+    try:
+        db.execute(insert(TABLE), [{**row, "IDEMPOTENCY_KEY": core_key}])
+        upsert(db, TABLE, [{**row, "IDEMPOTENCY_KEY": upsert_key}], key_columns=["IDEMPOTENCY_KEY"],
+               replace_columns=["REQUEST_HASH", "CREATED_AT"])
+        assert _raw_created_at(db, upsert_key) == _raw_created_at(db, core_key)
+
+        updated_at = datetime(2026, 2, 3, 4, 5, 6)
+        upsert(db, TABLE, [{**row, "IDEMPOTENCY_KEY": upsert_key, "REQUEST_HASH": "b" * 64, "CREATED_AT": updated_at}],
+               key_columns=["IDEMPOTENCY_KEY"], replace_columns=["REQUEST_HASH", "CREATED_AT"])
+        stored = db.query(IdempotencyKey).filter(IdempotencyKey.IDEMPOTENCY_KEY == upsert_key).one()
+        assert (stored.REQUEST_HASH, stored.CREATED_AT) == ("b" * 64, updated_at)
+    finally:
+        db.rollback()
+        db.close()